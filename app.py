@@ -12,19 +12,38 @@
 An app that syncs the frame range between a scene and a shot in Shotgun.
 
 """
+import os
+import socket
+import sqlite3
+import tempfile
+
 from sgtk.platform import Application
 
 
 class BasePlayblast(Application):
     playblast_manager = None
+    _tk_maya_playblast = None
+    _tracer = None
+    _fingerprint_index = None
+    _progress = None
 
     def init_app(self):
         """
         Called as the application is being initialized
         """
         self.engine.register_command(self.get_setting("menu_name"), self.run_app)
+        self.engine.register_command(
+            "Resume Playblast Publishes",
+            self.resume_publishes,
+            {"short_name": "resume_playblast_publishes", "type": "context_menu"},
+        )
         self._model_editor_parameters = self.get_setting("model_editor_parameters")
         self._playblast_parameters = self.get_setting("playblast_parameters")
+        if self.get_setting("resume_publishes", True) and self.engine.has_ui:
+            # once Maya is up, the app module isn't imported during startup
+            from sgtk.platform.qt import QtCore
+
+            QtCore.QTimer.singleShot(0, self._resume_unfinished_publishes)
 
     @property
     def playblast_parameters(self):
@@ -39,6 +58,10 @@ class BasePlayblast(Application):
         App teardown
         """
         self.log_debug("Destroying playblast app")
+        if self.playblast_manager is not None:
+            self.playblast_manager.shutdown()
+        if self._tracer is not None:
+            self._tracer.close()
 
     def run_app(self):
         """
@@ -50,13 +73,119 @@ class BasePlayblast(Application):
         except Exception:
             self.logger.error("Unable to launch playblast manager", exc_info=True)
 
+    def resume_publishes(self):
+        """
+        Finish the publishes left over by previous sessions, and retry the
+        failed ones. Without a UI, eg. in mayapy, wait until they are done.
+        """
+        try:
+            self.get_playblast_manager().resume_publishes(wait=not self.engine.has_ui, retry_failed=True)
+        except Exception:
+            self.logger.error("Unable to resume playblast publishes", exc_info=True)
+
+    def _resume_unfinished_publishes(self):
+        # the app package and the playblast manager are only loaded when a
+        # previous session left a publish unfinished
+        if not self._has_unfinished_publishes():
+            return
+        try:
+            self.get_playblast_manager().resume_publishes()
+        except Exception:
+            self.logger.error("Unable to resume playblast publishes", exc_info=True)
+
+    def _has_unfinished_publishes(self):
+        # a look at the job queue of tk_maya_playblast.job_queue, without importing it
+        path = os.path.join(self.get_temp_directory(), "tk-maya-playblast-jobs.sqlite")
+        if not os.path.isfile(path):
+            return False
+        try:
+            connection = sqlite3.connect(path, timeout=5)
+            try:
+                row = connection.execute(
+                    "SELECT 1 FROM jobs WHERE status IN ('pending', 'running') AND host = ? LIMIT 1",
+                    (socket.gethostname(),),
+                ).fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            # the job queue knows better
+            return True
+        return row is not None
+
+    @property
+    def tk_maya_playblast(self):
+        """
+        The app python module, imported once and shared with the hooks.
+        """
+        if self._tk_maya_playblast is None:
+            self._tk_maya_playblast = self.import_module("tk_maya_playblast")
+        return self._tk_maya_playblast
+
+    def get_temp_directory(self):
+        # Get value of optional config field "temp_directory". If path is
+        # invalid or not absolute, use default tempdir.
+        temp_directory = os.path.normpath(self.get_setting("temp_directory", "default"))
+        if not os.path.isabs(temp_directory):
+            temp_directory = tempfile.gettempdir()
+
+        # make sure it is exists
+        if not os.path.isdir(temp_directory):
+            os.mkdir(temp_directory)
+        return temp_directory
+
+    @property
+    def tracer(self):
+        """
+        Timing of the playblast stages, written to the metrics file.
+        """
+        if self._tracer is None:
+            tracing = self.tk_maya_playblast.tracing
+            temp_directory = self.get_temp_directory()
+            profile_directory = None
+            if self.get_setting("profile_playblast", False):
+                profile_directory = os.path.join(temp_directory, tracing.PROFILE_DIRECTORY)
+            self._tracer = tracing.Tracer(
+                self.logger,
+                os.path.join(temp_directory, tracing.METRICS_FILENAME),
+                max_bytes=self.get_setting("metrics_file_size", 10) * tracing.MEGABYTE,
+                profile_directory=profile_directory,
+            )
+        return self._tracer
+
+    @property
+    def progress(self):
+        """
+        Progress of the playblast and its publish, and its cancellation.
+        """
+        if self._progress is None:
+            self._progress = self.tk_maya_playblast.progress.PlayblastProgress()
+        return self._progress
+
+    @property
+    def fingerprint_index(self):
+        """
+        Checksums of the movies copied and uploaded, to skip doing it again.
+        """
+        if self._fingerprint_index is None:
+            fingerprints = self.tk_maya_playblast.fingerprints
+            self._fingerprint_index = fingerprints.FingerprintIndex(
+                os.path.join(self.get_temp_directory(), fingerprints.INDEX_FILENAME), self.logger
+            )
+        return self._fingerprint_index
+
+    def execute_hook_method(self, key, method_name, base_class=None, **kwargs):
+        # every hook call gets a span, named after the setting and method
+        with self.tracer.span("%s.%s" % (key, method_name)):
+            return super(BasePlayblast, self).execute_hook_method(
+                key, method_name, base_class=base_class, **kwargs
+            )
+
     def get_playblast_manager(self):
         """
         Create a singleton PlayblastManager object to be used by any app.
         """
         if self.playblast_manager is None:
-            tk_maya_playblast = self.import_module("tk_maya_playblast")
-            self.playblast_manager = tk_maya_playblast.PlayblastManager(self)
+            self.playblast_manager = self.tk_maya_playblast.PlayblastManager(self)
         return self.playblast_manager
 
 
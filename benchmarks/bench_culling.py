@@ -0,0 +1,98 @@
+"""
+Frustum culling of 1k, 10k and 100k synthetic bounding boxes, scattered
+over a set, against a camera dollying over 100 frames. The NumPy test of
+every box against every frame is compared to a plane by plane loop in
+Python, and the share of boxes which would be hidden is reported.
+"""
+import math
+import random
+
+from common import load, measure, parser, report, result
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+culling = load("culling")
+
+SIZES = (1000, 10000, 100000)
+FRAMES = 100
+# half width of the square set the boxes are scattered over
+SET_SIZE = 500.0
+FIELD_OF_VIEW = math.radians(54.0)
+ASPECT_RATIO = 16.0 / 9.0
+
+
+def camera(frames=FRAMES):
+    """
+    World matrices of a camera dollying along x and panning, looking
+    down -z at the set.
+    """
+    matrices = []
+    for frame in range(frames):
+        angle = math.radians(30.0) * frame / frames
+        cosine, sine = math.cos(angle), math.sin(angle)
+        matrices.append([
+            [cosine, 0.0, -sine, 0.0],
+            [0.0, 1.0, 0.0, 0.0],
+            [sine, 0.0, cosine, 0.0],
+            [-200.0 + 4.0 * frame, 10.0, 300.0, 1.0],
+        ])
+    horizontal = numpy.full(frames, math.tan(FIELD_OF_VIEW / 2.0))
+    return numpy.array(matrices), horizontal, horizontal / ASPECT_RATIO, 0.1, 2000.0
+
+
+def boxes(size):
+    random.seed(size)
+    minimums = []
+    maximums = []
+    for _ in range(size):
+        centre = (random.uniform(-SET_SIZE, SET_SIZE), random.uniform(0.0, 20.0), random.uniform(-SET_SIZE, SET_SIZE))
+        extent = random.uniform(0.5, 5.0)
+        minimums.append([value - extent for value in centre])
+        maximums.append([value + extent for value in centre])
+    return numpy.array(minimums), numpy.array(maximums)
+
+
+def per_box_python(minimums, maximums, planes):
+    seen = []
+    planes = planes.tolist()
+    for low, high in zip(minimums.tolist(), maximums.tolist()):
+        centre = [(a + b) / 2.0 for a, b in zip(low, high)]
+        extent = [(b - a) / 2.0 for a, b in zip(low, high)]
+        box_seen = False
+        for frame_planes in planes:
+            for a, b, c, d in frame_planes:
+                distance = a * centre[0] + b * centre[1] + c * centre[2] + d
+                radius = abs(a) * extent[0] + abs(b) * extent[1] + abs(c) * extent[2]
+                if distance + radius < 0:
+                    break
+            else:
+                box_seen = True
+                break
+        seen.append(box_seen)
+    return seen
+
+
+def main():
+    arguments = parser(__doc__).parse_args()
+    if numpy is None:
+        raise SystemExit("The culling benchmark needs NumPy")
+    planes = culling.frustum_planes(*camera())
+    results = []
+    for size in SIZES:
+        minimums, maximums = boxes(size)
+        hidden = int((~culling.visible(minimums, maximums, planes)).sum())
+        cases = [("frustum_numpy", lambda: culling.visible(minimums, maximums, planes))]
+        if size <= 10000:
+            # minutes at 100k
+            cases.append(("per_box_python", lambda: per_box_python(minimums, maximums, planes)))
+        for case, func in cases:
+            timings = measure(func, arguments.repeat)
+            results.append(result("culling", case, timings, boxes=size, frames=FRAMES, hidden=hidden))
+    report(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
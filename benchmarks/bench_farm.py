@@ -0,0 +1,121 @@
+"""
+The farm playblast orchestration with stand-in mayapy workers writing
+frames: a frame range split over 1 to 8 workers, a worker crashing, a
+worker leaving frames out, and a cancel, timed from the cancel until the
+render stopped.
+"""
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from common import FAKES_PATH, load, measure, parser, report, result
+
+farm = load("farm")
+
+FAKE_MAYAPY = os.path.join(FAKES_PATH, "fake_mayapy.py")
+START_FRAME = 1001
+END_FRAME = 1200
+WORKER_COUNTS = (1, 2, 4, 8)
+# seconds before the cancel, the workers are drawing frames by then
+CANCEL_AFTER = 0.3
+
+
+class Farm(object):
+    def __init__(self, root, workers):
+        self.root = root
+        self.pattern = os.path.join(root, "frames", "shot.%04d.png")
+        worker = farm.MayapyWorker("shot010_anim_v001.ma", "shotCam1", 960, 540, sys.executable, FAKE_MAYAPY)
+        logger = logging.getLogger("bench.farm")
+        # the injected failures are expected
+        logger.setLevel(logging.CRITICAL)
+        self.orchestrator = farm.FarmOrchestrator(worker, logger, workers=workers)
+
+    def clear(self):
+        shutil.rmtree(os.path.dirname(self.pattern), ignore_errors=True)
+
+    def render(self):
+        return self.orchestrator.render(START_FRAME, END_FRAME, self.pattern)
+
+    def expect_failure(self, message):
+        try:
+            self.render()
+        except farm.FarmError as error:
+            if message not in str(error):
+                raise RuntimeError("Unexpected farm error: %s" % error)
+        else:
+            raise RuntimeError("The farm render did not fail with %r" % message)
+
+
+def faults(**environment):
+    for name in [name for name in os.environ if name.startswith("FAKE_MAYAPY_")]:
+        del os.environ[name]
+    for name, value in environment.items():
+        os.environ["FAKE_MAYAPY_" + name.upper()] = str(value)
+
+
+def cancel_latency(root, workers):
+    """
+    Seconds from the cancel until render raised.
+    """
+    bench = Farm(root, workers)
+    bench.clear()
+    stopped = []
+
+    def run():
+        try:
+            bench.render()
+        except farm.FarmError:
+            stopped.append(time.time())
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    time.sleep(CANCEL_AFTER)
+    cancelled = time.time()
+    bench.orchestrator.cancel()
+    thread.join()
+    if not stopped:
+        raise RuntimeError("The cancelled farm render completed")
+    return stopped[0] - cancelled
+
+
+def main():
+    arguments = parser(__doc__)
+    arguments.add_argument("--frame-latency", type=float, default=0.005, help="seconds a worker draws a frame")
+    arguments.add_argument("--startup", type=float, default=0.2, help="seconds a worker takes to load the scene")
+    arguments = arguments.parse_args()
+    frames = END_FRAME - START_FRAME + 1
+    root = tempfile.mkdtemp(prefix="tk-maya-playblast-farm-")
+    results = []
+    try:
+        for workers in WORKER_COUNTS:
+            faults(frame_latency=arguments.frame_latency, startup=arguments.startup)
+            bench = Farm(root, workers)
+            chunks = len(farm.split_frame_range(START_FRAME, END_FRAME, workers))
+            timings = measure(lambda state: bench.render(), arguments.repeat, bench.clear)
+            results.append(result("farm", "render_%d_workers" % workers, timings, frames=frames, chunks=chunks))
+
+        bench = Farm(root, 4)
+        faults(frame_latency=arguments.frame_latency, startup=arguments.startup, fail_frame=START_FRAME + 10)
+        timings = measure(lambda state: bench.expect_failure("failed (1)"), arguments.repeat, bench.clear)
+        results.append(result("farm", "worker_failure", timings, frames=frames))
+
+        faults(frame_latency=arguments.frame_latency, startup=arguments.startup, skip_frames=END_FRAME)
+        timings = measure(lambda state: bench.expect_failure("were not rendered"), arguments.repeat, bench.clear)
+        results.append(result("farm", "missing_frames", timings, frames=frames))
+
+        # long enough that the render is still running when cancelled
+        faults(frame_latency=max(arguments.frame_latency, 0.05), startup=arguments.startup)
+        timings = [cancel_latency(root, 4) for _ in range(arguments.repeat)]
+        results.append(result("farm", "cancel", timings, frames=frames))
+    finally:
+        faults()
+        shutil.rmtree(root, ignore_errors=True)
+    report(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
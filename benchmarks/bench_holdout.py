@@ -0,0 +1,89 @@
+"""
+Holdout override of 1k, 10k and 100k meshes, against the per mesh
+getAttr/setAttr it replaces. Both run on an in-memory attribute store
+charging a fixed cost per command or API call.
+"""
+import random
+import time
+
+from common import load, measure, parser, report, result
+
+holdout = load("holdout")
+
+SIZES = (1000, 10000, 100000)
+# rough cost of a maya.cmds call, and of an MPlug access, in seconds
+COMMAND_LATENCY = 20e-6
+PLUG_LATENCY = 1e-6
+
+
+def spin(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class FakeAttributeStore(object):
+    """
+    holdOut values of meshes, with the interface of MayaHoldoutStore for the
+    API access and ls/getAttr/setAttr for the command one.
+    """
+
+    def __init__(self, size, enabled_ratio=0.1):
+        self.values = [random.random() < enabled_ratio for _ in range(size)]
+        self.names = ["|set|mesh%dShape" % index for index in range(size)]
+        self._indices = dict((name, index) for index, name in enumerate(self.names))
+
+    def __len__(self):
+        return len(self.values)
+
+    def read(self):
+        spin(PLUG_LATENCY * len(self.values))
+        return holdout.array("B", self.values)
+
+    def write(self, indices, value):
+        spin(PLUG_LATENCY * len(indices))
+        for index in indices:
+            self.values[index] = value
+
+    def ls(self):
+        spin(COMMAND_LATENCY + PLUG_LATENCY * len(self.names))
+        return list(self.names)
+
+    def get_attr(self, name):
+        spin(COMMAND_LATENCY)
+        return self.values[self._indices[name]]
+
+    def set_attr(self, name, value):
+        spin(COMMAND_LATENCY)
+        self.values[self._indices[name]] = value
+
+
+def per_mesh_commands(store):
+    original = {}
+    for item in store.ls():
+        original[item] = store.get_attr(item)
+        store.set_attr(item, True)
+    for item, state in original.items():
+        store.set_attr(item, state)
+
+
+def holdout_override(store):
+    with holdout.HoldoutOverride(store):
+        pass
+
+
+def main():
+    arguments = parser(__doc__).parse_args()
+    results = []
+    for size in SIZES:
+        def setup():
+            return FakeAttributeStore(size)
+
+        for case, func in (("per_mesh_commands", per_mesh_commands), ("holdout_override", holdout_override)):
+            timings = measure(func, arguments.repeat, setup)
+            results.append(result("holdout", case, timings, meshes=size))
+    report(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
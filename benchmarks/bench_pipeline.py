@@ -0,0 +1,386 @@
+"""
+The orchestration layer against the stand-in Maya scene and Shotgun
+server: PlayblastManager.do_playblast until the publish finished, every
+SetupWindow and PostPlayblast hook method, and the copy and upload stages
+on synthetic movies. Results include the number of Maya commands and
+Shotgun requests made per run.
+"""
+import importlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import common
+from common import ROOT, measure, parser, report, result
+
+common.use_fakes()
+
+import fake_maya  # noqa: E402
+import fake_shotgun  # noqa: E402
+import sgtk  # noqa: E402
+
+MEGABYTE = 1024 * 1024
+SCENES = {
+    "small": {"meshes": 100, "huds": 10, "frames": 48},
+    "medium": {"meshes": 2000, "huds": 20, "frames": 240},
+    "large": {"meshes": 20000, "huds": 40, "frames": 1000},
+}
+TEMPLATES = {
+    "template_work": "{root}/work/{Shot}_{Step}_v{version}.ma",
+    "template_shot": "{root}/shots/{Shot}_{Step}_v{version}.mov",
+    "template_sequence": "{root}/sequence/{Shot}_{Step}_v{version}.mov",
+}
+SCENE_NAME = "shot010_anim_v001.ma"
+
+
+def default_settings():
+    import yaml
+
+    with open(os.path.join(ROOT, "info.yml")) as handle:
+        configuration = yaml.safe_load(handle)["configuration"]
+    return dict(
+        (name, setting["default_value"])
+        for name, setting in configuration.items()
+        if "default_value" in setting
+    )
+
+
+class Bench(object):
+    """
+    A fresh app, scene and Shotgun server in a temporary directory.
+    """
+
+    def __init__(self, arguments, scene_size):
+        self.arguments = arguments
+        self.scene_size = scene_size
+        self.root = tempfile.mkdtemp(prefix="tk-maya-playblast-bench-")
+        self.app = None
+        self.shotgun = None
+        self.scene = None
+        self.reset()
+
+    def reset(self):
+        if self.app is not None and self.app.playblast_manager is not None:
+            self.app.playblast_manager.shutdown()
+        for name in ("work", "shots", "sequence", "temp"):
+            path = os.path.join(self.root, name)
+            shutil.rmtree(path, ignore_errors=True)
+            os.makedirs(path)
+        self.scene = fake_maya.configure(
+            command_latency=self.arguments.command_latency,
+            frame_latency=self.arguments.frame_latency,
+            frame_bytes=self.arguments.frame_bytes,
+            scene_name=os.path.join(self.root, "work", SCENE_NAME),
+            **SCENES[self.scene_size]
+        )
+        self.shotgun = fake_shotgun.FakeShotgun(
+            latency=self.arguments.shotgun_latency, bandwidth=self.arguments.bandwidth * MEGABYTE
+        )
+        settings = default_settings()
+        settings.update(
+            temp_directory=os.path.join(self.root, "temp"),
+            use_holdout=self.arguments.holdout,
+        )
+        templates = dict(
+            (name, sgtk.Template(definition.replace("{root}", self.root)))
+            for name, definition in TEMPLATES.items()
+        )
+        self.app = load_app()(settings, templates, os.path.join(ROOT, "hooks"), self.shotgun)
+        return self
+
+    def counters(self):
+        return {
+            "maya_commands": sum(self.scene.calls.values()),
+            "shotgun_requests": sum(self.shotgun.requests.values()),
+        }
+
+    def measure(self, func, repeat, setup=None):
+        """
+        measure() also averaging the Maya commands and Shotgun requests
+        made by func, leaving out the setup.
+        """
+        totals = dict.fromkeys(self.counters(), 0)
+
+        def counted(*args):
+            before = self.counters()
+            func(*args)
+            for name, value in self.counters().items():
+                totals[name] += value - before[name]
+
+        timings = measure(counted, repeat, setup)
+        return timings, dict((name, value / float(repeat)) for name, value in totals.items())
+
+    def movie(self, size=None):
+        path = os.path.join(self.root, "temp", "shot010_anim_v001.mov")
+        if not os.path.exists(path):
+            common.synthetic_file(path, size or self.arguments.movie_size * MEGABYTE)
+        return path
+
+    def close(self):
+        if self.app.playblast_manager is not None:
+            self.app.playblast_manager.shutdown()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def load_app():
+    from importlib.util import module_from_spec, spec_from_file_location
+
+    spec = spec_from_file_location("tk_maya_playblast_app", os.path.join(ROOT, "app.py"))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BasePlayblast
+
+
+def bench_do_playblast(bench, repeat):
+    """
+    Time in do_playblast, Maya is blocked for that long, and until the
+    publish stages finished in the background.
+    """
+    foreground = []
+    total = []
+    counters = []
+    for _ in range(repeat):
+        bench.reset()
+        manager = bench.app.get_playblast_manager()
+        manager.set_shot_viewer(False)
+        manager.set_create_version(True)
+        manager.set_upload_to_shotgun(True)
+        finished = threading.Event()
+        manager.publish_pipeline.job_finished.connect(lambda name, successful: finished.set())
+        start = time.time()
+        manager.do_playblast()
+        foreground.append(time.time() - start)
+        if not finished.wait(600):
+            raise RuntimeError("The publish did not finish")
+        total.append(time.time() - start)
+        counters.append(bench.counters())
+    extra = dict(counters[-1], frames=SCENES[bench.scene_size]["frames"])
+    return [
+        result("do_playblast", "%s_foreground" % bench.scene_size, foreground, **extra),
+        result("do_playblast", "%s_published" % bench.scene_size, total, **extra),
+    ]
+
+
+def bench_setup_window(bench, repeat):
+    results = []
+
+    def call(method, **kwargs):
+        return bench.app.execute_hook_method("hook_setup_window", method, **kwargs)
+
+    def case(name, func, setup=None):
+        bench.reset()
+        timings, counters = bench.measure(func, repeat, setup)
+        results.append(result("setup_window", "%s_%s" % (bench.scene_size, name), timings, **counters))
+
+    def open_window(state=None):
+        with call("create_window", camera="persp"):
+            pass
+
+    case("get_playblast_params", lambda: call("get_playblast_params", filename=bench.movie(1)))
+    case("set_hud", lambda: call("set_hud"))
+    case("unset_huds", lambda huds: call("unset_huds", huds=huds), setup=lambda: call("set_hud"))
+    case("create_window", open_window, setup=lambda: bench.app.get_playblast_manager().editor_pool.clear())
+    case("create_window_reused", open_window, setup=open_window)
+    return results
+
+
+def bench_post_playblast(bench, repeat):
+    bench.reset()
+    app = bench.app
+    results = []
+    data = {
+        "project": app.context.project,
+        "code": "shot010_anim_v001.mov",
+        "description": "benchmark",
+        "sg_path_to_movie": os.path.join(bench.root, "shots", "shot010_anim_v001.mov"),
+        "entity": app.context.entity,
+        "sg_task": app.context.task,
+    }
+
+    def call(method, **kwargs):
+        return app.execute_hook_method("hook_post_playblast", method, **kwargs)
+
+    def case(name, func, setup=None):
+        timings, counters = bench.measure(func, repeat, setup)
+        results.append(result("post_playblast", name, timings, **counters))
+
+    def clear_copies():
+        for name in ("shots", "sequence"):
+            shutil.rmtree(os.path.join(bench.root, name), ignore_errors=True)
+
+    movie = bench.movie()
+    scene_name = bench.scene.scene_name
+    case("copy_file", lambda state: call("copy_file", source=movie, scene_name=scene_name), setup=clear_copies)
+    case("copy_file_unchanged", lambda: call("copy_file", source=movie, scene_name=scene_name))
+    case("get_version_requests", lambda: call("get_version_requests", data=dict(data)))
+    case("create_version", lambda: call("create_version", data=dict(data)))
+    version = call("create_version", data=dict(data))
+    case(
+        "upload_movie",
+        lambda: call(
+            "upload_movie",
+            data={"path": data["sg_path_to_movie"], "project": data["project"], "version_id": version["id"]},
+        ),
+    )
+    # pressing Playblast again without changes, the Version already has the movie
+    checksum = app.fingerprint_index.checksum(data["sg_path_to_movie"])
+    app.fingerprint_index.record_upload("Version", version["id"], checksum)
+    case(
+        "upload_movie_unchanged",
+        lambda: call(
+            "upload_movie",
+            data={
+                "path": data["sg_path_to_movie"],
+                "project": data["project"],
+                "version_id": version["id"],
+                "checksum": checksum,
+            },
+        ),
+    )
+    return results
+
+
+def bench_stages(bench, repeat):
+    """
+    The copy and upload on their own, outside of the hooks.
+    """
+    package = importlib.import_module("tk_maya_playblast")
+    results = []
+    bench.reset()
+    movie = bench.movie()
+    size = os.path.getsize(movie)
+    destinations = [os.path.join(bench.root, name, os.path.basename(movie)) for name in ("shots", "sequence")]
+
+    def clear_copies():
+        for destination in destinations:
+            if os.path.exists(destination):
+                os.remove(destination)
+
+    timings = measure(
+        lambda state: package.file_copy.copy_to_destinations(movie, destinations), repeat, clear_copies
+    )
+    results.append(result("stages", "copy", timings, bytes=size, bytes_per_second=size / min(timings)))
+
+    uploader = package.upload.ChunkedUploader(
+        package.upload.ShotgunTransport(bench.shotgun),
+        logging.getLogger("bench"),
+        state_directory=os.path.join(bench.root, "temp", "uploads"),
+    )
+    timings, counters = bench.measure(lambda: uploader.upload("Version", 1, movie), repeat)
+    results.append(result("stages", "upload", timings, bytes=size, bytes_per_second=size / min(timings), **counters))
+    return results
+
+
+def bench_upload_faults(bench, repeat):
+    """
+    The upload against a failing server: parts retried with backoff, an
+    upload interrupted by a part which keeps failing then resumed from the
+    confirmed parts, and a resume whose server session expired, starting
+    over. The backoff is recorded instead of slept.
+    """
+    package = importlib.import_module("tk_maya_playblast")
+    upload = package.upload
+    results = []
+    bench.reset()
+    shotgun = bench.shotgun
+    part_size = upload.MIN_PART_SIZE
+    movie = common.synthetic_file(os.path.join(bench.root, "temp", "faults.mov"), 3 * part_size + 1)
+    size = os.path.getsize(movie)
+    state_directory = os.path.join(bench.root, "temp", "uploads")
+    logger = logging.getLogger("bench.upload_faults")
+    # the injected failures are expected
+    logger.setLevel(logging.ERROR)
+    backoff = []
+    uploader = upload.ChunkedUploader(
+        upload.ShotgunTransport(shotgun),
+        logger,
+        part_size=part_size,
+        state_directory=state_directory,
+        sleep=backoff.append,
+    )
+
+    def case(name, setup, expected_sent):
+        stats = []
+
+        def run(state=None):
+            uploader.upload("Version", 1, movie)
+            stats.append(uploader.stats)
+
+        def prepare():
+            shotgun.clear_faults()
+            shutil.rmtree(state_directory, ignore_errors=True)
+            setup()
+            del backoff[:]
+
+        timings, counters = bench.measure(run, repeat, prepare)
+        sent = stats[-1].bytes_sent
+        if sent != expected_sent:
+            raise RuntimeError("%s sent %d bytes instead of %d" % (name, sent, expected_sent))
+        results.append(result(
+            "upload_faults",
+            name,
+            timings,
+            bytes=size,
+            bytes_sent=sent,
+            bytes_resumed=stats[-1].bytes_resumed,
+            retries=stats[-1].retries,
+            backoff_seconds=sum(backoff),
+            **counters
+        ))
+
+    def interrupt():
+        # the second part fails more than the retries allow, the first one is confirmed
+        shotgun.fail("upload_part", times=upload.MAX_RETRIES + 1, after=1)
+        try:
+            uploader.upload("Version", 1, movie)
+        except upload.UploadError:
+            pass
+        else:
+            raise RuntimeError("The upload was not interrupted")
+
+    def expire():
+        interrupt()
+        shotgun.expire_uploads()
+
+    case("retry", lambda: shotgun.fail("upload_part", times=2, after=1), size)
+    case("resume", interrupt, size - part_size)
+    case("resume_expired", expire, size)
+    return results
+
+
+def main():
+    arguments = parser(__doc__)
+    arguments.add_argument("--scenes", default="small,medium", help="comma separated: %s" % ", ".join(SCENES))
+    arguments.add_argument("--command-latency", type=float, default=fake_maya.COMMAND_LATENCY)
+    arguments.add_argument("--frame-latency", type=float, default=0.005, help="seconds to draw a frame")
+    arguments.add_argument("--frame-bytes", type=int, default=fake_maya.FRAME_BYTES)
+    arguments.add_argument("--shotgun-latency", type=float, default=0.05, help="seconds per Shotgun request")
+    arguments.add_argument("--bandwidth", type=float, default=50, help="upload MB/s, 0 for no limit")
+    arguments.add_argument("--movie-size", type=int, default=50, help="MB, for the copy and upload")
+    arguments.add_argument("--holdout", action="store_true", help="turn the use_holdout setting on")
+    arguments = arguments.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for scene_size in arguments.scenes.split(","):
+        bench = Bench(arguments, scene_size)
+        try:
+            results.extend(bench_do_playblast(bench, arguments.repeat))
+            results.extend(bench_setup_window(bench, arguments.repeat))
+        finally:
+            bench.close()
+    bench = Bench(arguments, "small")
+    try:
+        results.extend(bench_post_playblast(bench, arguments.repeat))
+        results.extend(bench_stages(bench, arguments.repeat))
+        results.extend(bench_upload_faults(bench, arguments.repeat))
+    finally:
+        bench.close()
+    report(results, arguments.output)
+
+
+if __name__ == "__main__":
+    main()
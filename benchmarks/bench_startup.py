@@ -0,0 +1,66 @@
+"""
+Import time of the app package and of the hooks, each measured in a fresh
+interpreter with the stand-in Maya and Toolkit modules. The stand-in pymel
+sleeps on import, so a module level pymel import shows up as a slow start.
+Exits with an error when an import takes longer than --max-seconds, or
+imports pymel or NumPy.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from common import FAKES_PATH, ROOT, parser, report, result
+
+SCRIPT = """
+import json, sys, time
+sys.path[:0] = [%(fakes)r, %(python)r]
+start = time.time()
+%(statement)s
+elapsed = time.time() - start
+print(json.dumps({"elapsed": elapsed, "pymel": "pymel.core" in sys.modules, "numpy": "numpy" in sys.modules}))
+"""
+
+HOOK_IMPORT = """
+from importlib.util import module_from_spec, spec_from_file_location
+for name in ("setup_window", "post_playblast"):
+    spec = spec_from_file_location(name, %r + "/hooks/" + name + ".py")
+    spec.loader.exec_module(module_from_spec(spec))
+""" % ROOT
+
+CASES = (
+    ("import_package", "import tk_maya_playblast"),
+    ("import_hooks", HOOK_IMPORT),
+)
+
+
+def run(statement):
+    source = SCRIPT % {
+        "fakes": FAKES_PATH,
+        "python": os.path.join(ROOT, "python"),
+        "statement": statement,
+    }
+    output = subprocess.check_output([sys.executable, "-c", source])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    arguments = parser(__doc__)
+    arguments.add_argument("--max-seconds", type=float, default=0.5)
+    arguments = arguments.parse_args()
+    results = []
+    failed = False
+    for case, statement in CASES:
+        runs = [run(statement) for _ in range(arguments.repeat)]
+        pymel = any(entry["pymel"] for entry in runs)
+        numpy = any(entry["numpy"] for entry in runs)
+        results.append(
+            result("startup", case, [entry["elapsed"] for entry in runs], pymel_imported=pymel, numpy_imported=numpy)
+        )
+        failed = failed or pymel or numpy or results[-1]["median"] > arguments.max_seconds
+    report(results, arguments.output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
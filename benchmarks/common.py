@@ -0,0 +1,126 @@
+"""
+Helpers shared by the benchmarks, which run with a plain python, without
+Maya or Shotgun.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "tk_maya_playblast"
+PACKAGE_PATH = os.path.join(ROOT, "python", PACKAGE)
+FAKES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fakes")
+
+
+def load(name):
+    """
+    Import a module of the app package without running the package
+    ``__init__``, which needs Maya and Toolkit.
+    """
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [PACKAGE_PATH]
+        sys.modules[PACKAGE] = package
+    qualified_name = "%s.%s" % (PACKAGE, name)
+    if qualified_name not in sys.modules:
+        path = os.path.join(PACKAGE_PATH, name + ".py")
+        try:
+            from importlib.util import module_from_spec, spec_from_file_location
+        except ImportError:
+            import imp
+            module = imp.load_source(qualified_name, path)
+        else:
+            module = module_from_spec(spec_from_file_location(qualified_name, path))
+            sys.modules[qualified_name] = module
+            module.__spec__.loader.exec_module(module)
+        setattr(sys.modules[PACKAGE], name, module)
+    return sys.modules[qualified_name]
+
+
+def use_fakes():
+    """
+    Put the stand-in Maya and Toolkit modules and the app package first on
+    sys.path, to import the app as Toolkit would.
+    """
+    for path in (os.path.join(ROOT, "python"), FAKES_PATH):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def synthetic_file(path, size):
+    """
+    A movie stand-in of size bytes, random so it can't be compressed or
+    deduplicated.
+    """
+    chunk = os.urandom(min(size, 1024 * 1024) or 1)
+    with open(path, "wb") as handle:
+        remaining = size
+        while remaining > 0:
+            handle.write(chunk[:remaining])
+            remaining -= len(chunk)
+    return path
+
+
+def git_commit():
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode("utf-8").strip()
+
+
+def measure(func, repeat=5, setup=None):
+    """
+    Run func repeat times, returning the timings in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.time()
+        func(state) if setup else func()
+        timings.append(time.time() - start)
+    return timings
+
+
+def result(benchmark, case, timings, **extra):
+    timings = sorted(timings)
+    entry = {
+        "benchmark": benchmark,
+        "case": case,
+        "min": timings[0],
+        "median": timings[len(timings) // 2],
+        "max": timings[-1],
+        "repeat": len(timings),
+    }
+    entry.update(extra)
+    return entry
+
+
+def parser(description):
+    arguments = argparse.ArgumentParser(description=description)
+    arguments.add_argument("--repeat", type=int, default=5, help="runs of each case")
+    arguments.add_argument("--output", help="write the results to this JSON file instead of stdout")
+    return arguments
+
+
+def report(results, output=None):
+    """
+    Machine readable results, comparable across commits.
+    """
+    document = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as handle:
+            json.dump(document, handle, indent=2, sort_keys=True)
+    else:
+        json.dump(document, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
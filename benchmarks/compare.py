@@ -0,0 +1,45 @@
+"""
+Compare two benchmark result files, eg. of two commits, by median time.
+Exits with an error when a case got slower than --threshold times.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as handle:
+        document = json.load(handle)
+    return document, dict(((entry["benchmark"], entry["case"]), entry) for entry in document["results"])
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("baseline")
+    arguments.add_argument("candidate")
+    arguments.add_argument("--threshold", type=float, default=1.2, help="slowdown ratio failing the comparison")
+    arguments = arguments.parse_args()
+
+    baseline_document, baseline = load(arguments.baseline)
+    candidate_document, candidate = load(arguments.candidate)
+    sys.stdout.write("%s -> %s\n" % (baseline_document.get("commit"), candidate_document.get("commit")))
+    regressions = 0
+    for key in sorted(set(baseline) & set(candidate)):
+        before = baseline[key]["median"]
+        after = candidate[key]["median"]
+        ratio = after / before if before else float("inf")
+        regressed = ratio > arguments.threshold
+        regressions += regressed
+        sys.stdout.write(
+            "%-16s %-32s %10.4fs %10.4fs %6.2fx%s\n"
+            % (key[0], key[1], before, after, ratio, "  SLOWER" if regressed else "")
+        )
+    for key in sorted(set(baseline) ^ set(candidate)):
+        sys.stdout.write("%-16s %-32s only in %s\n" % (
+            key[0], key[1], "baseline" if key in baseline else "candidate"
+        ))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+"""
+Stand-ins for the Maya and Toolkit modules, put first on sys.path by the
+benchmarks. They only implement what the app uses.
+"""
@@ -0,0 +1,182 @@
+"""
+In-memory Maya scene behind the stand-in maya.cmds, maya.mel and
+maya.api.OpenMaya. Every command charges a fixed latency and is counted,
+scene sizes and latencies are set with :func:`configure`.
+"""
+import os
+import re
+import time
+from collections import Counter, OrderedDict
+
+DEFAULT_HUDS = ("HUDFocalLength", "HUDCurrentFrame", "HUDCameraNames", "HUDViewAxis")
+# rough cost of a maya.cmds call, of an MPlug access and of drawing a frame
+COMMAND_LATENCY = 20e-6
+PLUG_LATENCY = 1e-6
+FRAME_LATENCY = 0.0
+FRAME_BYTES = 64 * 1024
+_CHUNK = os.urandom(1024 * 1024)
+
+
+def spin(seconds):
+    # busy wait, a command holds Maya's main thread and the GIL
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+def write_bytes(path, size):
+    """
+    A file of size bytes which doesn't compress.
+    """
+    with open(path, "wb") as handle:
+        while size > 0:
+            handle.write(_CHUNK[:size])
+            size -= len(_CHUNK)
+
+
+class Mesh(object):
+    __slots__ = ("name", "holdout", "locked")
+
+    def __init__(self, name, holdout=False, locked=False):
+        self.name = name
+        self.holdout = holdout
+        self.locked = locked
+
+
+class Scene(object):
+    def __init__(
+        self,
+        meshes=100,
+        huds=20,
+        frames=100,
+        command_latency=COMMAND_LATENCY,
+        plug_latency=PLUG_LATENCY,
+        frame_latency=FRAME_LATENCY,
+        frame_bytes=FRAME_BYTES,
+        scene_name="/tmp/tk-maya-playblast-bench/work/shot010_anim_v001.ma",
+    ):
+        self.meshes = [Mesh("mesh%dShape" % index, holdout=index % 10 == 0) for index in range(meshes)]
+        names = list(DEFAULT_HUDS) + ["HUDCustom%d" % index for index in range(max(0, huds - len(DEFAULT_HUDS)))]
+        self.huds = OrderedDict((name, True) for name in names[:huds])
+        self.attributes = {
+            "defaultResolution.width": 1920,
+            "defaultResolution.height": 1080,
+            "hardwareRenderingGlobals.lineAAEnable": 0,
+            "hardwareRenderingGlobals.multiSampleEnable": 0,
+            "hardwareRenderingGlobals.multiSampleCount": 8,
+        }
+        self.playback_range = [1.0, float(frames)]
+        self.animation_range = [1.0, float(frames)]
+        self.command_latency = command_latency
+        self.plug_latency = plug_latency
+        self.frame_latency = frame_latency
+        self.frame_bytes = frame_bytes
+        self.scene_name = scene_name
+        self.windows = set()
+        self.editors = {}
+        self.script_jobs = set()
+        self.procs = {}
+        self.calls = Counter()
+
+    def call(self, command, items=0):
+        self.calls[command] += 1
+        spin(self.command_latency + self.plug_latency * items)
+
+
+scene = Scene(meshes=0, huds=0, command_latency=0.0, plug_latency=0.0)
+
+
+# time change callbacks registered through OpenMaya.MDGMessage
+time_callbacks = {}
+# 3d view draw callbacks registered through OpenMayaUI.MUiMessage, by id
+pre_render_callbacks = {}
+post_render_callbacks = {}
+
+
+class Time(object):
+    # the MTime given to time change callbacks
+    def __init__(self, value):
+        self.value = value
+
+
+def time_changed(frame):
+    for callback in list(time_callbacks.values()):
+        callback(Time(frame), None)
+
+
+def draw(panel, seconds):
+    """
+    Draw a frame in a panel, taking seconds.
+    """
+    for registered, callback in list(pre_render_callbacks.values()):
+        if registered == panel:
+            callback(panel, None)
+    spin(seconds)
+    for registered, callback in list(post_render_callbacks.values()):
+        if registered == panel:
+            callback(panel, None)
+
+
+def configure(**kwargs):
+    """
+    Start a new scene, see :class:`Scene` for the arguments.
+    """
+    global scene
+    scene = Scene(**kwargs)
+    return scene
+
+
+def get_scene():
+    return scene
+
+
+# MEL understood by the stand-in maya.mel, what scene_state generates
+_MEL_STATEMENTS = (
+    (re.compile(r'^\$state\[size\(\$state\)\] = `playbackOptions -query -(\w+)`;$'), "query_playback"),
+    (re.compile(r'^string \$huds\[\] = `headsUpDisplay -listHeadsUpDisplays`;$'), "list_huds"),
+    (re.compile(r'^\$state\[size\(\$state\)\] = size\(\$huds\);$'), "count_huds"),
+    (re.compile(r'^for \(\$hud in \$huds\) \{$'), "query_huds"),
+    (re.compile(r'^\$state\[size\(\$state\)\] = `getAttr "(.+)"`;$'), "get_attr"),
+    (re.compile(r'^playbackOptions -edit -minTime (\S+) -maxTime (\S+);$'), "edit_playback"),
+    (re.compile(r'^headsUpDisplay -edit -visible (\d) "(.+)";$'), "edit_hud"),
+    (re.compile(r'^setAttr "(.+)" (\S+);$'), "set_attr"),
+)
+_PLAYBACK_FLAGS = {
+    "minTime": ("playback_range", 0),
+    "maxTime": ("playback_range", 1),
+    "animationStartTime": ("animation_range", 0),
+    "animationEndTime": ("animation_range", 1),
+}
+
+
+def run_mel(source):
+    """
+    Run a block of the MEL statements above, returning the $state array.
+    """
+    state = []
+    for line in source.splitlines():
+        line = line.strip()
+        for expression, action in _MEL_STATEMENTS:
+            match = expression.match(line)
+            if match:
+                break
+        else:
+            continue
+        spin(scene.plug_latency)
+        if action == "query_playback":
+            attribute, index = _PLAYBACK_FLAGS[match.group(1)]
+            state.append(str(getattr(scene, attribute)[index]))
+        elif action == "count_huds":
+            state.append(str(len(scene.huds)))
+        elif action == "query_huds":
+            for name, visible in scene.huds.items():
+                state.extend((name, str(int(visible))))
+        elif action == "get_attr":
+            state.append(str(scene.attributes.get(match.group(1), 0)))
+        elif action == "edit_playback":
+            scene.playback_range = [float(match.group(1)), float(match.group(2))]
+        elif action == "edit_hud":
+            scene.huds[match.group(2)] = bool(int(match.group(1)))
+        elif action == "set_attr":
+            scene.attributes[match.group(1)] = float(match.group(2))
+    return state
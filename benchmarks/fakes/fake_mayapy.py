@@ -0,0 +1,55 @@
+"""
+Stand-in for mayapy running farm_worker.py, taking the same arguments.
+
+Each frame is written after FAKE_MAYAPY_FRAME_LATENCY seconds, once the
+worker waited FAKE_MAYAPY_STARTUP seconds like mayapy loading the scene.
+Faults are injected through the environment: the worker whose chunk holds
+FAKE_MAYAPY_FAIL_FRAME exits with an error before writing it, and the
+comma separated FAKE_MAYAPY_SKIP_FRAMES are not written although the
+worker succeeds.
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(ROOT, "python", "tk_maya_playblast"))
+
+from farm_worker import parse_args  # noqa: E402
+
+FRAME_LATENCY = 0.005
+FRAME_BYTES = 1024
+
+
+def _frames(name):
+    return set(int(frame) for frame in os.environ.get(name, "").split(",") if frame.strip())
+
+
+def render(args):
+    time.sleep(float(os.environ.get("FAKE_MAYAPY_STARTUP", 0)))
+    frame_latency = float(os.environ.get("FAKE_MAYAPY_FRAME_LATENCY", FRAME_LATENCY))
+    frame_bytes = int(os.environ.get("FAKE_MAYAPY_FRAME_BYTES", FRAME_BYTES))
+    fail_frame = os.environ.get("FAKE_MAYAPY_FAIL_FRAME")
+    skipped = _frames("FAKE_MAYAPY_SKIP_FRAMES")
+    output_directory = os.path.dirname(args.output)
+    if output_directory and not os.path.isdir(output_directory):
+        try:
+            os.makedirs(output_directory)
+        except OSError:
+            # made by another worker meanwhile
+            pass
+    for frame in range(args.start, args.end + 1):
+        if fail_frame and frame == int(fail_frame):
+            sys.stderr.write("Fatal Error. Attempting to save in %s\n" % args.scene)
+            sys.exit(1)
+        time.sleep(frame_latency)
+        if frame in skipped:
+            continue
+        with open(args.output % frame, "wb") as handle:
+            handle.write(b"\0" * frame_bytes)
+        sys.stdout.write("frame %d\n" % frame)
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    render(parse_args(sys.argv[1:]))
@@ -0,0 +1,177 @@
+"""
+Shotgun server stand-in, with the shotgun_api3 calls the app makes.
+
+Each request sleeps for the round trip latency, uploads also for the time
+the data takes at the given bandwidth, like a remote server would without
+holding the GIL. Failures can be injected in the requests, and multipart
+upload sessions expired, to exercise the retries and resumes.
+"""
+import itertools
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+class ServerError(Exception):
+    """
+    An injected failure of a request, eg. a dropped connection.
+    """
+
+
+class _Config(object):
+    scheme = "https"
+    server = "bench.shotgunstudio.com"
+
+
+class FakeShotgun(object):
+    def __init__(self, latency=0.05, bandwidth=0, s3_uploads_enabled=True):
+        """
+        :param latency: seconds per request
+        :param bandwidth: upload bytes per second, 0 for no limit
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.server_info = {"version": (8, 0, 0), "s3_uploads_enabled": s3_uploads_enabled}
+        self.config = _Config()
+        self.entities = {}
+        self.uploads = {}
+        self.requests = Counter()
+        self.failures = Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # request name to [requests let through, requests failed] pairs
+        self._faults = defaultdict(list)
+        self._expired = set()
+
+    def fail(self, name, times=1, after=0):
+        """
+        Fail the next times requests of name, eg. "upload_part", once after
+        of them went through.
+        """
+        with self._lock:
+            self._faults[name].append([after, times])
+
+    def clear_faults(self):
+        with self._lock:
+            self._faults.clear()
+
+    def expire_uploads(self):
+        """
+        Forget the multipart uploads begun so far, their parts and
+        completion fail like a server session which timed out.
+        """
+        with self._lock:
+            self._expired.add(next(self._ids))
+
+    def _request(self, name, size=0):
+        with self._lock:
+            self.requests[name] += 1
+            faults = self._faults.get(name)
+            if faults:
+                fault = faults[0]
+                if fault[0] > 0:
+                    fault[0] -= 1
+                else:
+                    fault[1] -= 1
+                    if not fault[1]:
+                        faults.pop(0)
+                    self.failures[name] += 1
+                    raise ServerError("Injected failure of %s" % name)
+        delay = self.latency
+        if self.bandwidth:
+            delay += size / float(self.bandwidth)
+        time.sleep(delay)
+
+    def _match(self, entity, filters):
+        return all(entity.get(field) == value for field, operator, value in filters if operator == "is")
+
+    def _find(self, entity_type, filters):
+        with self._lock:
+            entities = [entity for entity in self.entities.values() if entity["type"] == entity_type]
+        return [entity for entity in entities if self._match(entity, filters)]
+
+    def find(self, entity_type, filters, fields=None):
+        self._request("find")
+        return [{"type": entity_type, "id": entity["id"]} for entity in self._find(entity_type, filters)]
+
+    def find_one(self, entity_type, filters, fields=None):
+        self._request("find_one")
+        entities = self._find(entity_type, filters)
+        return {"type": entity_type, "id": entities[0]["id"]} if entities else None
+
+    def _create(self, entity_type, data):
+        with self._lock:
+            entity = dict(data, type=entity_type, id=next(self._ids))
+            self.entities[(entity_type, entity["id"])] = entity
+        return dict(entity)
+
+    def _update(self, entity_type, entity_id, data):
+        with self._lock:
+            entity = self.entities[(entity_type, entity_id)]
+            entity.update(data)
+            return dict(entity)
+
+    def create(self, entity_type, data, return_fields=None):
+        self._request("create")
+        return self._create(entity_type, data)
+
+    def update(self, entity_type, entity_id, data):
+        self._request("update")
+        return self._update(entity_type, entity_id, data)
+
+    def batch(self, requests):
+        self._request("batch")
+        results = []
+        for request in requests:
+            if request["request_type"] == "create":
+                results.append(self._create(request["entity_type"], request["data"]))
+            elif request["request_type"] == "update":
+                results.append(self._update(request["entity_type"], request["entity_id"], request["data"]))
+            else:
+                raise ValueError("Unsupported batch request %s" % request["request_type"])
+        return results
+
+    def upload(self, entity_type, entity_id, path, field_name=None, display_name=None, tag_list=None):
+        size = os.path.getsize(path)
+        self._request("upload", size)
+        with self._lock:
+            self.uploads[(entity_type, entity_id, field_name)] = size
+        return entity_id
+
+    # multipart upload internals used by upload.ShotgunTransport
+
+    def _get_attachment_upload_info(self, is_thumbnail, filename, is_multipart_upload):
+        self._request("upload_info")
+        return {"upload_info": {"filename": filename, "parts": [], "session": next(self._ids)}, "upload_type": "s3"}
+
+    def _check_session(self, upload_info):
+        with self._lock:
+            expired = any(upload_info["upload_info"]["session"] < mark for mark in self._expired)
+        if expired:
+            raise ServerError("Upload session of %s expired" % upload_info["upload_info"]["filename"])
+
+    def _get_upload_part_link(self, upload_info, filename, part_number):
+        self._request("upload_part_link")
+        self._check_session(upload_info)
+        return "https://storage.local/%s/%d" % (filename, part_number)
+
+    def _upload_data_to_storage(self, data, content_type, size, storage_url):
+        self._request("upload_part", size)
+        return "etag-%s" % storage_url.rsplit("/", 1)[-1]
+
+    def _complete_multipart_upload(self, upload_info, filename, etags):
+        self._request("complete_upload")
+        self._check_session(upload_info)
+        upload_info["upload_info"]["parts"] = list(etags)
+
+    def _auth_params(self):
+        return {"script_name": "bench", "script_key": "bench"}
+
+    def _send_form(self, url, params):
+        self._request("link_file")
+        with self._lock:
+            self.uploads[(params["entity_type"], params["entity_id"], params["field_name"])] = len(
+                params["upload_link_info"]["parts"]
+            )
+        return "1:%d\n" % next(self._ids)
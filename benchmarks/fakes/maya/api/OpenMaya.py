@@ -0,0 +1,82 @@
+"""
+The OpenMaya classes holdout iterates meshes and sets plugs with, and the
+time change callback counting playblast frames.
+"""
+import itertools
+
+import fake_maya
+
+_callback_ids = itertools.count(1)
+
+
+class MDGMessage(object):
+    @staticmethod
+    def addTimeChangeCallback(callback, client_data=None):
+        callback_id = next(_callback_ids)
+        fake_maya.time_callbacks[callback_id] = callback
+        return callback_id
+
+
+class MMessage(object):
+    @staticmethod
+    def removeCallback(callback_id):
+        for callbacks in (fake_maya.time_callbacks, fake_maya.pre_render_callbacks, fake_maya.post_render_callbacks):
+            callbacks.pop(callback_id, None)
+
+
+class MFn(object):
+    kMesh = 296
+
+
+class MItDependencyNodes(object):
+    def __init__(self, node_type):
+        self._meshes = fake_maya.get_scene().meshes
+        self._index = 0
+
+    def isDone(self):
+        return self._index >= len(self._meshes)
+
+    def thisNode(self):
+        return self._meshes[self._index]
+
+    def next(self):
+        fake_maya.spin(fake_maya.get_scene().plug_latency)
+        self._index += 1
+
+
+class MPlug(object):
+    def __init__(self, mesh):
+        self._mesh = mesh
+
+    @property
+    def isLocked(self):
+        return self._mesh.locked
+
+    def asBool(self):
+        fake_maya.spin(fake_maya.get_scene().plug_latency)
+        return self._mesh.holdout
+
+
+class MFnDependencyNode(object):
+    def __init__(self):
+        self._node = None
+
+    def setObject(self, node):
+        self._node = node
+
+    def findPlug(self, name, want_networked):
+        return MPlug(self._node)
+
+
+class MDGModifier(object):
+    def __init__(self):
+        self._edits = []
+
+    def newPlugValueBool(self, plug, value):
+        self._edits.append((plug, value))
+
+    def doIt(self):
+        scene = fake_maya.get_scene()
+        scene.call("MDGModifier.doIt", len(self._edits))
+        for plug, value in self._edits:
+            plug._mesh.holdout = value
@@ -0,0 +1,22 @@
+"""
+The 3d view draw callbacks the playblast times frames with.
+"""
+import itertools
+
+import fake_maya
+
+_callback_ids = itertools.count(1000000)
+
+
+class MUiMessage(object):
+    @staticmethod
+    def add3dViewPreRenderMsgCallback(panel, callback, client_data=None):
+        callback_id = next(_callback_ids)
+        fake_maya.pre_render_callbacks[callback_id] = (panel, callback)
+        return callback_id
+
+    @staticmethod
+    def add3dViewPostRenderMsgCallback(panel, callback, client_data=None):
+        callback_id = next(_callback_ids)
+        fake_maya.post_render_callbacks[callback_id] = (panel, callback)
+        return callback_id
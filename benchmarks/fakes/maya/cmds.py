@@ -0,0 +1,175 @@
+"""
+maya.cmds on the in-memory scene of fake_maya. Commands the app doesn't
+use are accepted and do nothing.
+"""
+import os
+
+import fake_maya
+
+
+def _scene(command, items=0):
+    scene = fake_maya.get_scene()
+    scene.call(command, items)
+    return scene
+
+
+def file(*args, **kwargs):
+    scene = _scene("file")
+    if kwargs.get("modified"):
+        return False
+    name = scene.scene_name
+    if kwargs.get("shortName"):
+        name = os.path.basename(name)
+    return name
+
+
+def about(**kwargs):
+    _scene("about")
+    return "2019"
+
+
+def ls(*args, **kwargs):
+    scene = _scene("ls")
+    node_type = kwargs.get("type")
+    if node_type == "camera":
+        return ["|persp|perspShape"]
+    if kwargs.get("cameras"):
+        return ["perspShape"]
+    if node_type == "mesh":
+        scene.call("ls", len(scene.meshes))
+        return [mesh.name for mesh in scene.meshes]
+    return []
+
+
+def listRelatives(*args, **kwargs):
+    _scene("listRelatives")
+    return ["persp"]
+
+
+def getAttr(name, **kwargs):
+    return _scene("getAttr").attributes.get(name, 0)
+
+
+def setAttr(name, value, **kwargs):
+    _scene("setAttr").attributes[name] = value
+
+
+def keyframe(*args, **kwargs):
+    _scene("keyframe")
+    return []
+
+
+def playbackOptions(**kwargs):
+    scene = _scene("playbackOptions")
+    if kwargs.get("query"):
+        if kwargs.get("minTime"):
+            return scene.playback_range[0]
+        if kwargs.get("maxTime"):
+            return scene.playback_range[1]
+        if kwargs.get("animationStartTime"):
+            return scene.animation_range[0]
+        if kwargs.get("animationEndTime"):
+            return scene.animation_range[1]
+    if kwargs.get("edit"):
+        scene.playback_range = [
+            kwargs.get("minTime", scene.playback_range[0]),
+            kwargs.get("maxTime", scene.playback_range[1]),
+        ]
+
+
+def headsUpDisplay(*args, **kwargs):
+    scene = _scene("headsUpDisplay")
+    if kwargs.get("listHeadsUpDisplays"):
+        return list(scene.huds)
+    name = args[0] if args else None
+    if kwargs.get("query"):
+        return scene.huds.get(name, False)
+    if kwargs.get("exists"):
+        return name in scene.huds
+    if "visible" in kwargs:
+        scene.huds[name] = bool(kwargs["visible"])
+    elif name not in scene.huds:
+        scene.huds[name] = True
+
+
+def getPanel(**kwargs):
+    _scene("getPanel")
+    if kwargs.get("withFocus"):
+        return "modelPanel4"
+    return ["modelPanel4"]
+
+
+def window(*args, **kwargs):
+    scene = _scene("window")
+    name = args[0] if args else "window%d" % (len(scene.windows) + 1)
+    if kwargs.get("exists"):
+        return name in scene.windows
+    if not kwargs.get("edit"):
+        scene.windows.add(name)
+    return name
+
+
+def windowPref(*args, **kwargs):
+    _scene("windowPref")
+    return False
+
+
+def modelEditor(*args, **kwargs):
+    scene = _scene("modelEditor")
+    if kwargs.get("exists"):
+        return args[0] in scene.editors
+    if kwargs.get("query"):
+        return scene.editors.get(args[0] if args else "modelPanel4", {}).get("camera", "persp")
+    if kwargs.get("edit"):
+        scene.editors.setdefault(args[0], {}).update(kwargs)
+        return args[0]
+    name = "modelEditor%d" % (len(scene.editors) + 1)
+    scene.editors[name] = dict(kwargs)
+    return name
+
+
+def deleteUI(name, **kwargs):
+    scene = _scene("deleteUI")
+    scene.windows.discard(name)
+
+
+def scriptJob(**kwargs):
+    scene = _scene("scriptJob")
+    if "exists" in kwargs:
+        return kwargs["exists"] in scene.script_jobs
+    if "kill" in kwargs:
+        scene.script_jobs.discard(kwargs["kill"])
+        return
+    job = len(scene.script_jobs) + 1
+    scene.script_jobs.add(job)
+    return job
+
+
+def playblast(**kwargs):
+    """
+    Spends the frame latency for each frame and writes frame_bytes per frame,
+    as a single movie or as an image sequence.
+    """
+    scene = _scene("playblast")
+    start = int(kwargs.get("startTime", scene.playback_range[0]))
+    end = int(kwargs.get("endTime", scene.playback_range[1]))
+    filename = kwargs.get("filename")
+    frames = range(start, end + 1)
+    for frame in frames:
+        fake_maya.time_changed(frame)
+        fake_maya.draw(kwargs.get("editorPanelName"), scene.frame_latency)
+        if filename and kwargs.get("format") == "image":
+            padding = kwargs.get("framePadding", 4)
+            path = "%s.%0*d.%s" % (filename, padding, frame, kwargs.get("compression", "png"))
+            fake_maya.write_bytes(path, scene.frame_bytes)
+    if filename and kwargs.get("format") != "image":
+        fake_maya.write_bytes(filename, scene.frame_bytes * len(frames))
+    return filename
+
+
+def __getattr__(name):
+    def command(*args, **kwargs):
+        _scene(name)
+        return None
+
+    return command
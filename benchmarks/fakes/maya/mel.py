@@ -0,0 +1,25 @@
+"""
+maya.mel running the MEL generated by scene_state on the fake_maya scene.
+"""
+import re
+
+import fake_maya
+
+_PROC = re.compile(r"^global proc string\[\] (\w+)\(\) \{\n(.*)\n\}$", re.DOTALL)
+_CALL = re.compile(r"^(\w+)\(\)$")
+
+
+def eval(source):
+    scene = fake_maya.get_scene()
+    scene.call("mel")
+    source = source.strip()
+    if source == "currentTimeUnitToFPS":
+        return 24.0
+    match = _PROC.match(source)
+    if match:
+        scene.procs[match.group(1)] = match.group(2)
+        return None
+    match = _CALL.match(source)
+    if match:
+        return fake_maya.run_mel(scene.procs.get(match.group(1), ""))
+    return fake_maya.run_mel(source)
@@ -0,0 +1,8 @@
+"""
+pymel takes seconds to import, any import of it shows up in the startup
+benchmark.
+"""
+import os
+import time
+
+time.sleep(float(os.environ.get("FAKE_PYMEL_IMPORT_SECONDS", "2.0")))
@@ -0,0 +1,40 @@
+import re
+
+from . import platform
+
+
+class TankError(Exception):
+    pass
+
+
+class Hook(object):
+    def __init__(self, parent):
+        self.parent = parent
+        self.logger = parent.logger
+
+
+def get_hook_baseclass():
+    return Hook
+
+
+class Template(object):
+    """
+    A path with {field} keys, parsed back with a regular expression.
+    """
+
+    def __init__(self, definition):
+        self.definition = definition
+        parts = re.split(r"\{(\w+)\}", definition)
+        pattern = ""
+        for index, part in enumerate(parts):
+            pattern += "(?P<%s>[^/]+?)" % part if index % 2 else re.escape(part)
+        self._regex = re.compile("^%s$" % pattern)
+
+    def get_fields(self, path):
+        match = self._regex.match(path.replace("\\", "/"))
+        if match is None:
+            raise TankError("%s doesn't match template %s" % (path, self.definition))
+        return match.groupdict()
+
+    def apply_fields(self, fields):
+        return self.definition.format(**fields)
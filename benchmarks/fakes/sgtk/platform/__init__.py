@@ -0,0 +1,86 @@
+import importlib
+import logging
+import os
+
+
+class _Context(object):
+    def __init__(self, project=None, entity=None, task=None):
+        self.project = project
+        self.entity = entity
+        self.task = task
+
+
+class _Engine(object):
+    has_ui = False
+
+    def register_command(self, name, callback, properties=None):
+        pass
+
+    def show_dialog(self, title, app, widget_class, *args):
+        return widget_class(*args)
+
+
+class _Toolkit(object):
+    def __init__(self, shotgun):
+        self.shotgun = shotgun
+
+
+class Application(object):
+    """
+    An app with its settings, templates and hooks given to the constructor,
+    hooks are loaded from hooks_directory by their setting value.
+    """
+
+    def __init__(self, settings=None, templates=None, hooks_directory=None, shotgun=None, context=None):
+        self.logger = logging.getLogger("tk-maya-playblast")
+        self.version = "v0.0.0"
+        self.engine = _Engine()
+        self.context = context or _Context(
+            project={"type": "Project", "id": 1},
+            entity={"type": "Shot", "id": 1},
+            task={"type": "Task", "id": 1},
+        )
+        self.shotgun = shotgun
+        self.sgtk = _Toolkit(shotgun)
+        self._settings = dict(settings or {})
+        self._templates = dict(templates or {})
+        self._hooks_directory = hooks_directory
+        self._hooks = {}
+        if hasattr(self, "init_app"):
+            self.init_app()
+
+    def get_setting(self, name, default=None):
+        return self._settings.get(name, default)
+
+    def get_template(self, name):
+        return self._templates.get(name)
+
+    def log_debug(self, message):
+        self.logger.debug(message)
+
+    def import_module(self, name):
+        return importlib.import_module(name)
+
+    def _hook(self, key):
+        if key not in self._hooks:
+            from importlib.util import module_from_spec, spec_from_file_location
+
+            from .. import Hook
+
+            name = self.get_setting(key)
+            spec = spec_from_file_location("hook_%s" % name, os.path.join(self._hooks_directory, name + ".py"))
+            module = module_from_spec(spec)
+            spec.loader.exec_module(module)
+            classes = [
+                value for value in vars(module).values()
+                if isinstance(value, type) and issubclass(value, Hook) and value is not Hook
+            ]
+            self._hooks[key] = classes[0](self)
+        return self._hooks[key]
+
+    def execute_hook_method(self, key, method_name, base_class=None, **kwargs):
+        return getattr(self._hook(key), method_name)(**kwargs)
+
+
+def import_framework(framework, module):
+    raise ImportError("%s isn't available in the benchmarks" % framework)
@@ -0,0 +1,98 @@
+"""
+Just enough of QtCore and QtGui, signals are delivered synchronously.
+"""
+
+
+class _BoundSignal(object):
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class Signal(object):
+    def __init__(self, *types):
+        self._name = "_signal_%d" % id(self)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        signal = instance.__dict__.get(self._name)
+        if signal is None:
+            signal = instance.__dict__[self._name] = _BoundSignal()
+        return signal
+
+
+class QObject(object):
+    def __init__(self, parent=None):
+        self._parent = parent
+
+    def parent(self):
+        return self._parent
+
+
+class QEvent(object):
+    MouseButtonPress = 2
+    MouseButtonRelease = 3
+    MouseButtonDblClick = 4
+    KeyPress = 6
+    KeyRelease = 7
+    Wheel = 31
+    Shortcut = 117
+    ShortcutOverride = 51
+    ContextMenu = 82
+    Drop = 63
+
+
+class Qt(object):
+    Key_Escape = 0x01000000
+
+
+class QTimer(object):
+    @staticmethod
+    def singleShot(msec, callback):
+        pass
+
+
+class QCoreApplication(object):
+    @staticmethod
+    def instance():
+        # no application, as in mayapy
+        return None
+
+    @staticmethod
+    def processEvents(*args):
+        pass
+
+
+class QtCore(object):
+    Signal = Signal
+    QObject = QObject
+    QEvent = QEvent
+    Qt = Qt
+    QTimer = QTimer
+    QCoreApplication = QCoreApplication
+
+
+class QWidget(QObject):
+    pass
+
+
+class QMessageBox(object):
+    Retry = 1
+    Abort = 2
+    Ignore = 4
+
+    @staticmethod
+    def critical(*args):
+        return QMessageBox.Abort
+
+
+class QtGui(object):
+    QWidget = QWidget
+    QMessageBox = QMessageBox
@@ -9,11 +9,9 @@
 # not expressly granted therein are reserved by Shotgun Software Inc.
 
 import os
-import shutil
 import traceback
 
 import maya.cmds as cmds
-import pymel.core as pm
 import pprint
 
 import sgtk
@@ -31,34 +29,71 @@ class PostPlayblast(HookClass):
     Hook called when a file needs to be copied
     """
 
-    def copy_file(self, source=""):
+    def copy_file(self, source="", scene_name=None, renditions=None, destinations=None):
+        """
+            Copy the playblast into the shot and sequence locations. This runs
+            in a background thread, so the scene name or the destinations
+            should be given. renditions maps a suffix to another movie of the
+            playblast, like its proxy, copied next to each destination with
+            the suffix added. Returns the destinations, raises when any of
+            them wasn't written.
+        """
         app = self.parent
         try:
-            # get all required template
-            template_work = app.get_template("template_work")
-            templates = [
-                app.get_template("template_shot"),
-                app.get_template("template_sequence")
-            ]
-            # use current scene name to create valid QT file names
-            scenename = pm.sceneName()
-            fields = template_work.get_fields(scenename)
-            # make sure that destination folder is exists
-            for template in templates:
-                if not template:
-                    continue
-                destination = template.apply_fields(fields)
-                dirname = os.path.dirname(destination)
-                if not os.path.isdir(dirname):
-                    os.makedirs(dirname)
-                shutil.copy(source, destination)
+            if destinations is None:
+                destinations = self.get_destinations(scene_name)
+            # read the movie once and write every destination at the same time
+            file_copy = app.tk_maya_playblast.file_copy
+            index = app.fingerprint_index
+            result = file_copy.copy_to_destinations(
+                source, destinations, logger=app.logger, index=index, progress=app.progress.update
+            )
+            app.logger.debug("Copied %s, %s checksum %s", source, file_copy.HASH_ALGORITHM, result.checksum)
+            copied = [action for action in result.destinations.values() if action == file_copy.COPIED]
+            bytes_written = result.size * len(copied)
+            for suffix, path in (renditions or {}).items():
+                rendition_destinations = [
+                    "%s%s%s" % (root, suffix, extension) for root, extension in map(os.path.splitext, destinations)
+                ]
+                rendition = file_copy.copy_to_destinations(
+                    path, rendition_destinations, logger=app.logger, index=index
+                )
+                copied = [action for action in rendition.destinations.values() if action == file_copy.COPIED]
+                bytes_written += rendition.size * len(copied)
+            app.tracer.annotate(bytes_written=bytes_written, destinations=len(result.destinations))
+            # the copy reports normalized paths and leaves out the source itself
+            written = set(result.destinations)
+            written.add(os.path.normpath(source))
+            missing = [destination for destination in destinations if os.path.normpath(destination) not in written]
+            if missing:
+                raise RuntimeError("%s wasn't copied to %s" % (source, ", ".join(missing)))
         except Exception:
-            app.logger.error("Error in copying file %s", source)
-        return True
+            app.logger.error("Error in copying file %s", source, exc_info=True)
+            raise
+        return destinations
+
+    def get_destinations(self, scene_name=None):
+        """
+            The shot and sequence locations of the playblast of a scene, the
+            current one by default.
+        """
+        app = self.parent
+        # get all required template
+        template_work = app.get_template("template_work")
+        templates = [
+            app.get_template("template_shot"),
+            app.get_template("template_sequence")
+        ]
+        # use current scene name to create valid QT file names
+        scenename = scene_name or cmds.file(query=True, sceneName=True)
+        fields = template_work.get_fields(scenename)
+        return [template.apply_fields(fields) for template in templates if template]
 
-    def create_version(self, data={}):
+    def create_version(self, data={}, lookup=None):
         """
-            Setting up shotgun version entity without uploading the QT file
+            Setting up shotgun version entity without uploading the QT file.
+            lookup is the prefetched search of an existing Version, the
+            Version is written in a single batch request.
         """
         app = self.parent
         sg = app.sgtk.shotgun
@@ -75,31 +110,87 @@ class PostPlayblast(HookClass):
         try:
             # check if a version entity with same code exists in shotgun
             # if none, create a new version Entity with qtfile name as its code
-            version = sg.find_one("Version", [["code", "is", data["code"]]])
-            if version:
-                app.logger.debug("Version already exist, updating")
-                result = sg.update("Version", version["id"], data)
+            if lookup is not None:
+                version = lookup.result()
             else:
-                app.logger.debug("Create a new Version as %s" % data["code"])
-                result = sg.create("Version", data)
+                version = sg.find_one("Version", [["code", "is", data["code"]]])
+            requests = self.get_version_requests(data, version)
+            result = sg.batch(requests)[0]
         except sgtk.TankError:
             app.logger.error("Unable to create a new version on shotgun", exc_info=True)
         finally:
             return result
 
+    def get_version_requests(self, data, version=None):
+        """
+            Shotgun batch requests writing the Version, the first one must
+            return the Version. Override to add requests to the same round trip.
+        """
+        app = self.parent
+        if version:
+            app.logger.debug("Version already exist, updating")
+            return [{"request_type": "update", "entity_type": "Version", "entity_id": version["id"], "data": data}]
+        app.logger.debug("Create a new Version as %s" % data["code"])
+        return [{"request_type": "create", "entity_type": "Version", "data": data}]
+
+    def get_uploaded_checksum(self, version_id):
+        """
+            Checksum of the movie uploaded to the Version, from the field set
+            by version_checksum_field, or else from the uploads made from
+            this computer. None when unknown.
+        """
+        app = self.parent
+        field = app.get_setting("version_checksum_field", "")
+        if not field:
+            return app.fingerprint_index.uploaded("Version", version_id)
+        version = app.sgtk.shotgun.find_one("Version", [["id", "is", version_id]], [field, "sg_uploaded_movie"])
+        if not version or not version.get("sg_uploaded_movie"):
+            return None
+        return version.get(field)
+
     def upload_movie(self, data={}):
         """
-            Sending it to shotgun
+            Sending it to shotgun, in parts which are retried and resumed.
+            With the movie checksum in data, nothing is sent when the
+            Version already holds the same movie.
         """
         app = self.parent
         sg = app.sgtk.shotgun
         app.logger.debug("Send qtfile to Shotgun")
+        upload = app.tk_maya_playblast.upload
+        checksum = data.get("checksum")
         try:
             movie_path = data["path"]
             result = None
-            if os.path.exists(movie_path):
+            if checksum and self.get_uploaded_checksum(data["version_id"]) == checksum:
+                app.logger.info("Version %s already has the movie %s, not uploading it", data["version_id"], movie_path)
+                app.tracer.annotate(bytes_uploaded=0, upload_skipped=True)
+                result = data["version_id"]
+            elif os.path.exists(movie_path):
                 app.logger.debug("Uploading movie to Shotgun: %s", movie_path)
-                result = sg.upload("Version", data["version_id"], movie_path, field_name="sg_uploaded_movie")
+                uploader = upload.ChunkedUploader(
+                    upload.ShotgunTransport(sg),
+                    app.logger,
+                    part_size=app.get_setting("upload_part_size", 20) * upload.MEGABYTE,
+                    max_retries=app.get_setting("upload_max_retries", upload.MAX_RETRIES),
+                    bandwidth_limit=app.get_setting("upload_bandwidth_limit", 0) * upload.MEGABYTE,
+                    progress=app.progress.update,
+                )
+                result = uploader.upload("Version", data["version_id"], movie_path, field_name="sg_uploaded_movie")
+                app.logger.info("Uploaded %s: %s", movie_path, uploader.stats)
+                app.tracer.annotate(
+                    bytes_uploaded=uploader.stats.bytes_sent,
+                    upload_bytes_per_second=uploader.stats.bytes_per_second,
+                    upload_retries=uploader.stats.retries,
+                )
+                if checksum:
+                    app.fingerprint_index.record_upload("Version", data["version_id"], checksum)
+                    field = app.get_setting("version_checksum_field", "")
+                    if field:
+                        sg.update("Version", data["version_id"], {field: checksum})
+            else:
+                raise upload.UploadError("The movie %s is gone" % movie_path)
             return result
-        except sgtk.TankError:
+        except (sgtk.TankError, upload.UploadError):
             app.logger.error("Unable to upload %s to Shotgun", movie_path, exc_info=True)
+            raise
@@ -12,8 +12,6 @@ import os
 import pprint
 
 import maya.cmds as cmds
-import pymel.core as pm
-import traceback
 from contextlib import contextmanager
 
 import sgtk
@@ -22,7 +20,12 @@ from sgtk.platform.qt import QtGui
 
 HookClass = sgtk.get_hook_baseclass()
 
-PLAYBLAST_WINDOW = "Playblast Window"
+# Viewport 2.0 settings used while playblasting
+RENDER_GLOBALS = {
+    "hardwareRenderingGlobals.lineAAEnable": True,
+    "hardwareRenderingGlobals.multiSampleEnable": True,
+    "hardwareRenderingGlobals.multiSampleCount": 16,
+}
 
 
 class SetupWindow(HookClass):
@@ -31,48 +34,47 @@ class SetupWindow(HookClass):
     """
 
     def set_hud(self):
-        visible_huds = [f for f in pm.headsUpDisplay(listHeadsUpDisplays=True)
-                                if pm.headsUpDisplay(f, query=True, visible=True)]
+        scene_state = self.parent.tk_maya_playblast.scene_state
+        state = scene_state.SceneState(huds=True).capture()
+        visible_huds = [name for name, visible in state.huds.items() if visible]
         # hide all visible HUDs
-        list(map(lambda f: pm.headsUpDisplay(f, edit=True, visible=False), visible_huds))
+        state.apply(huds=dict.fromkeys(visible_huds, False), current=state)
 
         # Add required HUD
         # User name
-        edit_existing_hud = "HUDUserName" in pm.headsUpDisplay(listHeadsUpDisplays=True)
-        pm.headsUpDisplay("HUDUserName", edit=edit_existing_hud,
+        cmds.headsUpDisplay("HUDUserName", edit="HUDUserName" in state.huds,
                             command=lambda: os.getenv("USERNAME", "unknown.user"),
-                            event="playblasting", section=1, block=1)
-        pm.headsUpDisplay("HUDUserName", edit=True, visible=True, label="User:")
+                            event="playblasting", section=1, block=1, visible=True, label="User:")
         # Scene name
-        edit_existing_hud = "HUDSceneName" in pm.headsUpDisplay(listHeadsUpDisplays=True)
-        pm.headsUpDisplay("HUDSceneName", edit=edit_existing_hud,
+        cmds.headsUpDisplay("HUDSceneName", edit="HUDSceneName" in state.huds,
                             command=lambda: cmds.file(query=True, location=True, shortName=True).rsplit(".", 1)[0],
-                            event="playblasting", section=6, block=1)
-        pm.headsUpDisplay("HUDSceneName", edit=True, visible=True, label="Shot:")
+                            event="playblasting", section=6, block=1, visible=True, label="Shot:")
         # Focal length
-        pm.headsUpDisplay("HUDFocalLength", edit=True, visible=True, section=3, block=1)
-        pm.headsUpDisplay("HUDCurrentFrame", edit=True, visible=True, dataFontSize="large", section=8, block=1)
+        cmds.headsUpDisplay("HUDFocalLength", edit=True, visible=True, section=3, block=1)
+        cmds.headsUpDisplay("HUDCurrentFrame", edit=True, visible=True, dataFontSize="large", section=8, block=1)
 
         return visible_huds
 
     def unset_huds(self, huds=[]):
-        # restore HUD state
-        list(map(lambda f: pm.headsUpDisplay(f, edit=True, visible=False), pm.headsUpDisplay(listHeadsUpDisplays=True)))
-        list(map(lambda f: pm.headsUpDisplay(f, edit=True, visible=True), huds))
+        # restore HUD state, only editing the HUDs whose visibility changed
+        scene_state = self.parent.tk_maya_playblast.scene_state
+        state = scene_state.SceneState(huds=True).capture()
+        state.apply(huds=dict((name, name in huds) for name in state.huds), current=state)
 
     def get_playblast_params(self, filename=""):
         app = self.parent
         playblast_params = dict(app.playblast_parameters)
         playblast_params["filename"] = filename
         # include audio if available
-        audio_list = pm.ls(type="audio")
+        audio_list = cmds.ls(type="audio")
         if audio_list:
             playblast_params["sound"] = audio_list[0]
         return playblast_params
 
     @contextmanager
-    def create_window(self):
-        # setting up context window for playblast
+    def create_window(self, camera=None):
+        # setting up context window for playblast, looking through the camera
+        # or the focused viewport's one
 
         """ try to get data from shotgun project fields
             need to get context's project
@@ -84,76 +86,61 @@ class SetupWindow(HookClass):
         video_width = cmds.getAttr("defaultResolution.width")
         video_height = cmds.getAttr("defaultResolution.height")
 
-        panel_name = cmds.getPanel(withFocus=True)
-        if panel_name not in cmds.getPanel(type="modelPanel"):
-            message = "Please select a viewport before trying to render"
-            self.logger.error(message)
-            QtGui.QMessageBox.critical(None, "No Viewport selected", message)
-            raise RuntimeError(message)
+        if camera is None:
+            panel_name = cmds.getPanel(withFocus=True)
+            if panel_name not in cmds.getPanel(type="modelPanel"):
+                message = "Please select a viewport before trying to render"
+                self.logger.error(message)
+                QtGui.QMessageBox.critical(None, "No Viewport selected", message)
+                raise RuntimeError(message)
 
-        camera_trans = cmds.modelEditor(panel_name, q=True, cam=True)
-        camera = cmds.ls(camera_trans, dag=True, cameras=True)[0]
+            camera_trans = cmds.modelEditor(panel_name, q=True, cam=True)
+            camera = cmds.ls(camera_trans, dag=True, cameras=True)[0]
         model_editor_params["cam"] = camera
 
-        # Give Viewport 2.0 renderer only for Maya 2015++
-        mayaVersionString = cmds.about(version=True)
-        mayaVersion = int(mayaVersionString[:4]) if len(mayaVersionString) >= 4 else 0
-        if mayaVersion >= 2015:
-            model_editor_params["rendererName"] = "vp2Renderer"
-            orig_lineAAEnable = cmds.getAttr("hardwareRenderingGlobals.lineAAEnable")
-            cmds.setAttr("hardwareRenderingGlobals.lineAAEnable", True)
-            orig_multiSampleEnable = cmds.getAttr("hardwareRenderingGlobals.multiSampleEnable")
-            cmds.setAttr("hardwareRenderingGlobals.multiSampleEnable", True)
-            orig_multiSampleCount = cmds.getAttr("hardwareRenderingGlobals.multiSampleCount")
-            cmds.setAttr("hardwareRenderingGlobals.multiSampleCount", 16)
-
-        orig_holdOuts = {}
-        if app.get_setting("use_holdout"):
-            for item in cmds.ls(type="mesh", long=True):
-                orig_holdOuts[item] = cmds.getAttr("{}.holdOut".format(item))
-                cmds.setAttr("{}.holdOut".format(item), True)
-
-        # Create window
-        if pm.windowPref(PLAYBLAST_WINDOW, exists=True):
-            pm.windowPref(PLAYBLAST_WINDOW, remove=True)
-        window = pm.window(
-            PLAYBLAST_WINDOW,
-            titleBar=True,
-            iconify=True,
-            leftEdge=100,
-            topEdge=100,
-            width=video_width,
-            height=video_height,
-            sizeable=False
-        )
-        # Create editor area
-        layout = pm.formLayout()
-        editor = pm.modelEditor(**model_editor_params)
-        pm.setFocus(editor)
-        pm.formLayout(
-            layout,
-            edit=True,
-            attachForm=(
-                (editor, "left", 0),
-                (editor, "top", 0),
-                (editor, "right", 0),
-                (editor, "bottom", 0)
+        # settings are checked before anything of the scene is changed
+        evaluation = None
+        if app.get_setting("evaluation_mode"):
+            evaluation = app.tk_maya_playblast.evaluation.EvaluationProfile(
+                app.get_setting("evaluation_mode"),
+                prewarm=app.get_setting("evaluation_prewarm"),
+                unsafe_node_types=app.get_setting("evaluation_unsafe_node_types"),
+                fallback_mode=app.get_setting("evaluation_fallback_mode"),
+                logger=app.logger,
             )
-        )
-        # Show window
-        pm.setFocus(editor)
-        pm.showWindow(window)
-        pm.refresh()
-        app.logger.debug(pprint.pformat(model_editor_params))
+
+        # restore functions of the changes made so far, undone in reverse
+        restores = []
         try:
+            # Give Viewport 2.0 renderer only for Maya 2015++
+            mayaVersionString = cmds.about(version=True)
+            mayaVersion = int(mayaVersionString[:4]) if len(mayaVersionString) >= 4 else 0
+            if mayaVersion >= 2015:
+                model_editor_params["rendererName"] = "vp2Renderer"
+                # read and override all the render globals at once
+                render_globals = app.tk_maya_playblast.scene_state.SceneState(attributes=RENDER_GLOBALS).capture()
+                restores.append(render_globals.restore)
+                render_globals.apply(attributes=RENDER_GLOBALS, current=render_globals)
+
+            if app.get_setting("use_holdout"):
+                holdout = app.tk_maya_playblast.holdout.HoldoutOverride()
+                restores.append(holdout.restore)
+                holdout.apply()
+
+            if evaluation is not None:
+                restores.append(evaluation.restore)
+                evaluation.apply()
+
+            # get a window and editor, kept from a previous playblast when possible
+            editor_pool = app.get_playblast_manager().editor_pool
+            editor = editor_pool.acquire(video_width, video_height, model_editor_params)
+            restores.append(lambda: editor_pool.release(editor))
+            app.logger.debug(pprint.pformat(model_editor_params))
+            # errors of the playblast reach the caller, once the scene is restored
             yield editor
-        except:
-            traceback.print_exc()
         finally:
-            pm.deleteUI(window)
-            if mayaVersion >= 2015:
-                cmds.setAttr("hardwareRenderingGlobals.lineAAEnable", orig_lineAAEnable)
-                cmds.setAttr("hardwareRenderingGlobals.multiSampleEnable", orig_multiSampleEnable)
-                cmds.setAttr("hardwareRenderingGlobals.multiSampleCount", orig_multiSampleCount)
-            for item, state in orig_holdOuts.items():
-                cmds.setAttr("{}.holdOut".format(item), state)
+            for restore in reversed(restores):
+                try:
+                    restore()
+                except Exception:
+                    app.logger.error("Unable to restore the scene after the playblast", exc_info=True)
@@ -1 +1,11 @@
-from .playblast import PlayblastManager
+from . import culling
+from . import evaluation
+from . import file_copy
+from . import fingerprints
+from . import holdout
+from . import progress
+from . import scene_state
+from . import sequence
+from . import tracing
+from . import upload
+from .playblast import PlayblastJob, PlayblastManager
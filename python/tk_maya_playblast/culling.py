@@ -0,0 +1,413 @@
+"""
+Hide the objects the camera never sees over the playblast range, so the
+viewport doesn't draw them.
+
+The camera is sampled on every frame into frustum planes, and the world
+bounding boxes of the objects are tested against all of them at once with
+NumPy. Objects which move are never hidden: those driven by time, or with
+a parent driven by time, and those whose box differs between the few
+frames it is read on.
+"""
+import math
+from array import array
+
+# frames the bounding boxes are read on, an object whose box differs
+# between them moves and is kept
+BOUNDS_SAMPLES = 3
+# frustum widening, objects just out of frame still cast shadows in it
+MARGIN = 0.1
+# box and plane pairs tested at once, bounds the memory used to about 4
+# bytes times this
+CHUNK_SIZE = 4 * 1024 * 1024
+# shape nodes hidden, besides meshes and NURBS surfaces
+PLUGIN_SHAPES = ("gpuCache",)
+# camera attributes moving the image in ways the frustum doesn't follow, a
+# camera using any of them isn't culled
+UNSUPPORTED_CAMERA = (
+    ("filmTranslateH", 0.0),
+    ("filmTranslateV", 0.0),
+    ("filmRollValue", 0.0),
+    ("preScale", 1.0),
+    ("postScale", 1.0),
+)
+# 2D pan and zoom, only when panZoomEnabled is on
+PAN_ZOOM = (("horizontalPan", 0.0), ("verticalPan", 0.0), ("zoom", 1.0))
+# nodes whose output changes with the time, anything downstream of them moves
+TIME_SOURCES = (
+    "kTime",
+    "kAnimCurveTimeToAngular",
+    "kAnimCurveTimeToDistance",
+    "kAnimCurveTimeToTime",
+    "kAnimCurveTimeToUnitless",
+)
+
+
+def frustum_planes(matrices, horizontal, vertical, near, far, orthographic=False):
+    """
+    The six planes of the camera frustum of each frame, in world space.
+
+    :param matrices: (frames, 4, 4) world matrices of the camera, Maya
+        row vector convention
+    :param horizontal: (frames,) tangent of half the horizontal field of
+        view, or half the width for an orthographic camera
+    :param vertical: same, vertically
+    :param near: (frames,) near clip distance
+    :param far: (frames,) far clip distance
+    :returns: (frames, 6, 4) planes (a, b, c, d), a point is inside when
+        a x + b y + c z + d >= 0 for all of them
+    """
+    import numpy
+
+    horizontal = numpy.asarray(horizontal, dtype=numpy.float64)
+    vertical = numpy.asarray(vertical, dtype=numpy.float64)
+    zeros = numpy.zeros_like(horizontal)
+    ones = numpy.ones_like(horizontal)
+    near = numpy.broadcast_to(numpy.asarray(near, dtype=numpy.float64), horizontal.shape)
+    far = numpy.broadcast_to(numpy.asarray(far, dtype=numpy.float64), horizontal.shape)
+    # in camera space, the camera looks down -z
+    if orthographic:
+        sides = [
+            (ones, zeros, zeros, horizontal),
+            (-ones, zeros, zeros, horizontal),
+            (zeros, ones, zeros, vertical),
+            (zeros, -ones, zeros, vertical),
+        ]
+    else:
+        sides = [
+            (ones, zeros, -horizontal, zeros),
+            (-ones, zeros, -horizontal, zeros),
+            (zeros, ones, -vertical, zeros),
+            (zeros, -ones, -vertical, zeros),
+        ]
+    planes = numpy.stack(
+        [numpy.stack(plane, axis=-1) for plane in sides + [(zeros, zeros, -ones, -near), (zeros, zeros, ones, far)]],
+        axis=1,
+    )
+    # a point x of the world is x M^-1 in camera space
+    inverse = numpy.linalg.inv(numpy.asarray(matrices, dtype=numpy.float64))
+    return numpy.einsum("fij,fpj->fpi", inverse, planes)
+
+
+def world_bounds(minimums, maximums, matrices):
+    """
+    World axis aligned boxes of local boxes, from the 8 corners of each.
+
+    :param minimums: (objects, 3) local box corners
+    :param maximums: (objects, 3)
+    :param matrices: (objects, 4, 4) world matrices
+    :returns: (objects, 3) minimums and maximums
+    """
+    import numpy
+
+    minimums = numpy.asarray(minimums, dtype=numpy.float64)
+    maximums = numpy.asarray(maximums, dtype=numpy.float64)
+    matrices = numpy.asarray(matrices, dtype=numpy.float64)
+    # the centre moves with the matrix, the extent spreads over its axes
+    centres = (minimums + maximums) / 2.0
+    extents = (maximums - minimums) / 2.0
+    world_centres = numpy.einsum("oi,oij->oj", centres, matrices[:, :3, :3]) + matrices[:, 3, :3]
+    world_extents = numpy.einsum("oi,oij->oj", extents, numpy.abs(matrices[:, :3, :3]))
+    return world_centres - world_extents, world_centres + world_extents
+
+
+def visible(minimums, maximums, planes, chunk_size=CHUNK_SIZE):
+    """
+    Whether each box is at least partly inside the frustum of any frame.
+
+    :param minimums: (objects, 3) world box corners
+    :param maximums: (objects, 3)
+    :param planes: (frames, 6, 4) from :func:`frustum_planes`
+    :returns: (objects,) booleans
+    """
+    import numpy
+
+    # single precision is plenty next to the margin, and halves the memory read
+    minimums = numpy.asarray(minimums, dtype=numpy.float32)
+    maximums = numpy.asarray(maximums, dtype=numpy.float32)
+    centres = (minimums + maximums) / 2
+    extents = (maximums - minimums) / 2
+    planes = numpy.asarray(planes, dtype=numpy.float32)
+    count = planes.shape[1]
+    result = numpy.zeros(len(centres), dtype=bool)
+    frames = max(1, min(len(planes), chunk_size // max(1, len(centres) * count)))
+    # boxes seen on the first frames aren't tested against the next ones
+    undecided = numpy.arange(len(centres))
+    for first in range(0, len(planes), frames):
+        if not len(undecided):
+            break
+        frame_planes = planes[first:first + frames]
+        # the planes of these frames as the columns of one matrix product
+        normals = frame_planes[:, :, :3].reshape(-1, 3).T
+        # a box is out of a plane when its nearest corner is
+        reach = numpy.dot(centres[undecided], normals)
+        reach += numpy.dot(extents[undecided], numpy.abs(normals))
+        reach += frame_planes[:, :, 3].reshape(-1)
+        seen = (reach >= 0).reshape(len(undecided), -1, count).all(axis=2).any(axis=1)
+        result[undecided[seen]] = True
+        undecided = undecided[~seen]
+    return result
+
+
+def sample_frames(start_frame, end_frame, samples=BOUNDS_SAMPLES):
+    if end_frame <= start_frame or samples < 2:
+        return [start_frame]
+    step = (end_frame - start_frame) / float(samples - 1)
+    return sorted(set(start_frame + step * index for index in range(samples)))
+
+
+class UnsupportedCamera(Exception):
+    """
+    The camera image can't be told from its frustum, nothing is culled.
+    """
+
+
+class MayaCullingStore(object):
+    """
+    The shapes of the scene and the camera, read through the Maya API and
+    getAttr. Instances share the visibility of their shape, a shape is only
+    hidden when none of its instances is visible.
+    """
+
+    def __init__(self, camera, start_frame, end_frame, aspect_ratio=None):
+        import maya.api.OpenMaya as om
+        import maya.cmds as cmds
+
+        self._om = om
+        self._cmds = cmds
+        self.camera = cmds.ls(camera, dag=True, cameras=True)[0]
+        self.start_frame = start_frame
+        self.end_frame = end_frame
+        if aspect_ratio is None:
+            aspect_ratio = cmds.getAttr("defaultResolution.width") / float(cmds.getAttr("defaultResolution.height"))
+        self.aspect_ratio = aspect_ratio
+        self._plugs = []
+        self._paths = []
+        # shape of each path, as an index of _plugs
+        self.owners = array("L")
+        shapes = {}
+        iterator = om.MItDag(om.MItDag.kDepthFirst, om.MFn.kShape)
+        node = om.MFnDagNode()
+        while not iterator.isDone():
+            shape = iterator.currentItem()
+            node.setObject(shape)
+            if self._culled_type(shape, node) and not node.isIntermediateObject:
+                key = om.MObjectHandle(shape).hashCode()
+                if key not in shapes:
+                    shapes[key] = len(self._plugs)
+                    self._plugs.append(node.findPlug("visibility", False))
+                self._paths.append(iterator.getPath())
+                self.owners.append(shapes[key])
+            iterator.next()
+
+    def _culled_type(self, shape, node):
+        api_type = shape.apiType()
+        if api_type in (self._om.MFn.kMesh, self._om.MFn.kNurbsSurface):
+            return True
+        return api_type == self._om.MFn.kPluginShape and node.typeName in PLUGIN_SHAPES
+
+    def __len__(self):
+        return len(self._plugs)
+
+    def read(self):
+        return array("B", (plug.asBool() for plug in self._plugs))
+
+    def write(self, indices, value):
+        # one modifier for all shapes, locked or connected plugs are left alone
+        modifier = self._om.MDGModifier()
+        for index in indices:
+            plug = self._plugs[index]
+            if not plug.isLocked and not plug.isDestination:
+                modifier.newPlugValueBool(plug, value)
+        modifier.doIt()
+
+    def camera_samples(self):
+        """
+        The frustum arguments of :func:`frustum_planes` on every frame,
+        widened to the largest the film fit and overscan allow, and to hold
+        the lens squeeze, film offset and shake.
+
+        :raises UnsupportedCamera: when the camera uses a film translate,
+            roll, pre or post scale, or 2D pan and zoom
+        """
+        import numpy
+
+        cmds = self._cmds
+        frames = range(int(math.floor(self.start_frame)), int(math.ceil(self.end_frame)) + 1)
+        camera = self.camera
+
+        def attribute(name, frame):
+            return cmds.getAttr("%s.%s" % (camera, name), time=frame)
+
+        orthographic = bool(attribute("orthographic", frames[0]))
+        matrices = []
+        horizontal = []
+        vertical = []
+        near = []
+        far = []
+        for frame in frames:
+            self._check_camera(attribute, frame)
+            matrices.append(numpy.array(attribute("worldMatrix[0]", frame), dtype=numpy.float64).reshape(4, 4))
+            overscan = attribute("overscan", frame)
+            aperture_width = attribute("horizontalFilmAperture", frame) * attribute("lensSqueezeRatio", frame)
+            aperture_height = attribute("verticalFilmAperture", frame)
+            if orthographic:
+                width = attribute("orthographicWidth", frame) / 2.0
+                height = width / self.aspect_ratio
+            else:
+                # apertures are in inches, the focal length in millimetres, a
+                # camera scale either way only widens the frustum
+                camera_scale = attribute("cameraScale", frame)
+                scale = max(camera_scale, 1.0 / camera_scale) * 25.4 / 2.0 / attribute("focalLength", frame)
+                width = aperture_width * scale
+                height = aperture_height * scale
+            # whichever way the film is fit to the resolution
+            width, height = max(width, height * self.aspect_ratio), max(height, width / self.aspect_ratio)
+            # an offset film sees more on one side, the frustum stays centered
+            # so it widens by the offset on both
+            offset_x = attribute("horizontalFilmOffset", frame)
+            offset_y = attribute("verticalFilmOffset", frame)
+            if attribute("shakeEnabled", frame):
+                offset_x += attribute("horizontalShake", frame)
+                offset_y += attribute("verticalShake", frame)
+            horizontal.append((width + abs(offset_x) * 2.0 * width / aperture_width) * overscan)
+            vertical.append((height + abs(offset_y) * 2.0 * height / aperture_height) * overscan)
+            near.append(attribute("nearClipPlane", frame))
+            far.append(attribute("farClipPlane", frame))
+        return numpy.array(matrices), numpy.array(horizontal), numpy.array(vertical), near, far, orthographic
+
+    @staticmethod
+    def _check_camera(attribute, frame):
+        changed = [name for name, default in UNSUPPORTED_CAMERA if attribute(name, frame) != default]
+        if attribute("panZoomEnabled", frame):
+            changed.extend(name for name, default in PAN_ZOOM if attribute(name, frame) != default)
+        if changed:
+            raise UnsupportedCamera("%s on frame %s" % (", ".join(changed), frame))
+
+    def animated(self):
+        """
+        Whether the shape or a parent of each path is driven by time, eg.
+        keyed, constrained to a keyed object or deformed by an expression or
+        a cache, whatever frames its box is read on.
+
+        :returns: (paths,) booleans
+        """
+        import numpy
+
+        om = self._om
+        driven = set()
+        for name in TIME_SOURCES:
+            sources = om.MItDependencyNodes(getattr(om.MFn, name))
+            while not sources.isDone():
+                graph = om.MItDependencyGraph(
+                    sources.thisNode(),
+                    om.MFn.kInvalid,
+                    om.MItDependencyGraph.kDownstream,
+                    om.MItDependencyGraph.kDepthFirst,
+                    om.MItDependencyGraph.kNodeLevel,
+                )
+                while not graph.isDone():
+                    key = om.MObjectHandle(graph.currentNode()).hashCode()
+                    if key in driven:
+                        # reached from another source already
+                        graph.prune()
+                    else:
+                        driven.add(key)
+                    graph.next()
+                sources.next()
+        result = numpy.zeros(len(self._paths), dtype=bool)
+        if not driven:
+            return result
+        for index, path in enumerate(self._paths):
+            # parenting isn't a connection, the parents are looked up too
+            ancestor = om.MDagPath(path)
+            while ancestor.length() > 0:
+                if om.MObjectHandle(ancestor.node()).hashCode() in driven:
+                    result[index] = True
+                    break
+                ancestor.pop()
+        return result
+
+    def bounds_samples(self):
+        """
+        World boxes of every path on a few frames of the range.
+
+        :returns: (samples, paths, 3) minimums and maximums
+        """
+        import numpy
+
+        om = self._om
+        cmds = self._cmds
+        current = cmds.currentTime(query=True)
+        minimums = []
+        maximums = []
+        try:
+            for frame in sample_frames(self.start_frame, self.end_frame):
+                cmds.currentTime(frame, update=True)
+                local_minimums = numpy.empty((len(self._paths), 3))
+                local_maximums = numpy.empty((len(self._paths), 3))
+                matrices = numpy.empty((len(self._paths), 4, 4))
+                node = om.MFnDagNode()
+                for index, path in enumerate(self._paths):
+                    node.setObject(path)
+                    box = node.boundingBox
+                    local_minimums[index] = tuple(box.min)[:3]
+                    local_maximums[index] = tuple(box.max)[:3]
+                    matrices[index] = numpy.array(tuple(path.inclusiveMatrix())).reshape(4, 4)
+                frame_minimums, frame_maximums = world_bounds(local_minimums, local_maximums, matrices)
+                minimums.append(frame_minimums)
+                maximums.append(frame_maximums)
+        finally:
+            cmds.currentTime(current, update=True)
+        return numpy.array(minimums), numpy.array(maximums)
+
+
+class CullingOverride(object):
+    """
+    Hide the shapes outside of the camera frustum over the whole range,
+    remembering which ones were changed.
+
+    Only the indices of the shapes which were visible are kept, and only
+    those are shown again on restore. ``store`` is any object with the
+    :class:`MayaCullingStore` interface.
+    """
+
+    def __init__(self, store, margin=MARGIN):
+        self._store = store
+        self._margin = margin
+        self.changed = array("L")
+
+    def __enter__(self):
+        self.apply()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.restore()
+
+    def apply(self):
+        import numpy
+
+        values = numpy.asarray(self._store.read()).astype(bool)
+        matrices, horizontal, vertical, near, far, orthographic = self._store.camera_samples()
+        widen = 1.0 + self._margin
+        planes = frustum_planes(matrices, horizontal * widen, vertical * widen, near, far, orthographic)
+        minimums, maximums = self._store.bounds_samples()
+        owners = numpy.asarray(self._store.owners).astype(numpy.intp)
+        # driven by time, or the boxes read on other frames than the first one differ
+        moving = numpy.asarray(self._store.animated(), dtype=bool)
+        moving |= ((minimums != minimums[:1]) | (maximums != maximums[:1])).any(axis=(0, 2))
+        seen = moving.copy()
+        still = numpy.flatnonzero(~moving)
+        seen[still] = visible(minimums[0][still], maximums[0][still], planes)
+        # a shape is seen when any of its instances is
+        seen_shapes = numpy.bincount(owners, weights=seen, minlength=len(values)) > 0
+        self.changed = array("L", numpy.flatnonzero(values & ~seen_shapes).tolist())
+        if self.changed:
+            self._store.write(self.changed, False)
+        return len(self.changed)
+
+    def restore(self):
+        if self.changed:
+            self._store.write(self.changed, True)
+        restored = len(self.changed)
+        self.changed = array("L")
+        return restored
@@ -0,0 +1,188 @@
+import time
+
+from sgtk.platform.qt import QtCore
+
+WINDOW_TITLE = "Playblast Window"
+# Maya events after which the pooled editors look at a scene which is gone
+SCENE_EVENTS = ("SceneOpened", "NewSceneOpened")
+
+
+class _PooledEditor(object):
+    def __init__(self, window, editor, params):
+        self.window = window
+        self.editor = editor
+        self.params = dict(params)
+        self.in_use = False
+        self.last_used = time.time()
+
+
+class EditorPool(object):
+    """
+    Playblast windows and model editors kept alive between playblasts.
+
+    Editors are pooled by resolution. Reusing one only edits the camera and
+    the editor parameters which differ from its previous use, instead of
+    building a new window and having Viewport 2.0 initialise again. Editors
+    idle for ``idle_timeout`` seconds, or left from a previous scene, are
+    deleted. With a timeout of 0 editors are deleted once released.
+    """
+
+    def __init__(self, logger, title=WINDOW_TITLE, idle_timeout=300):
+        self._logger = logger
+        self._title = title
+        self._idle_timeout = idle_timeout
+        self._entries = {}
+        self._unpooled = {}
+        self._script_jobs = []
+
+    def acquire(self, width, height, editor_params):
+        """
+        A model editor of the given resolution set up with editor_params.
+        """
+        import maya.cmds as cmds
+
+        key = (int(width), int(height))
+        self.evict_idle()
+        entry = self._entries.get(key)
+        if entry is not None and not entry.in_use and not cmds.modelEditor(entry.editor, exists=True):
+            # deleted behind our back
+            self._delete(key)
+            entry = None
+        if entry is not None and entry.in_use:
+            # already rendering, eg. a playblast started from another one
+            entry = self._create(key, editor_params, suffix="_%d" % (len(self._unpooled) + 1))
+            self._unpooled[entry.editor] = entry
+            return entry.editor
+        if entry is not None and set(entry.params) != set(editor_params):
+            # a different set of flags can't be reverted by editing, start over
+            self._delete(key)
+            entry = None
+
+        if entry is None:
+            entry = self._create(key, editor_params)
+            self._entries[key] = entry
+        else:
+            changed = dict(
+                (flag, value) for flag, value in editor_params.items() if entry.params.get(flag) != value
+            )
+            if changed:
+                self._logger.debug("Reusing playblast editor %s, editing %s", entry.editor, sorted(changed))
+                cmds.modelEditor(entry.editor, edit=True, **changed)
+                entry.params.update(changed)
+            cmds.showWindow(entry.window)
+            cmds.setFocus(entry.editor)
+        entry.in_use = True
+        return entry.editor
+
+    def set_camera(self, editor, camera):
+        """
+        Look through another camera, eg. between the renders of a batch, so
+        the next use of the editor knows which camera it has.
+        """
+        import maya.cmds as cmds
+
+        cmds.modelEditor(editor, edit=True, camera=camera)
+        for entry in list(self._entries.values()) + list(self._unpooled.values()):
+            if entry.editor == editor:
+                entry.params["cam"] = camera
+
+    def release(self, editor):
+        import maya.cmds as cmds
+
+        if editor in self._unpooled:
+            entry = self._unpooled.pop(editor)
+            self._delete_ui(entry.window)
+            return
+        for key, entry in list(self._entries.items()):
+            if entry.editor == editor:
+                break
+        else:
+            return
+        entry.in_use = False
+        entry.last_used = time.time()
+        if self._idle_timeout <= 0:
+            self._delete(key)
+            return
+        cmds.window(entry.window, edit=True, visible=False)
+        QtCore.QTimer.singleShot(int(self._idle_timeout * 1000) + 100, self.evict_idle)
+
+    def evict_idle(self):
+        now = time.time()
+        for key, entry in list(self._entries.items()):
+            if not entry.in_use and now - entry.last_used >= self._idle_timeout:
+                self._delete(key)
+
+    def clear(self):
+        for key, entry in list(self._entries.items()):
+            if not entry.in_use:
+                self._delete(key)
+
+    def shutdown(self):
+        import maya.cmds as cmds
+
+        for job in self._script_jobs:
+            if cmds.scriptJob(exists=job):
+                cmds.scriptJob(kill=job, force=True)
+        self._script_jobs = []
+        for key in list(self._entries):
+            self._delete(key)
+
+    def _create(self, key, editor_params, suffix=""):
+        import maya.cmds as cmds
+
+        self._watch_scene()
+        width, height = key
+        window = "tkMayaPlayblast_%dx%d%s" % (width, height, suffix)
+        # don't let Maya remember a previous size
+        if cmds.windowPref(window, exists=True):
+            cmds.windowPref(window, remove=True)
+        window = cmds.window(
+            window,
+            title=self._title,
+            titleBar=True,
+            iconify=True,
+            leftEdge=100,
+            topEdge=100,
+            width=width,
+            height=height,
+            sizeable=False,
+            retain=True,
+        )
+        # Create editor area
+        layout = cmds.formLayout()
+        editor = cmds.modelEditor(**editor_params)
+        cmds.formLayout(
+            layout,
+            edit=True,
+            attachForm=(
+                (editor, "left", 0),
+                (editor, "top", 0),
+                (editor, "right", 0),
+                (editor, "bottom", 0)
+            )
+        )
+        # Show window
+        cmds.showWindow(window)
+        cmds.setFocus(editor)
+        cmds.refresh()
+        self._logger.debug("Created playblast editor %s for %dx%d", editor, width, height)
+        return _PooledEditor(window, editor, editor_params)
+
+    def _delete(self, key):
+        entry = self._entries.pop(key)
+        self._delete_ui(entry.window)
+
+    @staticmethod
+    def _delete_ui(window):
+        import maya.cmds as cmds
+
+        if cmds.window(window, exists=True):
+            cmds.deleteUI(window)
+
+    def _watch_scene(self):
+        import maya.cmds as cmds
+
+        if self._script_jobs:
+            return
+        for event in SCENE_EVENTS:
+            self._script_jobs.append(cmds.scriptJob(event=(event, self.clear)))
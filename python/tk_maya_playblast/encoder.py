@@ -0,0 +1,230 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+
+FFMPEG = "ffmpeg"
+FRAME_PADDING = 4
+IMAGE_FORMAT = "png"
+# H.264 in a quicktime, the format of the playblast_parameters defaults
+MOVIE_ARGS = ["-c:v", "libx264", "-preset", "fast", "-crf", "18", "-pix_fmt", "yuv420p"]
+AUDIO_ARGS = ["-c:a", "aac", "-shortest"]
+FEEDER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frame_feeder.py")
+
+Rendition = namedtuple("Rendition", ["output", "scale", "args"])
+Rendition.__new__.__defaults__ = (1.0, None)
+Rendition.__doc__ = """
+A movie encoded from the frames, scaled by scale, with the ffmpeg
+encoding args, MOVIE_ARGS by default.
+"""
+
+
+class EncodeError(RuntimeError):
+    pass
+
+
+def frame_pattern(directory, prefix, padding=FRAME_PADDING, extension=IMAGE_FORMAT):
+    """
+    printf style path of an image sequence, as understood by ffmpeg.
+    """
+    return os.path.join(directory, "%s.%%0%dd.%s" % (prefix, padding, extension))
+
+
+def frame_path(pattern, frame):
+    return pattern % frame
+
+
+def encode_image_sequence(
+    pattern, start_frame, output, frame_rate=24.0, ffmpeg=FFMPEG, args=None, audio=None, logger=None
+):
+    """
+    Encode an image sequence into a movie.
+
+    :param audio: (path, delay) of a sound to add, see :func:`audio_arguments`
+    """
+    command = [
+        ffmpeg, "-y", "-v", "error",
+        "-framerate", str(frame_rate),
+        "-start_number", str(int(start_frame)),
+        "-i", pattern,
+    ]
+    if audio:
+        command += audio_arguments(*audio) + ["-map", "0:v", "-map", "1:a"] + AUDIO_ARGS
+    command += list(MOVIE_ARGS if args is None else args) + [output]
+    run(command, logger)
+    return output
+
+
+def audio_arguments(path, delay=0.0):
+    """
+    ffmpeg input of a sound file starting delay seconds into the movie,
+    negative to skip the start of the sound.
+    """
+    if delay >= 0:
+        return ["-itsoffset", str(delay), "-i", path]
+    return ["-ss", str(-delay), "-i", path]
+
+
+def rendition_arguments(renditions, audio=False):
+    """
+    ffmpeg arguments writing every rendition from a single decode of the
+    first input, the sound of the second input is added when audio is set.
+    """
+    labels = ["[s%d]" % index for index in range(len(renditions))]
+    filters = ["[0:v]split=%d%s" % (len(renditions), "".join(labels))]
+    arguments = []
+    for index, rendition in enumerate(renditions):
+        # even dimensions, as yuv420p needs
+        filters.append(
+            "%sscale=trunc(iw*%s/2)*2:trunc(ih*%s/2)*2[v%d]" % (labels[index], rendition.scale, rendition.scale, index)
+        )
+        arguments += ["-map", "[v%d]" % index]
+        if audio:
+            arguments += ["-map", "1:a"] + AUDIO_ARGS
+        arguments += list(MOVIE_ARGS if rendition.args is None else rendition.args) + [rendition.output]
+    return ["-filter_complex", ";".join(filters)] + arguments
+
+
+class StreamingEncoder(object):
+    """
+    Encode an image sequence into several renditions while it is rendered.
+
+    A feeder process streams each frame into ffmpeg once it is complete and
+    deletes it, ffmpeg decodes it once for all renditions. Both run outside
+    of Maya, so encoding carries on while the render holds the main thread.
+    Call :meth:`start` before the render, then :meth:`finish` once it is
+    done, or :meth:`abort` if it failed.
+    """
+
+    def __init__(
+        self,
+        pattern,
+        start_frame,
+        end_frame,
+        renditions,
+        frame_rate=24.0,
+        ffmpeg=FFMPEG,
+        python=None,
+        audio=None,
+        keep_frames=False,
+        logger=None,
+    ):
+        """
+        :param audio: (path, delay) of a sound to add, see :func:`audio_arguments`
+        """
+        self._pattern = pattern
+        self._start_frame = int(start_frame)
+        self._end_frame = int(end_frame)
+        self.renditions = list(renditions)
+        self._frame_rate = frame_rate
+        self._ffmpeg = ffmpeg
+        self._python = python or sys.executable
+        self._audio = audio
+        self._keep_frames = keep_frames
+        self._logger = logger
+        self._done_file = os.path.join(os.path.dirname(pattern), ".rendered")
+        self._feeder = None
+        self._encoder = None
+        self._logs = []
+
+    def start(self):
+        feeder_command = [
+            self._python, FEEDER_SCRIPT,
+            "--pattern", self._pattern,
+            "--start", str(self._start_frame),
+            "--end", str(self._end_frame),
+            "--done-file", self._done_file,
+        ]
+        if self._keep_frames:
+            feeder_command.append("--keep")
+        command = [
+            self._ffmpeg, "-y", "-v", "error",
+            "-f", "image2pipe", "-framerate", str(self._frame_rate),
+            "-i", "-",
+        ]
+        if self._audio:
+            command += audio_arguments(*self._audio)
+        command += rendition_arguments(self.renditions, audio=bool(self._audio))
+        if self._logger:
+            self._logger.debug("Streaming frames: %s", subprocess.list2cmdline(command))
+
+        feeder_log, encoder_log = tempfile.TemporaryFile(), tempfile.TemporaryFile()
+        self._logs = [feeder_log, encoder_log]
+        self._feeder = subprocess.Popen(feeder_command, stdout=subprocess.PIPE, stderr=feeder_log)
+        try:
+            self._encoder = subprocess.Popen(command, stdin=self._feeder.stdout, stderr=encoder_log)
+        except OSError:
+            self.abort()
+            raise
+        # only ffmpeg reads the frames, it gets a broken pipe if the feeder dies
+        self._feeder.stdout.close()
+        return self
+
+    def finish(self):
+        """
+        Mark the render as finished and wait for the movies.
+
+        :returns: the rendition paths
+        """
+        open(self._done_file, "w").close()
+        try:
+            feeder_code = self._feeder.wait()
+            encoder_code = self._encoder.wait()
+            if encoder_code != 0:
+                raise EncodeError("%s failed: %s" % (self._ffmpeg, self._read_log(1)))
+            if feeder_code != 0:
+                raise EncodeError("Streaming frames failed: %s" % self._read_log(0))
+        finally:
+            self._cleanup()
+        return [rendition.output for rendition in self.renditions]
+
+    def abort(self):
+        for process in (self._feeder, self._encoder):
+            if process is not None and process.poll() is None:
+                process.kill()
+                process.wait()
+        self._cleanup()
+
+    def _read_log(self, index):
+        log = self._logs[index]
+        log.seek(0)
+        return log.read().decode("utf-8", "replace").strip()[-2000:]
+
+    def _cleanup(self):
+        for log in self._logs:
+            log.close()
+        self._logs = []
+        if os.path.exists(self._done_file):
+            os.remove(self._done_file)
+
+
+def ffprobe_executable(ffmpeg=FFMPEG):
+    """
+    ffprobe, next to the configured ffmpeg.
+    """
+    directory, name = os.path.split(ffmpeg)
+    return os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+
+
+def probe_streams(path, ffprobe="ffprobe"):
+    """
+    The streams of a movie, as dicts of the ffprobe stream entries.
+    """
+    output = subprocess.check_output([
+        ffprobe, "-v", "error",
+        "-show_entries", "stream=codec_type,codec_name,width,height,pix_fmt,r_frame_rate,sample_rate,channels",
+        "-of", "json", path,
+    ])
+    return json.loads(output.decode("utf-8")).get("streams", [])
+
+
+def run(command, logger=None):
+    if logger:
+        logger.debug("Running %s", subprocess.list2cmdline(command))
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise EncodeError("%s failed: %s" % (command[0], stderr.decode("utf-8", "replace").strip()))
+    return stdout
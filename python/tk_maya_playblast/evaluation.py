@@ -0,0 +1,216 @@
+"""
+Evaluation manager mode while playblasting, and the time Maya spends
+evaluating and drawing each frame.
+"""
+import time
+
+# evaluation manager modes, "off" evaluates the dependency graph
+DG = "off"
+SERIAL = "serial"
+PARALLEL = "parallel"
+MODES = (DG, SERIAL, PARALLEL)
+
+
+class EvaluationProfile(object):
+    """
+    Switch the evaluation manager to mode, optionally evaluating the
+    playback range once so the evaluation graph is built and cached
+    playback filled before the capture, and put the previous mode and time
+    back on restore.
+
+    A scene holding nodes of unsafe_node_types, or where Maya refuses the
+    mode, is evaluated in fallback_mode instead.
+    """
+
+    def __init__(self, mode=PARALLEL, prewarm=False, unsafe_node_types=(), fallback_mode=SERIAL, logger=None):
+        if mode not in MODES or fallback_mode not in MODES:
+            raise ValueError("Evaluation modes are %s" % ", ".join(MODES))
+        self.mode = mode
+        self.prewarm = prewarm
+        self.unsafe_node_types = list(unsafe_node_types)
+        self.fallback_mode = fallback_mode
+        self._logger = logger
+        self.previous_mode = None
+        self.applied_mode = None
+        # seconds spent evaluating each frame of the pre-warm pass
+        self.prewarm_times = []
+
+    def __enter__(self):
+        self.apply()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.restore()
+
+    def apply(self):
+        """
+        :returns: the mode the scene is evaluated in
+        """
+        self.previous_mode = _query_mode()
+        mode = self.mode
+        if mode == PARALLEL:
+            unsafe = self._unsafe_nodes()
+            if unsafe:
+                self._log(
+                    "info", "%s can't be evaluated in parallel, using %s evaluation", unsafe[0], self.fallback_mode
+                )
+                mode = self.fallback_mode
+        self.applied_mode = self._switch(mode)
+        if self.applied_mode is None and mode != self.fallback_mode:
+            self.applied_mode = self._switch(self.fallback_mode)
+        if self.prewarm:
+            self._prewarm()
+        return self.applied_mode
+
+    def _unsafe_nodes(self):
+        import maya.cmds as cmds
+
+        nodes = []
+        for node_type in self.unsafe_node_types:
+            try:
+                nodes.extend(cmds.ls(type=node_type) or [])
+            except RuntimeError:
+                # unknown type, eg. of a plug-in which isn't loaded
+                continue
+        return nodes
+
+    def _switch(self, mode):
+        import maya.cmds as cmds
+
+        if mode == self.previous_mode:
+            return mode
+        try:
+            cmds.evaluationManager(mode=mode)
+        except RuntimeError:
+            self._log("warning", "Unable to switch to %s evaluation", mode)
+            return None
+        if _query_mode() != mode:
+            # eg. parallel evaluation disabled by the environment
+            self._log("warning", "Maya refused %s evaluation", mode)
+            return None
+        return mode
+
+    def _prewarm(self):
+        import maya.cmds as cmds
+
+        start_frame = int(cmds.playbackOptions(query=True, minTime=True))
+        end_frame = int(cmds.playbackOptions(query=True, maxTime=True))
+        current = cmds.currentTime(query=True)
+        self.prewarm_times = []
+        # evaluated without drawing
+        cmds.refresh(suspend=True)
+        try:
+            for frame in range(start_frame, end_frame + 1):
+                start = time.time()
+                cmds.currentTime(frame, update=True)
+                self.prewarm_times.append(time.time() - start)
+        finally:
+            cmds.refresh(suspend=False)
+            cmds.currentTime(current, update=True)
+        if self.prewarm_times:
+            self._log(
+                "info",
+                "Pre-warmed %d frames in %s evaluation, %.1f ms a frame",
+                len(self.prewarm_times),
+                self.applied_mode or self.previous_mode,
+                1000.0 * sum(self.prewarm_times) / len(self.prewarm_times),
+            )
+
+    def restore(self):
+        import maya.cmds as cmds
+
+        if self.previous_mode is not None and _query_mode() != self.previous_mode:
+            cmds.evaluationManager(mode=self.previous_mode)
+        self.applied_mode = None
+
+    def _log(self, level, message, *args):
+        if self._logger:
+            getattr(self._logger, level)(message, *args)
+
+
+def _query_mode():
+    import maya.cmds as cmds
+
+    # a list of one mode
+    mode = cmds.evaluationManager(query=True, mode=True)
+    if isinstance(mode, (list, tuple)):
+        mode = mode[0] if mode else None
+    return mode
+
+
+class FrameTimer(object):
+    """
+    Time spent drawing each frame a model panel renders, and the time
+    between the end of a draw and the start of the next, which is mostly
+    the evaluation of the next frame.
+    """
+
+    def __init__(self, panel):
+        self.panel = panel
+        # (frame, evaluation, draw) in seconds
+        self.frames = []
+        self._callbacks = []
+        self._frame = None
+        self._recorded = None
+        self._drawn = None
+        self._draw_start = None
+
+    def __enter__(self):
+        import maya.api.OpenMaya as om
+        import maya.api.OpenMayaUI as omui
+
+        self.frames = []
+        self._drawn = time.time()
+        self._callbacks = []
+        try:
+            self._callbacks.append(om.MDGMessage.addTimeChangeCallback(self._time_changed))
+            self._callbacks.append(omui.MUiMessage.add3dViewPreRenderMsgCallback(self.panel, self._pre_render))
+            self._callbacks.append(omui.MUiMessage.add3dViewPostRenderMsgCallback(self.panel, self._post_render))
+        except Exception:
+            # eg. a panel which isn't a 3d view
+            self.__exit__()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        import maya.api.OpenMaya as om
+
+        for callback in self._callbacks:
+            om.MMessage.removeCallback(callback)
+        self._callbacks = []
+
+    def _time_changed(self, time_value, *args):
+        self._frame = time_value.value
+
+    def _pre_render(self, *args):
+        self._draw_start = time.time()
+
+    def _post_render(self, *args):
+        if self._draw_start is None:
+            return
+        now = time.time()
+        if self.frames and self._recorded == self._frame:
+            # another draw of the same frame
+            frame, evaluation, draw = self.frames[-1]
+            self.frames[-1] = (frame, evaluation, draw + now - self._draw_start)
+        else:
+            self.frames.append((self._frame, self._draw_start - self._drawn, now - self._draw_start))
+            self._recorded = self._frame
+        self._drawn = now
+        self._draw_start = None
+
+    def summary(self):
+        """
+        Mean and slowest evaluation and draw times, in milliseconds.
+        """
+        if not self.frames:
+            return {}
+        evaluations = [evaluation for _, evaluation, _ in self.frames]
+        draws = [draw for _, _, draw in self.frames]
+        return {
+            "frames": len(self.frames),
+            "evaluation_ms": 1000.0 * sum(evaluations) / len(evaluations),
+            "evaluation_max_ms": 1000.0 * max(evaluations),
+            "draw_ms": 1000.0 * sum(draws) / len(draws),
+            "draw_max_ms": 1000.0 * max(draws),
+        }
@@ -0,0 +1,138 @@
+import math
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from . import encoder
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "farm_worker.py")
+# below this, starting another mayapy costs more than it saves
+MIN_CHUNK_SIZE = 10
+
+
+class FarmError(Exception):
+    pass
+
+
+def split_frame_range(start_frame, end_frame, chunks, min_chunk_size=MIN_CHUNK_SIZE):
+    """
+    Split an inclusive frame range into at most ``chunks`` contiguous ranges.
+    """
+    start_frame, end_frame = int(start_frame), int(end_frame)
+    frame_count = end_frame - start_frame + 1
+    if frame_count <= 0:
+        return []
+    chunks = max(1, min(chunks, frame_count // max(1, min_chunk_size) or 1))
+    chunk_size = int(math.ceil(frame_count / float(chunks)))
+    return [
+        (first, min(first + chunk_size - 1, end_frame))
+        for first in range(start_frame, end_frame + 1, chunk_size)
+    ]
+
+
+def mayapy_executable():
+    """
+    mayapy next to the running Maya.
+    """
+    name = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+    return os.path.join(os.path.dirname(sys.executable), name)
+
+
+class MayapyWorker(object):
+    """
+    Command line of an off-screen mayapy rendering a chunk of frames.
+    """
+
+    def __init__(self, scene, camera, width, height, executable=None, script=WORKER_SCRIPT):
+        self.scene = scene
+        self.camera = camera
+        self.width = width
+        self.height = height
+        self.executable = executable or mayapy_executable()
+        self.script = script
+
+    def __call__(self, start_frame, end_frame, pattern):
+        return [
+            self.executable, self.script,
+            "--scene", self.scene,
+            "--camera", self.camera,
+            "--start", str(start_frame),
+            "--end", str(end_frame),
+            "--width", str(self.width),
+            "--height", str(self.height),
+            "--output", pattern,
+        ]
+
+
+class FarmOrchestrator(object):
+    """
+    Render a frame range with a pool of worker processes.
+
+    ``worker`` returns the command rendering an inclusive frame range into a
+    printf style image path, a :class:`MayapyWorker` in production or any
+    stand-in command producing the frames.
+    """
+
+    def __init__(self, worker, logger, workers=None, min_chunk_size=MIN_CHUNK_SIZE):
+        self._worker = worker
+        self._logger = logger
+        self._workers = workers or multiprocessing.cpu_count()
+        self._min_chunk_size = min_chunk_size
+        self._lock = threading.Lock()
+        self._processes = []
+        self._cancelled = False
+
+    def render(self, start_frame, end_frame, pattern):
+        """
+        Render all frames, returning their paths in frame order.
+        """
+        chunks = split_frame_range(start_frame, end_frame, self._workers, self._min_chunk_size)
+        self._logger.debug("Rendering %d-%d in %d chunks", start_frame, end_frame, len(chunks))
+        errors = []
+        threads = []
+        start = time.time()
+        for chunk in chunks:
+            thread = threading.Thread(target=self._render_chunk, args=(chunk, pattern, errors))
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        if self._cancelled:
+            raise FarmError("Farm playblast cancelled")
+        if errors:
+            raise FarmError("; ".join(errors))
+
+        frames = [encoder.frame_path(pattern, frame) for frame in range(int(start_frame), int(end_frame) + 1)]
+        missing = [frame for frame in frames if not os.path.isfile(frame)]
+        if missing:
+            raise FarmError("%d frames were not rendered, first is %s" % (len(missing), missing[0]))
+        self._logger.debug(
+            "Rendered %d frames in %.1fs with %d workers", len(frames), time.time() - start, len(chunks)
+        )
+        return frames
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            for process in self._processes:
+                if process.poll() is None:
+                    process.kill()
+
+    def _render_chunk(self, chunk, pattern, errors):
+        command = self._worker(chunk[0], chunk[1], pattern)
+        with self._lock:
+            if self._cancelled:
+                return
+            self._logger.debug("Starting worker %s", subprocess.list2cmdline(command))
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            self._processes.append(process)
+        output = process.communicate()[0]
+        if process.returncode != 0:
+            errors.append(
+                "Worker for frames %d-%d failed (%d): %s"
+                % (chunk[0], chunk[1], process.returncode, output.decode("utf-8", "replace").strip()[-2000:])
+            )
@@ -0,0 +1,50 @@
+"""
+Render a chunk of frames off-screen, run with mayapy by the farm playblast.
+
+Playblasts need an interactive viewport, so frames are drawn with the batch
+Viewport 2.0 renderer (ogsRender). It draws the camera view with the render
+settings of the scene: no HUDs and none of the model editor display settings
+of a playblast. The sound is added when the frames are encoded.
+"""
+import argparse
+import os
+import shutil
+import sys
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scene", required=True)
+    parser.add_argument("--camera", required=True)
+    parser.add_argument("--start", type=int, required=True)
+    parser.add_argument("--end", type=int, required=True)
+    parser.add_argument("--width", type=int, required=True)
+    parser.add_argument("--height", type=int, required=True)
+    parser.add_argument("--output", required=True, help="printf style image path, eg. /tmp/shot.%%04d.png")
+    return parser.parse_args(argv)
+
+
+def render(args):
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    import maya.cmds as cmds
+
+    try:
+        cmds.file(args.scene, open=True, force=True, prompt=False)
+        # png images, written where the output pattern says
+        cmds.setAttr("defaultRenderGlobals.imageFormat", 32)
+        output_directory = os.path.dirname(args.output)
+        if not os.path.isdir(output_directory):
+            os.makedirs(output_directory)
+        for frame in range(args.start, args.end + 1):
+            cmds.currentTime(frame, edit=True)
+            image = cmds.ogsRender(camera=args.camera, width=args.width, height=args.height, currentFrame=True)
+            shutil.move(image, args.output % frame)
+            sys.stdout.write("frame %d\n" % frame)
+            sys.stdout.flush()
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == "__main__":
+    render(parse_args(sys.argv[1:]))
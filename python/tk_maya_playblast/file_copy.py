@@ -0,0 +1,271 @@
+import hashlib
+import os
+import sys
+import threading
+import uuid
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+CHUNK_SIZE = 8 * 1024 * 1024
+# chunks buffered per destination before the reader waits for a slow writer
+QUEUE_DEPTH = 4
+HASH_ALGORITHM = "sha256"
+# linux ioctl cloning a file on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+COPIED = "copied"
+LINKED = "linked"
+REFLINKED = "reflinked"
+SKIPPED = "skipped"
+
+
+class CopyResult(object):
+    def __init__(self, source, checksum, size):
+        self.source = source
+        self.checksum = checksum
+        self.size = size
+        self.destinations = {}
+
+    def __repr__(self):
+        return "<CopyResult %s %s>" % (self.source, self.destinations)
+
+
+def file_checksum(path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def temporary_path(destination):
+    """
+    A hidden name next to the destination, renaming it is atomic.
+    """
+    dirname, basename = os.path.split(destination)
+    return os.path.join(dirname, ".%s.%s.tmp" % (basename, uuid.uuid4().hex[:8]))
+
+
+def atomic_rename(source, destination):
+    if hasattr(os, "replace"):
+        os.replace(source, destination)
+        return
+    try:
+        os.rename(source, destination)
+    except OSError:
+        # windows won't rename over an existing file with python 2
+        if sys.platform != "win32" or not os.path.exists(destination):
+            raise
+        os.remove(destination)
+        os.rename(source, destination)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _device(path):
+    return os.stat(path).st_dev
+
+
+def _reflink(source, destination):
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(source, "rb") as source_handle:
+        with open(destination, "wb") as destination_handle:
+            try:
+                fcntl.ioctl(destination_handle.fileno(), FICLONE, source_handle.fileno())
+            except (IOError, OSError):
+                return False
+    return True
+
+
+def _link(source, destination):
+    if not hasattr(os, "link"):
+        return False
+    try:
+        os.link(source, destination)
+    except OSError:
+        # filesystems without hardlink support, or too many links
+        return False
+    return True
+
+
+class _DestinationWriter(threading.Thread):
+    """
+    Write the chunks handed over by the reader into a temporary file.
+    """
+
+    def __init__(self, destination):
+        super(_DestinationWriter, self).__init__(name="PlayblastCopy")
+        self.daemon = True
+        self.destination = destination
+        self.temporary = temporary_path(destination)
+        self.chunks = queue.Queue(QUEUE_DEPTH)
+        self.written = 0
+        self.error = None
+
+    def run(self):
+        try:
+            with open(self.temporary, "wb") as handle:
+                while True:
+                    chunk = self.chunks.get()
+                    if chunk is None:
+                        break
+                    handle.write(chunk)
+                    self.written += len(chunk)
+                handle.flush()
+                os.fsync(handle.fileno())
+        except Exception as error:
+            self.error = error
+            # keep draining so the reader never blocks on a dead writer
+            while self.chunks.get() is not None:
+                pass
+
+    def commit(self, size):
+        if self.error is None and self.written != size:
+            self.error = IOError("Wrote %d of %d bytes to %s" % (self.written, size, self.destination))
+        if self.error is not None:
+            _remove_quietly(self.temporary)
+            raise self.error
+        atomic_rename(self.temporary, self.destination)
+
+
+def copy_to_destinations(source, destinations, logger=None, chunk_size=CHUNK_SIZE, index=None, progress=None):
+    """
+    Copy source to all destinations reading it only once.
+
+    Destinations already holding identical content are skipped. Among the
+    others, one destination per filesystem receives the data, streamed to all
+    of them at the same time, and the rest are hardlinked to it. Files are
+    written under a temporary name and renamed into place once complete.
+
+    With a :class:`~fingerprints.FingerprintIndex`, the checksums of the
+    source and of the destinations written are recorded in it, destinations
+    it knows hold the source aren't read to be compared. progress is called
+    with the bytes read and the size of the source while it is streamed.
+
+    :returns: a :class:`CopyResult` with the source checksum and the action
+        taken for each destination.
+    """
+    size = os.path.getsize(source)
+    pending = []
+    for destination in destinations:
+        destination = os.path.normpath(destination)
+        if destination in pending or os.path.normpath(source) == destination:
+            continue
+        dirname = os.path.dirname(destination)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        pending.append(destination)
+
+    checksum = None
+    result = CopyResult(source, checksum, size)
+    # only destinations with the same size can hold the same content
+    same_size = [d for d in pending if os.path.isfile(d) and os.path.getsize(d) == size]
+    if same_size:
+        checksum = index.checksum(source) if index else file_checksum(source, chunk_size)
+        for destination in same_size:
+            if index and index.matches(destination, checksum):
+                identical = True
+            else:
+                identical = file_checksum(destination, chunk_size) == checksum
+                if identical and index:
+                    index.record(destination, checksum)
+            if identical:
+                result.destinations[destination] = SKIPPED
+                pending.remove(destination)
+
+    # one primary destination per filesystem, the others are linked to it
+    primaries = []
+    links = []
+    devices = {}
+    for destination in pending:
+        device = _device(os.path.dirname(destination))
+        if device in devices:
+            links.append((destination, devices[device]))
+        else:
+            devices[device] = destination
+            primaries.append(destination)
+
+    streamed = []
+    source_device = _device(source)
+    for destination in primaries:
+        if _device(os.path.dirname(destination)) == source_device:
+            temporary = temporary_path(destination)
+            if _reflink(source, temporary):
+                atomic_rename(temporary, destination)
+                result.destinations[destination] = REFLINKED
+                continue
+            _remove_quietly(temporary)
+        streamed.append(destination)
+
+    if streamed:
+        stream_checksum = _stream(source, streamed, size, chunk_size, progress)
+        checksum = checksum or stream_checksum
+        for destination in streamed:
+            result.destinations[destination] = COPIED
+
+    for destination, primary in links:
+        temporary = temporary_path(destination)
+        if _link(primary, temporary):
+            atomic_rename(temporary, destination)
+            result.destinations[destination] = LINKED
+        else:
+            _stream(primary, [destination], size, chunk_size)
+            result.destinations[destination] = COPIED
+
+    result.checksum = checksum or file_checksum(source, chunk_size)
+    if index:
+        index.record(source, result.checksum)
+        for destination, action in result.destinations.items():
+            if action != SKIPPED:
+                index.record(destination, result.checksum)
+    if logger:
+        for destination, action in sorted(result.destinations.items()):
+            logger.debug("%s %s to %s", action.capitalize(), source, destination)
+    return result
+
+
+def _stream(source, destinations, size, chunk_size, progress=None):
+    digest = hashlib.new(HASH_ALGORITHM)
+    read = 0
+    writers = [_DestinationWriter(destination) for destination in destinations]
+    for writer in writers:
+        writer.start()
+    try:
+        with open(source, "rb") as handle:
+            for chunk in iter(lambda: handle.read(chunk_size), b""):
+                digest.update(chunk)
+                for writer in writers:
+                    writer.chunks.put(chunk)
+                read += len(chunk)
+                if progress:
+                    progress(read, size)
+    except Exception:
+        for writer in writers:
+            writer.chunks.put(None)
+            writer.join()
+            _remove_quietly(writer.temporary)
+        raise
+    for writer in writers:
+        writer.chunks.put(None)
+    for writer in writers:
+        writer.join()
+
+    errors = []
+    for writer in writers:
+        try:
+            writer.commit(size)
+        except Exception as error:
+            errors.append(error)
+    if errors:
+        raise errors[0]
+    return digest.hexdigest()
@@ -0,0 +1,108 @@
+import json
+import os
+import threading
+import time
+
+from . import file_copy
+
+INDEX_FILENAME = "tk-maya-playblast-fingerprints.json"
+# entries kept, the oldest are dropped first
+MAX_ENTRIES = 2000
+
+
+class FingerprintIndex(object):
+    """
+    Checksums of the movies written by the app, kept in a JSON file.
+
+    A file entry holds the size and modification time of the file when it
+    was fingerprinted, it is only trusted while they didn't change, so a
+    destination can be compared to a movie without reading it again.
+    Uploads are recorded by entity, with the checksum of the movie sent.
+    """
+
+    def __init__(self, path, logger=None):
+        self.path = path
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def checksum(self, path):
+        """
+        Checksum of the file, read only when it isn't in the index.
+        """
+        checksum = self.lookup(path)
+        if checksum is None:
+            checksum = file_copy.file_checksum(path)
+            self.record(path, checksum)
+        return checksum
+
+    def lookup(self, path):
+        """
+        Checksum of the file from the index, None if unknown or changed.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._load()["files"].get(self._key(path))
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return entry["checksum"]
+        return None
+
+    def matches(self, path, checksum):
+        return checksum is not None and self.lookup(path) == checksum
+
+    def record(self, path, checksum):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self._update(
+            "files", self._key(path), {"size": stat.st_size, "mtime": stat.st_mtime, "checksum": checksum}
+        )
+
+    def uploaded(self, entity_type, entity_id):
+        """
+        Checksum of the movie last uploaded to an entity from this computer.
+        """
+        with self._lock:
+            entry = self._load()["uploads"].get("%s:%s" % (entity_type, entity_id))
+        return entry["checksum"] if entry else None
+
+    def record_upload(self, entity_type, entity_id, checksum):
+        self._update("uploads", "%s:%s" % (entity_type, entity_id), {"checksum": checksum})
+
+    def _key(self, path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def _update(self, section, key, entry):
+        entry["updated"] = time.time()
+        with self._lock:
+            entries = self._load()[section]
+            entries[key] = entry
+            if len(entries) > MAX_ENTRIES:
+                for old in sorted(entries, key=lambda name: entries[name]["updated"])[:len(entries) - MAX_ENTRIES]:
+                    del entries[old]
+            self._save()
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {"files": {}, "uploads": {}}
+            try:
+                with open(self.path) as handle:
+                    self._entries.update(json.load(handle))
+            except (IOError, OSError, ValueError):
+                pass
+        return self._entries
+
+    def _save(self):
+        temporary = file_copy.temporary_path(self.path)
+        try:
+            with open(temporary, "w") as handle:
+                json.dump(self._entries, handle)
+            file_copy.atomic_rename(temporary, self.path)
+        except (IOError, OSError):
+            # the index only saves work, never fail a publish for it
+            if self._logger:
+                self._logger.debug("Unable to write %s", self.path, exc_info=True)
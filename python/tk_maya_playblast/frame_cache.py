@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+GIGABYTE = 1024 * 1024 * 1024
+# shapes whose box is part of the fingerprint
+DRAWN_SHAPES = ("mesh", "nurbsSurface", "nurbsCurve", "gpuCache")
+# node type to the attribute naming the file it reads
+FILE_ATTRIBUTES = {
+    "gpuCache": "cacheFileName",
+    "AlembicNode": "abc_File",
+    "file": "fileTextureName",
+    "audio": "filename",
+}
+
+
+def scene_fingerprints(frames, camera, static_inputs):
+    """
+    Fingerprint of what is drawn on each frame.
+
+    A frame fingerprint covers the frame number, the value of every
+    animation curve and the camera transform and lens at that frame, the
+    :func:`scene_contents`, plus ``static_inputs``, eg. the model editor and
+    playblast parameters and the resolution. Saving the scene doesn't change
+    it. Changes which are neither keyed nor seen in the contents, like
+    shading, an edit of a mesh within its box, or deformation driven by
+    expressions or simulations, aren't detected and their frames come from
+    the cache.
+
+    :returns: dict of frame to fingerprint
+    """
+    import maya.cmds as cmds
+
+    static_inputs = dict(static_inputs, contents=scene_contents())
+    static = hashlib.sha1(json.dumps(static_inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    curves = sorted(cmds.ls(type=("animCurveTL", "animCurveTA", "animCurveTU", "animCurveTT")) or [])
+    camera_shape = (cmds.ls(camera, dag=True, cameras=True) or [camera])[0]
+    fingerprints = {}
+    for frame in frames:
+        digest = hashlib.sha1(static.encode("utf-8"))
+        # a held pose is still another frame, with its own frame number drawn
+        digest.update(repr(float(frame)).encode("utf-8"))
+        if curves:
+            # all curves evaluated with a single command per frame
+            values = cmds.keyframe(curves, query=True, eval=True, time=(frame, frame)) or []
+            digest.update(repr(list(zip(curves, values))).encode("utf-8"))
+        digest.update(repr(cmds.getAttr(camera + ".worldMatrix", time=frame)).encode("utf-8"))
+        for attribute in ("focalLength", "horizontalFilmAperture", "verticalFilmAperture", "orthographicWidth"):
+            digest.update(repr(cmds.getAttr("%s.%s" % (camera_shape, attribute), time=frame)).encode("utf-8"))
+        fingerprints[frame] = digest.hexdigest()
+    return fingerprints
+
+
+def scene_contents():
+    """
+    What is drawn besides the animation, read once at the current time:
+    the world bounding box of every visible shape, which moves with unkeyed
+    transforms and modelling, and the files of the caches and textures with
+    their modification time.
+    """
+    import maya.cmds as cmds
+
+    shapes = sorted(cmds.ls(type=DRAWN_SHAPES, long=True, noIntermediate=True, visible=True) or [])
+    contents = [[shape, cmds.exactWorldBoundingBox(shape)] for shape in shapes]
+    for node_type, attribute in sorted(FILE_ATTRIBUTES.items()):
+        try:
+            nodes = sorted(cmds.ls(type=node_type) or [])
+        except RuntimeError:
+            # a plug-in node type which isn't loaded
+            continue
+        for node in nodes:
+            path = cmds.getAttr("%s.%s" % (node, attribute))
+            try:
+                modified = os.path.getmtime(path) if path else None
+            except OSError:
+                modified = None
+            contents.append([node, path, modified])
+    return contents
+
+
+def dirty_ranges(frames, fingerprints, cache):
+    """
+    Contiguous inclusive ranges of the frames missing from the cache.
+    """
+    ranges = []
+    for frame in frames:
+        if cache.get(fingerprints[frame]) is not None:
+            continue
+        if ranges and ranges[-1][1] == frame - 1:
+            ranges[-1][1] = frame
+        else:
+            ranges.append([frame, frame])
+    return [tuple(frame_range) for frame_range in ranges]
+
+
+def link_or_copy(source, destination):
+    if hasattr(os, "link"):
+        try:
+            os.link(source, destination)
+            return
+        except OSError:
+            pass
+    shutil.copyfile(source, destination)
+
+
+class FrameCache(object):
+    """
+    Rendered frames stored by fingerprint, bounded in size.
+
+    The least recently used frames are evicted first, use is tracked with the
+    modification time of the files.
+    """
+
+    def __init__(self, directory, max_bytes=10 * GIGABYTE, extension="png"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._extension = extension
+        self._lock = threading.Lock()
+
+    def path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint[:2], "%s.%s" % (fingerprint, self._extension))
+
+    def get(self, fingerprint):
+        path = self.path(fingerprint)
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def put(self, fingerprint, image):
+        """
+        Move a rendered image into the cache.
+        """
+        path = self.path(fingerprint)
+        dirname = os.path.dirname(path)
+        with self._lock:
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            shutil.move(image, path)
+        return path
+
+    def assemble(self, fingerprints, pattern, start_frame):
+        """
+        Lay the cached frames out as an image sequence, in the given order.
+        """
+        for index, fingerprint in enumerate(fingerprints):
+            link_or_copy(self.path(fingerprint), pattern % (start_frame + index))
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Remove the least recently used frames until the cache fits.
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self):
+        with self._lock:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _entries(self):
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
@@ -0,0 +1,85 @@
+"""
+Stream an image sequence to stdout while it is being rendered, run next to
+ffmpeg by the pipelined encode.
+
+A frame is sent once the next one exists, or once the done file exists for
+the last frames, then deleted. Running in its own process, it keeps feeding
+ffmpeg while Maya holds its main thread rendering.
+"""
+import argparse
+import os
+import sys
+import time
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pattern", required=True, help="printf style image path, eg. /tmp/shot.%%04d.png")
+    parser.add_argument("--start", type=int, required=True)
+    parser.add_argument("--end", type=int, required=True)
+    parser.add_argument("--done-file", required=True, help="created once the render finished")
+    parser.add_argument("--poll", type=float, default=0.02, help="seconds between checks for a new frame")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for a frame")
+    parser.add_argument("--keep", action="store_true", help="don't delete the frames once sent")
+    return parser.parse_args(argv)
+
+
+def binary_stdout():
+    if sys.platform == "win32":
+        import msvcrt
+        msvcrt.setmode(sys.stdout.fileno(), os.O_BINARY)
+    return getattr(sys.stdout, "buffer", sys.stdout)
+
+
+def wait_for_frame(args, frame):
+    """
+    True once the frame is complete, False when the render finished
+    without it.
+    """
+    path = args.pattern % frame
+    next_path = args.pattern % (frame + 1)
+    deadline = time.time() + args.timeout
+    while True:
+        # check the done file first, the frame may land in between
+        finished = os.path.exists(args.done_file)
+        if os.path.exists(path):
+            if finished or (frame < args.end and os.path.exists(next_path)):
+                return True
+        elif finished:
+            return False
+        if time.time() > deadline:
+            raise RuntimeError("Timed out waiting for %s" % path)
+        time.sleep(args.poll)
+
+
+def feed(args, output):
+    for frame in range(args.start, args.end + 1):
+        if not wait_for_frame(args, frame):
+            raise RuntimeError("The render finished without %s" % (args.pattern % frame))
+        path = args.pattern % frame
+        with open(path, "rb") as handle:
+            for chunk in iter(lambda: handle.read(CHUNK_SIZE), b""):
+                output.write(chunk)
+        output.flush()
+        if not args.keep:
+            os.remove(path)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        feed(args, binary_stdout())
+    except (IOError, OSError) as error:
+        # ffmpeg went away, it reports why
+        sys.stderr.write("Feeding frames stopped: %s\n" % error)
+        return 1
+    except RuntimeError as error:
+        sys.stderr.write("%s\n" % error)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
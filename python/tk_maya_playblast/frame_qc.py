@@ -0,0 +1,176 @@
+"""
+Checks of a rendered movie before it is published: black or blank frames,
+frozen frames, frame count and resolution.
+
+Frames are decoded by ffmpeg, scaled down to ANALYSIS_WIDTH grey levels,
+and checked a batch at a time with NumPy.
+"""
+import subprocess
+
+from . import encoder
+from .optional import numpy_available
+
+ABORT = "abort"
+CONTINUE = "continue"
+# pixels across the frames are analysed at, enough to tell them apart
+ANALYSIS_WIDTH = 160
+BATCH_SIZE = 64
+# mean grey level, out of 255, under which a frame is black
+BLACK_LEVEL = 4.0
+# standard deviation of the grey levels under which a frame is blank
+BLANK_DEVIATION = 1.0
+# mean absolute difference with the previous frame under which it is frozen
+FROZEN_DIFFERENCE = 0.05
+# encoders round the resolution to even numbers
+RESOLUTION_TOLERANCE = 2
+
+
+class FrameQCError(Exception):
+    pass
+
+
+class QCReport(object):
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self.width = None
+        self.height = None
+        self.black_frames = []
+        self.blank_frames = []
+        # (first frame, length) of the runs of frames identical to the previous one
+        self.frozen_runs = []
+        self.problems = []
+
+    @property
+    def passed(self):
+        return not self.problems
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "frames": self.frames,
+            "resolution": [self.width, self.height],
+            "black_frames": len(self.black_frames),
+            "blank_frames": len(self.blank_frames),
+            "longest_frozen": max([length for _, length in self.frozen_runs] or [0]),
+            "problems": self.problems,
+        }
+
+    def __str__(self):
+        return "; ".join(self.problems) if self.problems else "%d frames passed" % self.frames
+
+
+def decode_batches(path, width, height, ffmpeg=encoder.FFMPEG, batch_size=BATCH_SIZE):
+    """
+    The frames of a movie as uint8 arrays of (frames, height, width) grey
+    levels, batch_size frames at a time.
+    """
+    import numpy
+
+    process = subprocess.Popen(
+        [
+            ffmpeg, "-v", "error", "-i", path, "-an",
+            "-vf", "scale=%d:%d" % (width, height),
+            "-f", "rawvideo", "-pix_fmt", "gray", "-",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    frame_size = width * height
+    try:
+        while True:
+            data = _read(process.stdout, frame_size * batch_size)
+            frames = len(data) // frame_size
+            if frames:
+                yield numpy.frombuffer(data[:frames * frame_size], dtype=numpy.uint8).reshape(frames, height, width)
+            if len(data) < frame_size * batch_size:
+                break
+    finally:
+        process.stdout.close()
+        error = process.stderr.read()
+        process.stderr.close()
+        if process.wait() != 0:
+            raise FrameQCError("Unable to decode %s: %s" % (path, error.decode("utf-8", "replace").strip()))
+
+
+def _read(stream, size):
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def check_movie(
+    path, expected_frames=None, expected_resolution=None, max_frozen=0, first_frame=0, ffmpeg=encoder.FFMPEG
+):
+    """
+    Decode the movie and check its frames, reported numbered from
+    first_frame.
+
+    :param expected_frames: number of frames of the playback range
+    :param expected_resolution: (width, height) the movie should have
+    :param max_frozen: longest run of frames identical to the previous one
+        allowed, holds are legitimate in animation. 0 for no limit.
+    :returns: a :class:`QCReport`
+    """
+    if not numpy_available():
+        raise FrameQCError("The frame QC needs NumPy")
+    # a NumPy which can't be imported raises ImportError, the movie isn't to blame
+    import numpy
+
+    report = QCReport(path)
+    try:
+        streams = encoder.probe_streams(path, encoder.ffprobe_executable(ffmpeg))
+        video = [stream for stream in streams if stream.get("codec_type") == "video"][0]
+        report.width, report.height = int(video["width"]), int(video["height"])
+    except (subprocess.CalledProcessError, ValueError, LookupError):
+        raise FrameQCError("Unable to read the resolution of %s" % path)
+    analysis_height = max(2, int(round(report.height * ANALYSIS_WIDTH / float(report.width) / 2)) * 2)
+
+    previous = None
+    # whether each frame but the first is identical to the one before it
+    frozen = []
+    for batch in decode_batches(path, ANALYSIS_WIDTH, analysis_height, ffmpeg=ffmpeg):
+        first = report.frames + first_frame
+        report.frames += len(batch)
+        pixels = batch.reshape(len(batch), -1).astype(numpy.float32)
+        means = pixels.mean(axis=1)
+        deviations = pixels.std(axis=1)
+        black = means < BLACK_LEVEL
+        blank = (deviations < BLANK_DEVIATION) & ~black
+        report.black_frames.extend((numpy.flatnonzero(black) + first).tolist())
+        report.blank_frames.extend((numpy.flatnonzero(blank) + first).tolist())
+        # the last frame of the previous batch is compared too
+        if previous is not None:
+            pixels = numpy.concatenate([previous, pixels])
+        frozen.append(numpy.abs(numpy.diff(pixels, axis=0)).mean(axis=1) < FROZEN_DIFFERENCE)
+        previous = pixels[-1:]
+    if frozen:
+        edges = numpy.diff(numpy.concatenate([[0], numpy.concatenate(frozen).astype(numpy.int8), [0]]))
+        starts = numpy.flatnonzero(edges == 1)
+        lengths = numpy.flatnonzero(edges == -1) - starts
+        report.frozen_runs = list(zip((starts + 1 + first_frame).tolist(), lengths.tolist()))
+
+    if not report.frames:
+        report.problems.append("no frames")
+    if expected_frames is not None and report.frames != expected_frames:
+        report.problems.append("%d frames instead of %d" % (report.frames, expected_frames))
+    if expected_resolution:
+        width, height = expected_resolution
+        if abs(report.width - width) > RESOLUTION_TOLERANCE or abs(report.height - height) > RESOLUTION_TOLERANCE:
+            report.problems.append(
+                "resolution %dx%d instead of %dx%d" % (report.width, report.height, width, height)
+            )
+    if report.black_frames:
+        report.problems.append("%d black frames, first is %d" % (len(report.black_frames), report.black_frames[0]))
+    if report.blank_frames:
+        report.problems.append("%d blank frames, first is %d" % (len(report.blank_frames), report.blank_frames[0]))
+    too_long = [(start, length) for start, length in report.frozen_runs if max_frozen and length > max_frozen]
+    if too_long:
+        start, length = max(too_long, key=lambda run: run[1])
+        report.problems.append("%d frozen frames from frame %d" % (length, start))
+    return report
@@ -0,0 +1,72 @@
+from array import array
+
+
+class MayaHoldoutStore(object):
+    """
+    The holdOut plug of every mesh in the scene, read and written through
+    the Maya API instead of a getAttr/setAttr per mesh.
+    """
+
+    def __init__(self):
+        import maya.api.OpenMaya as om
+
+        self._om = om
+        self._plugs = []
+        iterator = om.MItDependencyNodes(om.MFn.kMesh)
+        node = om.MFnDependencyNode()
+        while not iterator.isDone():
+            node.setObject(iterator.thisNode())
+            self._plugs.append(node.findPlug("holdOut", False))
+            iterator.next()
+
+    def __len__(self):
+        return len(self._plugs)
+
+    def read(self):
+        return array("B", (plug.asBool() for plug in self._plugs))
+
+    def write(self, indices, value):
+        # one modifier for all meshes, locked plugs are left alone
+        modifier = self._om.MDGModifier()
+        for index in indices:
+            plug = self._plugs[index]
+            if not plug.isLocked:
+                modifier.newPlugValueBool(plug, value)
+        modifier.doIt()
+
+
+class HoldoutOverride(object):
+    """
+    Turn holdout on for every mesh, remembering which ones were changed.
+
+    Only the indices of the meshes which were off are kept, and only those are
+    turned back off on restore. ``store`` is any object with the
+    :class:`MayaHoldoutStore` interface.
+    """
+
+    def __init__(self, store=None):
+        self._store = store
+        self.changed = array("L")
+
+    def __enter__(self):
+        self.apply()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.restore()
+
+    def apply(self):
+        if self._store is None:
+            self._store = MayaHoldoutStore()
+        values = self._store.read()
+        self.changed = array("L", (index for index, value in enumerate(values) if not value))
+        if self.changed:
+            self._store.write(self.changed, True)
+        return len(self.changed)
+
+    def restore(self):
+        if self.changed:
+            self._store.write(self.changed, False)
+        restored = len(self.changed)
+        self.changed = array("L")
+        return restored
@@ -0,0 +1,274 @@
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+JOBS_FILENAME = "tk-maya-playblast-jobs.sqlite"
+# finished jobs are listed for a week
+KEEP_FINISHED = 7 * 24 * 3600
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, host);
+"""
+
+
+def process_alive(pid):
+    if pid == os.getpid():
+        return True
+    if sys.platform == "win32":
+        import ctypes
+
+        # PROCESS_QUERY_LIMITED_INFORMATION
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except OSError as error:
+        # EPERM, it exists but belongs to someone else
+        return error.errno == 1
+    return True
+
+
+class QueuedJob(object):
+    def __init__(self, id, name, spec, status, host, pid, created, updated, error=None, stages=None):
+        self.id = id
+        self.name = name
+        self.spec = spec
+        self.status = status
+        self.host = host
+        self.pid = pid
+        self.created = created
+        self.updated = updated
+        self.error = error
+        # stage name to (status, result)
+        self.stages = stages or {}
+
+    @property
+    def completed_stages(self):
+        return dict((stage, result) for stage, (status, result) in self.stages.items() if status == DONE)
+
+
+class JobQueue(object):
+    """
+    Playblast publish jobs kept in an SQLite database.
+
+    A job holds everything its stages need, as a JSON spec, and the result
+    of every stage once it completed. Jobs belong to the process which
+    queued them, a job whose process died on this host is pending again and
+    can be resumed by another process, skipping the completed stages.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._host = socket.gethostname()
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return _Connection(connection, self._lock)
+
+    def add(self, name, spec):
+        """
+        Queue a job owned by this process.
+
+        :returns: the job id
+        """
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (name, spec, status, host, pid, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name, json.dumps(spec), RUNNING, self._host, os.getpid(), now, now),
+            )
+            return cursor.lastrowid
+
+    def stage_done(self, job_id, stage, result=None):
+        self._set_stage(job_id, stage, DONE, result=json.dumps(result, default=str))
+
+    def stage_failed(self, job_id, stage, error):
+        self._set_stage(job_id, stage, FAILED, error=str(error))
+
+    def _set_stage(self, job_id, stage, status, result=None, error=None):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO stages (job_id, stage, status, result, error, updated) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, stage, status, result, error, now),
+            )
+            connection.execute("UPDATE jobs SET updated = ? WHERE id = ?", (now, job_id))
+
+    def finish(self, job_id, successful, error=None):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                (DONE if successful else FAILED, error, time.time(), job_id),
+            )
+
+    def claim(self, job_id):
+        """
+        Take a job over, if it is still orphaned.
+
+        :returns: True if this process now owns it
+        """
+        job = self.get(job_id)
+        if job is None or not self._orphaned(job):
+            return False
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, pid = ?, error = NULL, updated = ? "
+                "WHERE id = ? AND pid = ? AND status = ?",
+                (RUNNING, os.getpid(), time.time(), job_id, job.pid, job.status),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, job_id):
+        """
+        Leave a job for another process to finish, eg. on shutdown.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ? WHERE id = ? AND status = ?", (PENDING, job_id, RUNNING)
+            )
+
+    def retry(self, job_id):
+        """
+        Queue a failed job again, its failed stages run again.
+
+        :returns: True when the job had failed and is pending again
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM stages WHERE job_id = ? AND status = ?", (job_id, FAILED))
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, error = NULL WHERE id = ? AND status = ?", (PENDING, job_id, FAILED)
+            )
+            return cursor.rowcount == 1
+
+    def failed(self):
+        """
+        Jobs of this host whose publish failed, oldest first.
+        """
+        return self.jobs(statuses=(FAILED,), host=self._host)
+
+    def orphaned(self):
+        """
+        Jobs of this host which were queued by a process that is gone, or
+        released, oldest first.
+        """
+        return [job for job in self.jobs(statuses=(PENDING, RUNNING), host=self._host) if self._orphaned(job)]
+
+    def _orphaned(self, job):
+        if job.host != self._host or job.status not in (PENDING, RUNNING):
+            return False
+        return job.status == PENDING or not process_alive(job.pid)
+
+    def get(self, job_id):
+        jobs = self._query("WHERE jobs.id = ?", (job_id,))
+        return jobs[0] if jobs else None
+
+    def jobs(self, statuses=None, host=None, limit=None):
+        """
+        Jobs with their stages, newest last.
+        """
+        clauses = []
+        arguments = []
+        if statuses:
+            clauses.append("status IN (%s)" % ", ".join("?" * len(statuses)))
+            arguments.extend(statuses)
+        if host:
+            clauses.append("host = ?")
+            arguments.append(host)
+        where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+        if limit:
+            # the latest ones
+            where = "WHERE jobs.id IN (SELECT id FROM jobs %s ORDER BY id DESC LIMIT %d)" % (where, int(limit))
+        return self._query(where, arguments)
+
+    def _query(self, where, arguments):
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT id, name, spec, status, host, pid, created, updated, error FROM jobs %s ORDER BY id" % where,
+                arguments,
+            ).fetchall()
+            jobs = [QueuedJob(row[0], row[1], json.loads(row[2]), *row[3:]) for row in rows]
+            by_id = dict((job.id, job) for job in jobs)
+            if by_id:
+                stages = connection.execute(
+                    "SELECT job_id, stage, status, result FROM stages WHERE job_id IN (%s)"
+                    % ", ".join("?" * len(by_id)),
+                    list(by_id),
+                ).fetchall()
+                for job_id, stage, status, result in stages:
+                    by_id[job_id].stages[stage] = (status, json.loads(result) if result else None)
+        return jobs
+
+    def purge(self, older_than):
+        """
+        Forget finished jobs last updated more than older_than seconds ago.
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated < ?", (DONE, FAILED, time.time() - older_than)
+            )
+            return cursor.rowcount
+
+
+class _Connection(object):
+    """
+    A connection used for one transaction, committed and closed on exit.
+    Writes from threads of the same process are serialized by the lock,
+    other processes wait on the database lock.
+    """
+
+    def __init__(self, connection, lock):
+        self._connection = connection
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        return self._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._connection.commit()
+            else:
+                self._connection.rollback()
+        finally:
+            self._connection.close()
+            self._lock.release()
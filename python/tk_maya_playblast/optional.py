@@ -0,0 +1,34 @@
+"""
+Optional dependencies, looked up without importing them so loading the app
+doesn't pay for modules only some settings use.
+"""
+try:
+    from importlib.util import find_spec
+except ImportError:
+    find_spec = None
+    import imp
+
+_found = {}
+
+
+def available(name):
+    """
+    Whether the top level module name can be imported.
+    """
+    if name not in _found:
+        if find_spec is not None:
+            _found[name] = find_spec(name) is not None
+        else:
+            try:
+                handle = imp.find_module(name)[0]
+            except ImportError:
+                _found[name] = False
+            else:
+                if handle is not None:
+                    handle.close()
+                _found[name] = True
+    return _found[name]
+
+
+def numpy_available():
+    return available("numpy")
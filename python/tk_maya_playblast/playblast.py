@@ -1,14 +1,54 @@
 import os
 import pprint
-import subprocess
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+import sgtk
 
 from sgtk.platform.qt import QtCore, QtGui
-from .playblast_dialog import PlayblastDialog
+from . import culling
+from . import encoder
+from . import evaluation
+from . import farm
+from . import frame_cache
+from . import frame_qc
+from . import job_queue
+from . import optional
+from . import sequence
+from . import take_store
+from .editor_pool import EditorPool
+from .progress import INTERVAL, PlayblastCancelled
+from .publish_pipeline import PublishJob, PublishPipeline
+from .scene_state import SceneState
+from .shotgun_cache import ShotgunCache
+from .viewer import ViewerLauncher
 
-import pymel.core as pm
+# maya.cmds rather than pymel, which takes seconds to import
 import maya.cmds as cmds
 import maya.mel as mel
 
+
+# the proxy of a movie is written next to it with this suffix
+PROXY_SUFFIX = "_proxy"
+# image sequences are rendered this many frames at a time, a cancel waits
+# for the current ones
+CANCEL_CHUNK_FRAMES = 50
+
+PlayblastJob = namedtuple("PlayblastJob", ["camera", "start_frame", "end_frame", "percent", "template", "fields"])
+PlayblastJob.__new__.__defaults__ = (None, None, None, None, None)
+PlayblastJob.__doc__ = """
+One render of a batch playblast. Without a frame range the animation range
+is used, without a template the shot template. fields are added to the work
+file fields when resolving the template.
+"""
+
+
 class PlayblastManager(object):
     __upload_to_shotgun = True
     __create_version = False
@@ -23,9 +63,22 @@ class PlayblastManager(object):
         """
         self._app = app
         self._context = context if context else self._app.context
+        self._publish_pipeline = None
+        self._frame_cache = None
+        self._take_store = None
+        self._job_queue = None
+        # set while rendering, the dialog events processed meanwhile could
+        # start another playblast
+        self._busy = False
+        self.editor_pool = EditorPool(self._app.logger, idle_timeout=self._app.get_setting("editor_pool_timeout", 300))
+        self._viewer = ViewerLauncher(self._app.logger)
+        self.shotgun_cache = ShotgunCache(self._app.logger, ttl=self._app.get_setting("shotgun_cache_ttl", 300))
 
     def show_dialog(self):
         try:
+            # Qt widgets are only loaded once the dialog is needed
+            from .playblast_dialog import PlayblastDialog
+
             self._app.engine.show_dialog(
                 "Playblast %s" % self._app.version,
                 self._app,
@@ -36,122 +89,1081 @@ class PlayblastManager(object):
         except Exception:
             self._app.logger.error("Unable to show dialog.", exc_info=True)
 
-    def do_playblast(self, **override_playblast_params):
+    def get_shot_playblast_path(self, scene_name=None):
+        """
+        Path of the shot movie for the scene, the current one by default.
+        """
         template_work = self._app.get_template("template_work")
         template_shot = self._app.get_template("template_shot")
-        scene_name = pm.sceneName()
-        fields = template_work.get_fields(scene_name)
-        shot_playblast_path = template_shot.apply_fields(fields)
-
-        # Get value of optional config field "temp_directory". If path is
-        # invalid or not absolute, use default tempdir.
-        temp_directory = os.path.normpath(self._app.get_setting("temp_directory", "default"))
-        if not os.path.isabs(temp_directory):
-            import tempfile
-            temp_directory = tempfile.gettempdir()
-
-        # make sure it is exists
-        if not os.path.isdir(temp_directory):
-            os.mkdir(temp_directory)
-        # use the basename of generated names
-        local_playblast_path = os.path.join(temp_directory, os.path.basename(shot_playblast_path))
+        fields = template_work.get_fields(scene_name or cmds.file(query=True, sceneName=True))
+        return template_shot.apply_fields(fields)
+
+    def do_playblast(self, **override_playblast_params):
+        with self._exclusive():
+            self._do_playblast(override_playblast_params)
+
+    def _do_playblast(self, override_playblast_params):
+        scene_name = cmds.file(query=True, sceneName=True)
+        shot_playblast_path = self.get_shot_playblast_path(scene_name)
+
+        self._app.progress.reset()
+        # use the basename of generated names, in a directory of its own
+        local_playblast_path = self._new_take(shot_playblast_path)
+        # look the Version up while the playblast renders
+        if self.__create_version:
+            self.prefetch_version(os.path.basename(shot_playblast_path))
         # run actual playblast routine
-        self._create_playblast(shot_playblast_path, local_playblast_path, override_playblast_params)
-        self._app.logger.info("Playblast for %s succesful", scene_name)
+        successful = False
+        try:
+            with self._app.tracer.span("playblast", profile=True, scene=scene_name):
+                successful = self._create_playblast(
+                    shot_playblast_path, local_playblast_path, override_playblast_params
+                )
+        finally:
+            if not successful:
+                self.take_store.discard(os.path.dirname(local_playblast_path))
+        if successful:
+            self._app.logger.info("Playblast for %s succesful", scene_name)
 
-    def _create_playblast(self, shot_playblast_path, local_playblast_path, override_playblast_params):
+    def do_batch_playblast(self, jobs, **override_playblast_params):
+        """
+        Render several cameras and frame ranges, setting the playblast window,
+        HUDs and render globals up once for all of them.
 
-        # setting playback range
-        original_playback_range = (
-            pm.playbackOptions(query=True, minTime=True),
-            pm.playbackOptions(query=True, maxTime=True)
-        )
-        start_time = pm.playbackOptions(query=True, animationStartTime=True)
-        end_time = pm.playbackOptions(query=True, animationEndTime=True)
-        pm.playbackOptions(edit=True, minTime=start_time, maxTime=end_time)
-
-        # get playblast parameters from hook
-        playblast_params = self._app.execute_hook_method(
-            "hook_setup_window",
-            "get_playblast_params",
-            filename=local_playblast_path
+        :param jobs: list of :class:`PlayblastJob`
+        :returns: list of the local movies rendered, in the order of the jobs
+        """
+        if not jobs:
+            return []
+        with self._exclusive():
+            self._app.progress.reset()
+            with self._app.tracer.span("batch_playblast", profile=True, jobs=len(jobs)):
+                return self._batch_playblast(jobs, override_playblast_params)
+
+    def _batch_playblast(self, jobs, override_playblast_params):
+        template_work = self._app.get_template("template_work")
+        template_shot = self._app.get_template("template_shot")
+        scene_name = cmds.file(query=True, sceneName=True)
+        work_fields = template_work.get_fields(scene_name)
+        animation_range = SceneState(playback_range=True).capture().animation_range
+
+        outputs = []
+        shot_playblast_paths = set()
+        for job in jobs:
+            fields = dict(work_fields)
+            fields.update(job.fields or {})
+            shot_playblast_path = (job.template or template_shot).apply_fields(fields)
+            if shot_playblast_path in shot_playblast_paths:
+                raise sgtk.TankError(
+                    "Several playblasts would be written to %s, give the jobs different templates or fields"
+                    % shot_playblast_path
+                )
+            shot_playblast_paths.add(shot_playblast_path)
+            outputs.append((job, shot_playblast_path))
+
+        base_params = self._app.execute_hook_method("hook_setup_window", "get_playblast_params", filename="")
+        base_params.update(override_playblast_params)
+        estimated_size = 0
+        for job, _ in outputs:
+            job_params = dict(base_params)
+            if job.percent:
+                job_params["percent"] = job.percent
+            estimated_size += self._estimate_size(
+                job_params,
+                animation_range[0] if job.start_frame is None else job.start_frame,
+                animation_range[1] if job.end_frame is None else job.end_frame,
+            )
+        # refuse the whole batch rather than failing halfway
+        self._preflight(estimated_size)
+        outputs = [
+            (job, shot_playblast_path, self._new_take(shot_playblast_path))
+            for job, shot_playblast_path in outputs
+        ]
+        if self.__create_version:
+            for _, shot_playblast_path, _ in outputs:
+                self.prefetch_version(os.path.basename(shot_playblast_path))
+        rendered = []
+        cancelled = False
+        with self._create_window(camera=jobs[0].camera) as model_editor:
+            visible_huds = []
+            try:
+                visible_huds = self._app.execute_hook_method("hook_setup_window", "set_hud")
+                for job, shot_playblast_path, local_playblast_path in outputs:
+                    # only the camera changes between renders
+                    self.editor_pool.set_camera(model_editor, job.camera)
+                    playblast_params = dict(base_params)
+                    playblast_params.update(
+                        filename=local_playblast_path,
+                        editorPanelName=model_editor,
+                        startTime=animation_range[0] if job.start_frame is None else job.start_frame,
+                        endTime=animation_range[1] if job.end_frame is None else job.end_frame,
+                    )
+                    if job.percent:
+                        playblast_params["percent"] = job.percent
+                    self._app.logger.debug(pprint.pformat(playblast_params))
+                    expected = self._expected_output(playblast_params)
+                    try:
+                        self._render(playblast_params)
+                    except PlayblastCancelled:
+                        # nothing of the batch is published
+                        self._app.logger.info("Batch playblast of %s cancelled", scene_name)
+                        cancelled = True
+                        del rendered[:]
+                        break
+                    except RuntimeError:
+                        # a movie written despite the error is only trusted once checked
+                        if not os.path.exists(local_playblast_path) or not self._frame_qc_enabled():
+                            self._app.logger.error("Playblast of %s failed", job.camera, exc_info=True)
+                            continue
+                        self._app.logger.warning(
+                            "Playblast of %s reported an error, the frame QC checks it", job.camera, exc_info=True
+                        )
+                    rendered.append((shot_playblast_path, local_playblast_path, expected))
+            finally:
+                self._app.execute_hook_method("hook_setup_window", "unset_huds", huds=visible_huds)
+                rendered_paths = set(local_playblast_path for _, local_playblast_path, _ in rendered)
+                for _, _, local_playblast_path in outputs:
+                    if local_playblast_path not in rendered_paths:
+                        self.take_store.discard(os.path.dirname(local_playblast_path))
+
+        if cancelled:
+            return []
+        self._app.logger.info("Batch playblast of %s: %d of %d rendered", scene_name, len(rendered), len(jobs))
+        for shot_playblast_path, local_playblast_path, expected in rendered:
+            self._submit_publish(shot_playblast_path, local_playblast_path, expected)
+        return [local_playblast_path for _, local_playblast_path, _ in rendered]
+
+    def do_farm_playblast(self, camera=None, workers=None, percent=100):
+        """
+        Render the animation range of the saved scene with a pool of
+        off-screen mayapy processes, without any dialog, then encode the
+        frames and publish the movie like a regular playblast.
+
+        :param camera: camera to render, the first matching the
+            "camera_name_pattern" setting by default.
+        :param workers: number of mayapy processes, the "farm_workers"
+            setting by default.
+        :returns: the local movie path
+        """
+        with self._exclusive():
+            self._app.progress.reset()
+            with self._app.tracer.span("farm_playblast", profile=True):
+                return self._farm_playblast(camera, workers, percent)
+
+    @contextmanager
+    def _exclusive(self):
+        """
+        :raises TankError: while another playblast is running
+        """
+        if self._busy:
+            raise sgtk.TankError("A playblast is already running")
+        self._busy = True
+        try:
+            yield
+        finally:
+            self._busy = False
+
+    def _farm_playblast(self, camera, workers, percent):
+        scene_name = cmds.file(query=True, sceneName=True)
+        if not scene_name or cmds.file(query=True, modified=True):
+            raise sgtk.TankError("The scene must be saved before a farm playblast, workers render the file on disk")
+        self._app.tracer.annotate(scene=scene_name)
+        shot_playblast_path = self.get_shot_playblast_path(scene_name)
+
+        camera = camera or self._find_camera()
+        width = int(cmds.getAttr("defaultResolution.width") * percent / 100.0)
+        height = int(cmds.getAttr("defaultResolution.height") * percent / 100.0)
+        start_frame, end_frame = SceneState(playback_range=True).capture().animation_range
+        self._preflight(take_store.estimate_playblast_size(
+            width, height, end_frame - start_frame + 1, image_sequence=True
+        ))
+        local_playblast_path = self._new_take(shot_playblast_path)
+        if self.__create_version:
+            self.prefetch_version(os.path.basename(shot_playblast_path))
+
+        name = os.path.splitext(os.path.basename(local_playblast_path))[0]
+        frame_directory = os.path.join(os.path.dirname(local_playblast_path), name + "_frames")
+        pattern = encoder.frame_pattern(frame_directory, name)
+        orchestrator = farm.FarmOrchestrator(
+            farm.MayapyWorker(scene_name, camera, width, height),
+            self._app.logger,
+            workers=workers or self._app.get_setting("farm_workers", 0),
         )
-        # get window and editor parameters from hook
-        with self._app.execute_hook_method("hook_setup_window", "create_window") as model_editor:
-            playblast_params.update(override_playblast_params)
-            playblast_params["editorPanelName"] = model_editor
-            self._app.logger.debug(pprint.pformat(playblast_params))
-            playblast_successful = False
-            while not playblast_successful:
-                visible_huds = []
-                try:
-                    # set required visible_huds from hook
-                    visible_huds = self._app.execute_hook_method("hook_setup_window", "set_hud")
+        tracer = self._app.tracer
+        rendering = threading.Event()
+        rendering.set()
 
-                    pm.playblast(**playblast_params)
-                    playblast_successful = True
-                except RuntimeError as error:
-                    if os.path.exists(local_playblast_path):
-                        playblast_successful = True
-                    else:
-                        result = QtGui.QMessageBox.critical(
-                            None,
-                            u"Playblast Error",
-                            unicode(error),
-                            QtGui.QMessageBox.Retry | QtGui.QMessageBox.Abort
-                       )
-                        if result == QtGui.QMessageBox.Abort:
-                            self._app.logger.exception("Playblast aborted")
-                            return
+        def watch_cancel():
+            while rendering.is_set():
+                if self._app.progress.wait_cancelled(INTERVAL):
+                    orchestrator.cancel()
+                    return
+
+        watcher = threading.Thread(target=watch_cancel, name="PlayblastFarmCancel")
+        watcher.daemon = True
+        try:
+            with tracer.span("render", frames=int(end_frame - start_frame + 1)):
+                watcher.start()
+                try:
+                    orchestrator.render(start_frame, end_frame, pattern)
+                except farm.FarmError:
+                    # killed workers fail, report the cancel instead
+                    self._app.progress.check()
+                    raise
                 finally:
-                    # restore HUD state
-                    self._app.execute_hook_method("hook_setup_window", "unset_huds", huds=visible_huds)
-                    # restore playback range
-                    original_min_time, original_max_time = original_playback_range
-                    pm.playbackOptions(edit=True, minTime=original_min_time, maxTime=original_max_time)
+                    rendering.clear()
+            self._app.progress.check()
+            # the same sound as a playblast of the scene, workers only draw frames
+            playblast_params = self._app.execute_hook_method(
+                "hook_setup_window",
+                "get_playblast_params",
+                filename=local_playblast_path
+            )
+            self._encode(pattern, start_frame, local_playblast_path, sound=playblast_params.get("sound"))
+        except BaseException:
+            self.take_store.discard(os.path.dirname(local_playblast_path))
+            raise
+        finally:
+            shutil.rmtree(frame_directory, ignore_errors=True)
+        self._app.logger.info("Farm playblast for %s succesful", scene_name)
 
-        # do post playblast process, copy files and other necessary stuff
-        result = self._app.execute_hook_method("hook_post_playblast", "copy_file", source=local_playblast_path)
+        expected = {
+            "first_frame": int(start_frame),
+            "frames": int(end_frame - start_frame + 1),
+            "resolution": [width, height],
+        }
+        self._submit_publish(shot_playblast_path, local_playblast_path, expected)
+        return local_playblast_path
 
-        if result:
-            self._app.logger.info("Playblast local file created: %s", result)
+    @property
+    def frame_cache(self):
+        if self._frame_cache is None:
+            self._frame_cache = frame_cache.FrameCache(
+                os.path.join(self._get_temp_directory(), "tk-maya-playblast-frames"),
+                max_bytes=self._app.get_setting("frame_cache_size", 10) * frame_cache.GIGABYTE,
+            )
+        return self._frame_cache
+
+    @property
+    def take_store(self):
+        if self._take_store is None:
+            self._take_store = take_store.TakeStore(
+                os.path.join(self._get_temp_directory(), "tk-maya-playblast-takes"),
+                max_bytes=self._app.get_setting("temp_store_quota", 20) * take_store.GIGABYTE,
+                logger=self._app.logger,
+            )
+        return self._take_store
+
+    def _new_take(self, shot_playblast_path):
+        """
+        Local path of a new take of the shot movie, in a directory of its own.
+        """
+        return self.take_store.create(os.path.basename(shot_playblast_path)).path
+
+    def _estimate_size(self, playblast_params, start_frame, end_frame):
+        percent = playblast_params.get("percent", 100) / 100.0
+        pipelined = self._app.get_setting("pipelined_encode", False) and not self._app.get_setting(
+            "incremental_playblast", False
+        )
+        return take_store.estimate_playblast_size(
+            cmds.getAttr("defaultResolution.width") * percent,
+            cmds.getAttr("defaultResolution.height") * percent,
+            end_frame - start_frame + 1,
+            quality=playblast_params.get("quality", 70),
+            image_sequence=pipelined,
+            proxy_scale=self._app.get_setting("proxy_scale", 50) if pipelined else 0,
+        )
+
+    def _preflight(self, estimated_size):
+        """
+        Make room in the take store for estimated_size bytes, refusing to
+        render when the disk is too full.
+        """
+        with self._app.tracer.span("preflight", estimated_bytes=estimated_size):
+            self.take_store.preflight(estimated_size)
+
+    def _render(self, playblast_params):
+        start_frame = playblast_params.get("startTime")
+        if start_frame is None:
+            start_frame = cmds.playbackOptions(query=True, minTime=True)
+        end_frame = playblast_params.get("endTime")
+        if end_frame is None:
+            end_frame = cmds.playbackOptions(query=True, maxTime=True)
+        filename = playblast_params.get("filename")
+        if filename and os.path.exists(self._proxy_path(filename)):
+            # from a previous playblast, it would be published with this one
+            os.remove(self._proxy_path(filename))
+        incremental = self._app.get_setting("incremental_playblast", False)
+        pipelined = not incremental and self._app.get_setting("pipelined_encode", False)
+        progress = self._app.progress
+        progress.check()
+        progress.start_render(end_frame - start_frame + 1)
+        with self._app.tracer.span(
+            "render", frames=int(end_frame - start_frame + 1), incremental=incremental, pipelined=pipelined
+        ) as span:
+            with self._culled(playblast_params, start_frame, end_frame), self._timed_frames(playblast_params, span):
+                if incremental:
+                    self._render_incremental(playblast_params)
+                elif pipelined:
+                    self._render_pipelined(playblast_params, start_frame, end_frame)
+                else:
+                    self._playblast(playblast_params)
+            if filename and os.path.isfile(filename):
+                span.set(bytes_written=os.path.getsize(filename))
+
+    @contextmanager
+    def _timed_frames(self, playblast_params, span):
+        """
+        Log the time Maya spends evaluating and drawing each frame, to tell
+        which one a shot is bound by.
+        """
+        editor = playblast_params.get("editorPanelName")
+        if not editor:
+            yield
+            return
+        timer = evaluation.FrameTimer(editor)
+        try:
+            timer.__enter__()
+        except Exception:
+            # the frame times are only logged, the playblast goes on without
+            self._app.logger.warning("Unable to time the frames drawn by %s", editor, exc_info=True)
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                timer.__exit__(None, None, None)
+            except Exception:
+                self._app.logger.warning("Unable to remove the frame timer callbacks", exc_info=True)
+        for frame, evaluation_time, draw_time in timer.frames:
+            self._app.logger.debug(
+                "Frame %s: evaluation %.1f ms, draw %.1f ms", frame, 1000.0 * evaluation_time, 1000.0 * draw_time
+            )
+        summary = timer.summary()
+        if summary:
+            span.set(**summary)
+            self._app.logger.info(
+                "%d frames, %.1f ms evaluating and %.1f ms drawing a frame, slowest %.1f ms and %.1f ms",
+                summary["frames"],
+                summary["evaluation_ms"],
+                summary["draw_ms"],
+                summary["evaluation_max_ms"],
+                summary["draw_max_ms"],
+            )
+
+    @contextmanager
+    def _culled(self, playblast_params, start_frame, end_frame):
+        """
+        With the "fast_playblast" setting, hide the shapes the camera of the
+        editor never sees over the range while rendering.
+        """
+        editor = playblast_params.get("editorPanelName")
+        if not self._app.get_setting("fast_playblast", False) or not editor:
+            yield
+            return
+        if not optional.numpy_available():
+            self._app.logger.warning("NumPy isn't available, the fast playblast draws the whole scene")
+            yield
+            return
+        camera = cmds.modelEditor(editor, query=True, camera=True)
+        with self._app.tracer.span("cull", camera=camera) as span:
+            store = culling.MayaCullingStore(camera, start_frame, end_frame)
+            override = culling.CullingOverride(store, margin=self._app.get_setting("fast_playblast_margin", 0.1))
+            try:
+                hidden = override.apply()
+            except ImportError:
+                # eg. built for another python than Maya's
+                self._app.logger.warning(
+                    "NumPy can't be imported, the fast playblast draws the whole scene", exc_info=True
+                )
+                hidden = None
+            except culling.UnsupportedCamera as error:
+                self._app.logger.warning("%s uses %s, the fast playblast draws the whole scene", camera, error)
+                hidden = None
+            span.set(shapes=len(store), hidden=hidden)
+        if hidden is None:
+            yield
+            return
+        self._app.logger.info("Fast playblast: %d of %d shapes hidden, never seen by %s", hidden, len(store), camera)
+        try:
+            yield
+        finally:
+            override.restore()
+
+    def _render_pipelined(self, playblast_params, start_frame, end_frame):
+        """
+        Render an image sequence, encoded by ffmpeg into the movie and its
+        proxy while Maya renders the following frames.
+        """
+        filename = playblast_params["filename"]
+        renditions = [encoder.Rendition(filename)]
+        proxy_scale = self._app.get_setting("proxy_scale", 50)
+        if proxy_scale:
+            renditions.append(encoder.Rendition(self._proxy_path(filename), scale=proxy_scale / 100.0))
+        frame_rate = mel.eval("currentTimeUnitToFPS")
+
+        work_directory = tempfile.mkdtemp(prefix="playblast_", dir=os.path.dirname(playblast_params["filename"]))
+        try:
+            render_name = os.path.join(work_directory, "render")
+            render_params = dict(playblast_params)
+            sound = render_params.pop("sound", None)
+            render_params.update(
+                format="image",
+                compression=encoder.IMAGE_FORMAT,
+                filename=render_name,
+                framePadding=encoder.FRAME_PADDING,
+                viewer=False,
+                forceOverwrite=True,
+            )
+            audio = self._audio(sound, start_frame, frame_rate)
+            stream = encoder.StreamingEncoder(
+                encoder.frame_pattern(work_directory, "render"),
+                start_frame,
+                end_frame,
+                renditions,
+                frame_rate=frame_rate,
+                ffmpeg=self._app.get_setting("ffmpeg_executable", encoder.FFMPEG),
+                python=farm.mayapy_executable(),
+                audio=audio,
+                logger=self._app.logger,
+            ).start()
+            try:
+                self._playblast(render_params, start_frame, end_frame)
+            except BaseException:
+                stream.abort()
+                raise
+            with self._app.tracer.span("encode_tail"):
+                # only the frames rendered last are left to encode
+                stream.finish()
+        finally:
+            shutil.rmtree(work_directory, ignore_errors=True)
+
+    def _expected_output(self, playblast_params):
+        """
+        Frames and resolution of the movie, for the frame QC.
+        """
+        start_frame = playblast_params.get("startTime")
+        if start_frame is None:
+            start_frame = cmds.playbackOptions(query=True, minTime=True)
+        end_frame = playblast_params.get("endTime")
+        if end_frame is None:
+            end_frame = cmds.playbackOptions(query=True, maxTime=True)
+        width, height = playblast_params.get("widthHeight") or (
+            cmds.getAttr("defaultResolution.width"), cmds.getAttr("defaultResolution.height")
+        )
+        percent = playblast_params.get("percent", 100) / 100.0
+        return {
+            "first_frame": int(start_frame),
+            "frames": int(end_frame - start_frame + 1),
+            "resolution": [int(width * percent), int(height * percent)],
+        }
 
+    def _frame_qc_enabled(self):
+        return self._app.get_setting("frame_qc", False)
+
+    def _playblast(self, playblast_params, start_frame=None, end_frame=None):
+        """
+        cmds.playblast counting the frames as they are drawn. An image
+        sequence from start_frame to end_frame is rendered in chunks, a
+        cancel stops it after the current one. A movie is a single render,
+        its cancel applies once Maya wrote it.
+
+        :raises PlayblastCancelled: when the playblast was cancelled
+        """
+        progress = self._app.progress
+        with self._count_frames():
+            if start_frame is None or playblast_params.get("format") != "image":
+                cmds.playblast(**playblast_params)
+            else:
+                start_frame, end_frame = int(start_frame), int(end_frame)
+                for first in range(start_frame, end_frame + 1, CANCEL_CHUNK_FRAMES):
+                    progress.check()
+                    cmds.playblast(**dict(
+                        playblast_params, startTime=first, endTime=min(end_frame, first + CANCEL_CHUNK_FRAMES - 1)
+                    ))
+        progress.check()
+
+    @contextmanager
+    def _count_frames(self):
+        import maya.api.OpenMaya as om
+
+        progress = self._app.progress
+        processed = [time.time()]
+
+        def frame_drawn(*args):
+            # the playblast changes the time once per frame
+            progress.frame_rendered()
+            now = time.time()
+            if now - processed[0] >= INTERVAL:
+                processed[0] = now
+                # keeps the dialog drawing progress and taking the cancel
+                QtCore.QCoreApplication.processEvents()
+
+        callback = om.MDGMessage.addTimeChangeCallback(frame_drawn)
+        try:
+            with progress.restrict_input():
+                yield
+        finally:
+            om.MMessage.removeCallback(callback)
+
+    def cancel(self):
+        """
+        Stop the running playblast, nothing of it is published.
+        """
+        self._app.logger.info("Cancelling the playblast")
+        self._app.progress.cancel()
+
+    @staticmethod
+    def _proxy_path(movie):
+        root, extension = os.path.splitext(movie)
+        return root + PROXY_SUFFIX + extension
+
+    def _encode(self, pattern, start_frame, output, sound=None):
+        frame_rate = mel.eval("currentTimeUnitToFPS")
+        with self._app.tracer.span("encode") as span:
+            encoder.encode_image_sequence(
+                pattern,
+                start_frame,
+                output,
+                frame_rate=frame_rate,
+                ffmpeg=self._app.get_setting("ffmpeg_executable", encoder.FFMPEG),
+                audio=self._audio(sound, start_frame, frame_rate),
+                logger=self._app.logger,
+            )
+            span.set(bytes_written=os.path.getsize(output))
+
+    @staticmethod
+    def _audio(sound, start_frame, frame_rate):
+        """
+        The (path, delay) of the audio node sound for the encoder, None
+        without sound.
+        """
+        if not sound:
+            return None
+        # where the sound starts, relative to the first frame
+        offset = cmds.getAttr(sound + ".offset")
+        return (cmds.getAttr(sound + ".filename"), (offset - start_frame) / frame_rate)
+
+    @contextmanager
+    def _create_window(self, **kwargs):
+        """
+        The create_window hook context, with its setup and teardown timed.
+        """
+        tracer = self._app.tracer
+        window = self._app.execute_hook_method("hook_setup_window", "create_window", **kwargs)
+        with tracer.span("window_setup"):
+            model_editor = window.__enter__()
+        try:
+            yield model_editor
+        except Exception:
+            exc_info = sys.exc_info()
+            with tracer.span("window_teardown"):
+                suppressed = window.__exit__(*exc_info)
+            # the hook may handle the error, like a plain with statement
+            if not suppressed:
+                raise
+        else:
+            with tracer.span("window_teardown"):
+                window.__exit__(None, None, None)
+
+    def _render_incremental(self, playblast_params):
+        """
+        Only render the frames whose fingerprint isn't in the frame cache,
+        then encode the movie from the cached frames.
+        """
+        start_frame = int(playblast_params.get("startTime", cmds.playbackOptions(query=True, minTime=True)))
+        end_frame = int(playblast_params.get("endTime", cmds.playbackOptions(query=True, maxTime=True)))
+        frames = list(range(start_frame, end_frame + 1))
+        camera = cmds.modelEditor(playblast_params["editorPanelName"], query=True, camera=True)
+        static_inputs = {
+            "model_editor_parameters": self._app.model_editor_parameters,
+            "playblast_parameters": dict(
+                (key, value) for key, value in playblast_params.items()
+                if key not in ("filename", "editorPanelName", "startTime", "endTime")
+            ),
+            "resolution": (cmds.getAttr("defaultResolution.width"), cmds.getAttr("defaultResolution.height")),
+            "scene": cmds.file(query=True, sceneName=True),
+        }
+        fingerprints = frame_cache.scene_fingerprints(frames, camera, static_inputs)
+        cache = self.frame_cache
+        dirty = frame_cache.dirty_ranges(frames, fingerprints, cache)
+        dirty_frames = sum(last - first + 1 for first, last in dirty)
+        self._app.logger.info("Incremental playblast: rendering %d of %d frames", dirty_frames, len(frames))
+        self._app.progress.start_render(dirty_frames)
+
+        work_directory = tempfile.mkdtemp(prefix="playblast_", dir=os.path.dirname(playblast_params["filename"]))
+        try:
+            render_name = os.path.join(work_directory, "render")
+            for first, last in dirty:
+                render_params = dict(playblast_params)
+                render_params.pop("sound", None)
+                render_params.update(
+                    format="image",
+                    compression="png",
+                    filename=render_name,
+                    startTime=first,
+                    endTime=last,
+                    framePadding=encoder.FRAME_PADDING,
+                    viewer=False,
+                    forceOverwrite=True,
+                )
+                self._playblast(render_params, first, last)
+                pattern = encoder.frame_pattern(work_directory, "render")
+                for frame in range(first, last + 1):
+                    cache.put(fingerprints[frame], pattern % frame)
+
+            pattern = encoder.frame_pattern(work_directory, "movie")
+            cache.assemble([fingerprints[frame] for frame in frames], pattern, start_frame)
+            self._encode(pattern, start_frame, playblast_params["filename"], sound=playblast_params.get("sound"))
+        finally:
+            shutil.rmtree(work_directory, ignore_errors=True)
+        cache.evict()
+
+    def _find_camera(self):
+        pattern = re.compile(self._app.get_setting("camera_name_pattern", "persp"))
+        for camera in cmds.ls(type="camera", long=True):
+            transform = cmds.listRelatives(camera, parent=True)[0]
+            if pattern.match(transform):
+                return transform
+        raise sgtk.TankError("No camera matches %s" % pattern.pattern)
+
+    def prefetch_version(self, code):
+        """
+        Start looking up the Version named code in the background.
+        """
+        def find_version():
+            # tk.shotgun gives a connection per thread
+            return self._app.shotgun.find_one("Version", [["code", "is", code]])
+
+        return self.shotgun_cache.prefetch(("Version", code), find_version)
+
+    def _get_temp_directory(self):
+        return self._app.get_temp_directory()
+
+    def shutdown(self):
+        self.editor_pool.shutdown()
+        if self._publish_pipeline is not None:
+            # left for the next session, their completed stages are skipped
+            for job in self._publish_pipeline.pending_jobs:
+                if job.job_id is not None:
+                    self.job_queue.release(job.job_id)
+            self._publish_pipeline.shutdown()
+            self._publish_pipeline = None
+
+    def _create_playblast(self, shot_playblast_path, local_playblast_path, override_playblast_params):
+
+        # setting playback range, restored once done
+        with SceneState(playback_range=True) as playback_state:
+            playback_state.apply(playback_range=playback_state.animation_range, current=playback_state)
+
+            # get playblast parameters from hook
+            playblast_params = self._app.execute_hook_method(
+                "hook_setup_window",
+                "get_playblast_params",
+                filename=local_playblast_path
+            )
+            playblast_params.update(override_playblast_params)
+            # fail before rendering when the disk is too full
+            self._preflight(self._estimate_size(playblast_params, *playback_state.animation_range))
+            expected = self._expected_output(playblast_params)
+            # get window and editor parameters from hook
+            with self._create_window() as model_editor:
+                playblast_params["editorPanelName"] = model_editor
+                self._app.logger.debug(pprint.pformat(playblast_params))
+                playblast_successful = False
+                while not playblast_successful:
+                    visible_huds = []
+                    try:
+                        # set required visible_huds from hook
+                        visible_huds = self._app.execute_hook_method("hook_setup_window", "set_hud")
+
+                        self._render(playblast_params)
+                        playblast_successful = True
+                    except PlayblastCancelled:
+                        self._app.logger.info("Playblast cancelled")
+                        return False
+                    except (RuntimeError, EnvironmentError) as error:
+                        # Maya, ffmpeg (EncodeError) or the disk
+                        written = os.path.exists(local_playblast_path)
+                        if written and self._frame_qc_enabled():
+                            # the frame QC checks the movie before it is published
+                            self._app.logger.warning("Playblast reported an error: %s", error)
+                            playblast_successful = True
+                        else:
+                            buttons = QtGui.QMessageBox.Retry | QtGui.QMessageBox.Abort
+                            if written:
+                                # the movie may be truncated, the artist decides
+                                buttons |= QtGui.QMessageBox.Ignore
+                            result = QtGui.QMessageBox.critical(
+                                None,
+                                u"Playblast Error",
+                                u"%s" % error,
+                                buttons
+                           )
+                            if result == QtGui.QMessageBox.Abort:
+                                self._app.logger.exception("Playblast aborted")
+                                return False
+                            playblast_successful = result == QtGui.QMessageBox.Ignore
+                    finally:
+                        # restore HUD state
+                        self._app.execute_hook_method("hook_setup_window", "unset_huds", huds=visible_huds)
+
+        # launch the viewer from the local file, it doesn't need the publish
         if self.__show_viewer:
             self._app.logger.info("Opening RV...")
-            subprocess.call(["rez", "env" , "rv", "--", "rv", str(local_playblast_path)])
+            self._viewer.show(local_playblast_path)
+
+        # do post playblast process, copy files and other necessary stuff in the background
+        self._submit_publish(shot_playblast_path, local_playblast_path, expected)
+        return True
+
+    @property
+    def publish_pipeline(self):
+        if self._publish_pipeline is None:
+            self._publish_pipeline = PublishPipeline(
+                self._app.logger,
+                workers=self._app.get_setting("publish_threads", 2),
+                queue_size=self._app.get_setting("publish_queue_size", 4),
+            )
+            self._publish_pipeline.job_finished.connect(self._on_publish_finished)
+        return self._publish_pipeline
+
+    def _on_publish_finished(self, job_name, successful):
+        if successful:
+            self._app.logger.info("Playblast finished")
+        else:
+            self._app.logger.error("Playblast publish of %s did not complete", job_name)
+
+    @property
+    def job_queue(self):
+        if self._job_queue is None:
+            self._job_queue = job_queue.JobQueue(
+                os.path.join(self._get_temp_directory(), job_queue.JOBS_FILENAME)
+            )
+            self._job_queue.purge(job_queue.KEEP_FINISHED)
+        return self._job_queue
+
+    def _submit_publish(self, shot_playblast_path, local_playblast_path, expected=None):
+        """
+        Queue the post playblast stages of a rendered movie and start them.
+        expected are the frames and resolution the frame QC checks.
+        """
+        spec = self._publish_spec(shot_playblast_path, local_playblast_path, expected)
+        job_id = None
+        try:
+            job_id = self.job_queue.add(os.path.basename(shot_playblast_path), spec)
+        except Exception:
+            # still publish, it won't be resumed if Maya exits before it is done
+            self._app.logger.warning("Unable to queue the publish of %s", shot_playblast_path, exc_info=True)
+        self.publish_pipeline.submit(self._build_publish_job(spec, job_id))
 
+    def _publish_spec(self, shot_playblast_path, local_playblast_path, expected=None):
+        """
+        Everything the post playblast stages need, read from Maya and the
+        context here, on the main thread. It is stored in the job queue.
+        """
+        proxy_path = self._proxy_path(local_playblast_path)
+        spec = {
+            "shot_path": shot_playblast_path,
+            "local_path": local_playblast_path,
+            "proxy_path": proxy_path if os.path.exists(proxy_path) else None,
+            "scene_name": cmds.file(query=True, sceneName=True),
+            "destinations": None,
+            "version": None,
+            "upload": False,
+            "qc": expected if self._frame_qc_enabled() else None,
+            "sequence": None,
+        }
+        # resolved now, a resumed job copies to the same places
+        spec["destinations"] = self._app.execute_hook_method(
+            "hook_post_playblast", "get_destinations", scene_name=spec["scene_name"]
+        )
+        template_sequence_movie = self._app.get_template("template_sequence_movie")
+        if template_sequence_movie:
+            fields = self._app.get_template("template_work").get_fields(spec["scene_name"])
+            entity = self._app.context.entity or {}
+            spec["sequence"] = {
+                "path": template_sequence_movie.apply_fields(fields),
+                "shot": fields.get("Shot") or os.path.splitext(os.path.basename(shot_playblast_path))[0],
+                "shot_id": entity.get("id") if entity.get("type") == "Shot" else None,
+            }
         if self.__create_version:
             # register new Version entity in shotgun or update existing version, minimize shotgun data
-            playblast_movie = shot_playblast_path
-            project = self._app.context.project
-            entity = self._app.context.entity
-            task = self._app.context.task
-
-            data = {
-                "project": project,
-                "code": os.path.basename(playblast_movie),
+            spec["version"] = {
+                "project": self._app.context.project,
+                "code": os.path.basename(shot_playblast_path),
                 "description": "automatic generated by playblast app",
-                "sg_path_to_movie": playblast_movie,
-                "entity": entity,
-                "sg_task": task,
+                "sg_path_to_movie": shot_playblast_path,
+                "entity": self._app.context.entity,
+                "sg_task": self._app.context.task,
             }
-            self._app.logger.debug("Version-creation hook data:\n%s", pprint.pformat(data))
-            result = self._app.execute_hook_method("hook_post_playblast", "create_version", data=data)
-            self._app.logger.debug("Version-creation hook result:\n%s", pprint.pformat(result))
-
-            # upload QT file if creation or update process run succesfully
-            if result and self.__upload_to_shotgun:
-                result = self._app.execute_hook_method(
-                    "hook_post_playblast",
-                    "upload_movie",
-                    data={
-                        "path": data["sg_path_to_movie"],
-                        "project": project,
-                        "version_id": result["id"],
+            spec["upload"] = self.__upload_to_shotgun
+        return spec
+
+    def _build_publish_job(self, spec, job_id=None, completed=None):
+        """
+        The post playblast stages of a spec, without Maya. completed maps
+        the stages already done, when resuming a job, to their results.
+        """
+        app = self._app
+        completed = completed or {}
+        job = PublishJob(os.path.basename(spec["shot_path"]), job_id=job_id, on_finished=self._on_job_done)
+        # stages run on worker threads, they join the trace of the playblast
+        trace = app.tracer.current_trace()
+
+        def add_stage(name, func, depends_on=()):
+            if name in completed:
+                job.add_stage(name, lambda inputs: completed[name], depends_on=depends_on)
+                return
+
+            def traced(inputs):
+                with app.tracer.span(name, trace=trace, profile=True, job=job.name):
+                    try:
+                        with app.progress.stage(job.name, name):
+                            result = func(inputs)
+                    except Exception as error:
+                        self._record_stage(job_id, name, error=error)
+                        raise
+                self._record_stage(job_id, name, result=result)
+                return result
+
+            job.add_stage(name, traced, depends_on=depends_on)
+
+        local_playblast_path = spec["local_path"]
+        take_directory = os.path.dirname(local_playblast_path)
+        # nothing is copied or uploaded before the frames are checked
+        checked = ()
+        if spec.get("qc"):
+            add_stage("frame_qc", lambda inputs: self._check_frames(job.name, local_playblast_path, spec["qc"]))
+            checked = ("frame_qc",)
+
+        copy_kwargs = {}
+        if spec["proxy_path"] and os.path.exists(spec["proxy_path"]):
+            copy_kwargs["renditions"] = {PROXY_SUFFIX: spec["proxy_path"]}
+
+        def copy_file(inputs):
+            if not os.path.exists(local_playblast_path):
+                raise RuntimeError("The local playblast %s is gone" % local_playblast_path)
+            result = app.execute_hook_method(
+                "hook_post_playblast",
+                "copy_file",
+                source=local_playblast_path,
+                scene_name=spec["scene_name"],
+                destinations=spec.get("destinations"),
+                **copy_kwargs
+            )
+            if not result:
+                # recorded as done otherwise, and never copied again
+                raise RuntimeError("Unable to copy %s" % local_playblast_path)
+            app.logger.info("Playblast local file created: %s", result)
+            return result
+
+        add_stage("copy_file", copy_file, depends_on=checked)
+
+        data = spec["version"]
+        if data:
+            version_key = ("Version", data["code"])
+            version_lookup = None
+            if "create_version" not in completed:
+                version_lookup = self.prefetch_version(data["code"])
+
+            def create_version(inputs):
+                # the hook fills the description in
+                version_data = dict(data)
+                app.logger.debug("Version-creation hook data:\n%s", pprint.pformat(version_data))
+                result = app.execute_hook_method(
+                    "hook_post_playblast", "create_version", data=version_data, lookup=version_lookup
+                )
+                app.logger.debug("Version-creation hook result:\n%s", pprint.pformat(result))
+                if not result:
+                    self.shotgun_cache.invalidate(version_key)
+                    raise RuntimeError("Unable to create Version %s" % data["code"])
+                # the next playblast of this shot updates it without a lookup
+                self.shotgun_cache.set(version_key, {"type": "Version", "id": result["id"]})
+                return result
+
+            # the sequence copy and the Version creation don't depend on each other
+            add_stage("create_version", create_version, depends_on=checked)
+
+            if spec["upload"]:
+                # upload QT file if creation or update process run succesfully
+                def upload_movie(inputs):
+                    movie = data["sg_path_to_movie"]
+                    upload_data = {
+                        "path": movie,
+                        "project": data["project"],
+                        "version_id": inputs["create_version"]["id"],
                     }
+                    if os.path.exists(movie):
+                        # known from the copy, the movie isn't read again
+                        upload_data["checksum"] = app.fingerprint_index.checksum(movie)
+                    result = app.execute_hook_method("hook_post_playblast", "upload_movie", data=upload_data)
+                    if not result:
+                        raise RuntimeError("Unable to upload %s" % movie)
+                    return result
+
+                # the movie is uploaded from its copy on the main storage
+                add_stage("upload_movie", upload_movie, depends_on=("copy_file", "create_version"))
+
+        if spec.get("sequence"):
+            add_stage(
+                "assemble_sequence",
+                lambda inputs: self._assemble_sequence(spec["shot_path"], spec["sequence"]),
+                depends_on=("copy_file",),
+            )
+
+        def mark_published(inputs):
+            # the local movie may be the only one until every copy is verified
+            copied = inputs["copy_file"]
+            destinations = spec.get("destinations") or (copied if isinstance(copied, list) else [])
+            verified = set(os.path.normpath(path) for path in copied) if isinstance(copied, list) else set()
+            missing = [
+                path for path in destinations
+                if os.path.normpath(path) not in verified or not os.path.isfile(path)
+            ]
+            if not destinations or missing:
+                raise RuntimeError(
+                    "The copies of %s aren't verified, %s is kept" % (job.name, ", ".join(missing) or "the take")
                 )
+            return self.take_store.mark_published(take_directory)
+
+        # the take may be evicted once its copies are on the main storage,
+        # the Version, upload and sequence movie are made from those
+        add_stage("mark_published", mark_published, depends_on=("copy_file",) + checked)
+        return job
+
+    def _check_frames(self, job_name, movie, expected):
+        """
+        The frame QC stage, failing when the movie is broken and the
+        "frame_qc_policy" setting is abort.
+        """
+        app = self._app
+        if not optional.numpy_available():
+            app.logger.warning("NumPy isn't available, the frames of %s aren't checked", job_name)
+            return None
+        try:
+            report = frame_qc.check_movie(
+                movie,
+                expected_frames=expected["frames"],
+                expected_resolution=expected["resolution"],
+                max_frozen=app.get_setting("frame_qc_max_frozen", 0),
+                first_frame=expected["first_frame"],
+                ffmpeg=app.get_setting("ffmpeg_executable", encoder.FFMPEG),
+            )
+        except OSError:
+            app.logger.warning("Unable to run ffmpeg, the frames of %s aren't checked", job_name, exc_info=True)
+            return None
+        except ImportError:
+            app.logger.warning("NumPy can't be imported, the frames of %s aren't checked", job_name, exc_info=True)
+            return None
+        except frame_qc.FrameQCError as error:
+            # a movie which can't be decoded is broken
+            report = frame_qc.QCReport(movie)
+            report.problems.append(str(error))
+        app.tracer.annotate(qc_passed=report.passed, **report.as_dict())
+        if report.passed:
+            app.logger.info("Frame QC of %s: %s", job_name, report)
+            return report.as_dict()
+        if app.get_setting("frame_qc_policy", frame_qc.ABORT) == frame_qc.ABORT:
+            # kept for the artist to look at, until it is evicted
+            self.take_store.mark_rejected(os.path.dirname(movie))
+            raise frame_qc.FrameQCError("Frame QC failed: %s" % report)
+        app.logger.warning("Frame QC of %s failed, publishing anyway: %s", job_name, report)
+        return report.as_dict()
+
+    def _assemble_sequence(self, movie, target):
+        """
+        The sequence movie stage, the shot movie replaces its segment of the
+        sequence movie without encoding anything.
+        """
+        app = self._app
+        if not os.path.exists(movie):
+            raise RuntimeError("The shot movie %s is gone" % movie)
+        order = None
+        order_field = app.get_setting("sequence_order_field", "sg_cut_order")
+        if target["shot_id"] and order_field:
+            try:
+                shot = app.shotgun.find_one("Shot", [["id", "is", target["shot_id"]]], [order_field])
+                order = shot.get(order_field) if shot else None
+            except Exception:
+                # sorted by name
+                app.logger.debug("Unable to read the %s of the shot", order_field, exc_info=True)
+        assembler = sequence.SequenceAssembler(
+            target["path"], ffmpeg=app.get_setting("ffmpeg_executable", encoder.FFMPEG), logger=app.logger
+        )
+        # known from the copy, the movie isn't read again
+        action = assembler.update(target["shot"], movie, app.fingerprint_index.checksum(movie), order=order)
+        app.tracer.annotate(segment=action, shots=len(assembler.shots()))
+        app.logger.info("Sequence movie %s updated, %s segment %s", target["path"], target["shot"], action)
+        return {"path": target["path"], "segment": action}
+
+    def _record_stage(self, job_id, stage, result=None, error=None):
+        if job_id is None:
+            return
+        try:
+            if error is None:
+                self.job_queue.stage_done(job_id, stage, result)
+            else:
+                self.job_queue.stage_failed(job_id, stage, error)
+        except Exception:
+            self._app.logger.warning("Unable to record publish stage %s in the job queue", stage, exc_info=True)
+
+    def _on_job_done(self, job):
+        if job.job_id is None:
+            return
+        errors = ["%s: %s" % (stage, error) for stage, error in job.errors.items()]
+        try:
+            self.job_queue.finish(job.job_id, job.successful, error="; ".join(errors) or None)
+        except Exception:
+            self._app.logger.warning("Unable to record the publish of %s in the job queue", job.name, exc_info=True)
+
+    def resume_publishes(self, wait=False, retry_failed=False):
+        """
+        Publish the playblasts left over by sessions which ended before their
+        publish completed, skipping the stages they did. Only takes of this
+        computer are resumed, the local movies are on its disk.
+
+        :param wait: block until they are published, eg. in a batch session
+        :param retry_failed: also publish again the jobs which failed, eg.
+            on a network error, from their failed stage
+        :returns: the number of jobs resumed
+        """
+        if retry_failed:
+            for job in self.job_queue.failed():
+                self.job_queue.retry(job.id)
+        return self._resume(self.job_queue.orphaned(), wait)
+
+    def retry_publish(self, job_id):
+        """
+        Publish a failed playblast again, from its failed stage.
+
+        :returns: True when it was queued again
+        """
+        if not self.job_queue.retry(job_id):
+            return False
+        return self._resume([self.job_queue.get(job_id)]) == 1
+
+    def _resume(self, jobs, wait=False):
+        jobs = [job for job in jobs if job is not None and self.job_queue.claim(job.id)]
+        if not jobs:
+            return 0
+        self._app.logger.info("Resuming the publish of %s", ", ".join(job.name for job in jobs))
+        pipeline = self.publish_pipeline
+
+        def submit():
+            for job in jobs:
+                pipeline.submit(self._build_publish_job(job.spec, job.id, job.completed_stages))
 
-        self._app.logger.info("Playblast finished")
+        if wait:
+            submit()
+            pipeline.join()
+        else:
+            # submit blocks while the pipeline is busy
+            thread = threading.Thread(target=submit, name="PlayblastResume")
+            thread.daemon = True
+            thread.start()
+        return len(jobs)
 
     def set_upload_to_shotgun(self, value):
         self._app.logger.debug("Upload to Shotgun set to %s", value)
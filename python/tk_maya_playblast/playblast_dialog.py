@@ -5,8 +5,12 @@ import sys
 import threading
 
 from sgtk.platform.qt import QtCore, QtGui
+from . import job_queue
+from . import take_store
 
 SCALE_OPTIONS = [50, 100]
+# jobs listed in the dialog
+JOB_LIST_SIZE = 10
 
 class PlayblastDialog(QtGui.QWidget):
     """
@@ -38,32 +42,50 @@ class PlayblastDialog(QtGui.QWidget):
 
         # lastly, set up our very basic UI
         # self.context.setText("Current Shot: %s" % self._app.context)
-        self.btn_playblast.clicked.connect(self.do_playblast)
+        self.btn_playblast.clicked.connect(self._on_playblast_clicked)
+        self.lst_jobs.itemDoubleClicked.connect(self._on_job_double_clicked)
+        progress = self._app.progress
+        progress.render_progress.connect(self._on_render_progress)
+        progress.stage_progress.connect(self._on_stage_progress)
+        # the Cancel button takes clicks while rendering
+        progress.allow_input(self)
+        pipeline = self._handler.publish_pipeline
+        pipeline.stage_started.connect(self._on_stage_started)
+        pipeline.stage_finished.connect(self._refresh_jobs)
+        pipeline.stage_failed.connect(self._on_stage_failed)
+        pipeline.job_finished.connect(self._on_job_finished)
 
     def _build_ui(self):
-        settings = sgtk.platform.import_framework("tk-framework-shotgunutils", "settings")
-        self._settings = settings.UserSettings(self._app)
+        # widgets start with default values, the user settings are loaded
+        # once the dialog is shown
+        self._settings = None
+        self._running = False
         self.resize(468, 67)
         layout = QtGui.QGridLayout(self)
         self.cmb_percentage = QtGui.QComboBox(self)
         layout.addWidget(self.cmb_percentage, 0, 0)
         self.chb_create_version = QtGui.QCheckBox("Create New Version", self)
-        version_checked = self._settings.retrieve("create_version", default=False)
-        self.chb_create_version.setChecked(version_checked)
         layout.addWidget(self.chb_create_version, 0, 1)
         self.chb_upload_to_shotgun = QtGui.QCheckBox("Upload to Shotgun", self)
-        upload_checked = self._settings.retrieve("upload_version", default=True)
-        self.chb_upload_to_shotgun.setChecked(upload_checked)
-        self.chb_upload_to_shotgun.setEnabled(version_checked)
+        self.chb_upload_to_shotgun.setChecked(True)
+        self.chb_upload_to_shotgun.setEnabled(False)
         self.chb_create_version.toggled.connect(self.chb_upload_to_shotgun.setEnabled)
         layout.addWidget(self.chb_upload_to_shotgun, 0, 2)
         self.chb_show_viewer = QtGui.QCheckBox("Show Viewer", self)
-        viewer_checked = self._settings.retrieve("show_viewer", default=True)
-        self.chb_show_viewer.setChecked(viewer_checked)
+        self.chb_show_viewer.setChecked(True)
         layout.addWidget(self.chb_show_viewer, 0, 3)
         self.btn_playblast = QtGui.QPushButton("Playblast", self)
         self.btn_playblast.setMinimumSize(450, 0)
         layout.addWidget(self.btn_playblast, 1, 0, 1, 4)
+        self.prg_render = QtGui.QProgressBar(self)
+        self.prg_render.setVisible(False)
+        layout.addWidget(self.prg_render, 2, 0, 1, 4)
+        self.lbl_status = QtGui.QLabel(self)
+        layout.addWidget(self.lbl_status, 3, 0, 1, 4)
+        self.lst_jobs = QtGui.QListWidget(self)
+        self.lst_jobs.setMaximumHeight(120)
+        self.lst_jobs.setToolTip("Double click a failed publish to retry it")
+        layout.addWidget(self.lst_jobs, 4, 0, 1, 4)
 
     def _init_components(self):
         # Setting up playblast resolution percentage. Customizable through
@@ -71,12 +93,57 @@ class PlayblastDialog(QtGui.QWidget):
         scale_int_list = self._app.get_setting("scale_options")
         for percent_int in sorted(scale_int_list, reverse=True):
             self.cmb_percentage.addItem("%d%%" % percent_int, userData=percent_int)
+        QtCore.QTimer.singleShot(0, self._load_settings)
+
+    def _load_settings(self):
+        settings = sgtk.platform.import_framework("tk-framework-shotgunutils", "settings")
+        self._settings = settings.UserSettings(self._app)
+        version_checked = self._settings.retrieve("create_version", default=False)
+        self.chb_create_version.setChecked(version_checked)
+        upload_checked = self._settings.retrieve("upload_version", default=True)
+        self.chb_upload_to_shotgun.setChecked(upload_checked)
+        self.chb_upload_to_shotgun.setEnabled(version_checked)
+        viewer_checked = self._settings.retrieve("show_viewer", default=True)
+        self.chb_show_viewer.setChecked(viewer_checked)
         setting_percent = self._settings.retrieve("percent_scale", default=100)
         index = self.cmb_percentage.findData(setting_percent)
         index = index if index > 0 else 0
         self.cmb_percentage.setCurrentIndex(index)
+        self._refresh_jobs()
+
+        # resolve the output and look its Version up ahead of the playblast
+        try:
+            shot_playblast_path = self._handler.get_shot_playblast_path()
+        except Exception:
+            self._app.logger.debug("Unable to resolve the playblast path", exc_info=True)
+            return
+        self.lbl_status.setText(os.path.basename(shot_playblast_path))
+        if version_checked:
+            self._handler.prefetch_version(os.path.basename(shot_playblast_path))
+
+    def _on_playblast_clicked(self):
+        if self._running:
+            self._handler.cancel()
+            self.btn_playblast.setEnabled(False)
+            self.btn_playblast.setText("Cancelling...")
+            return
+        self._running = True
+        self.btn_playblast.setText("Cancel")
+        self.prg_render.setValue(0)
+        self.prg_render.setVisible(True)
+        # let the button repaint before Maya is busy rendering
+        QtCore.QTimer.singleShot(0, self.do_playblast)
 
     def do_playblast(self):
+        try:
+            self._do_playblast()
+        finally:
+            self._running = False
+            self.btn_playblast.setEnabled(True)
+            self.btn_playblast.setText("Playblast")
+            self.prg_render.setVisible(False)
+
+    def _do_playblast(self):
         override_playblast_params = {}
 
         create_version = self.chb_create_version.isChecked()
@@ -90,9 +157,80 @@ class PlayblastDialog(QtGui.QWidget):
 
         percent_int = self.cmb_percentage.itemData(self.cmb_percentage.currentIndex())
         override_playblast_params["percent"] = percent_int
-        self._handler.do_playblast(**override_playblast_params)
+        try:
+            self._handler.do_playblast(**override_playblast_params)
+        except take_store.InsufficientSpaceError as error:
+            self._app.logger.error(str(error))
+            QtGui.QMessageBox.critical(self, "Not enough disk space", str(error))
+        except sgtk.TankError as error:
+            self._app.logger.error(str(error))
+            QtGui.QMessageBox.critical(self, "Playblast", str(error))
+        self._refresh_jobs()
+
+    def _refresh_jobs(self, *args):
+        # the latest publishes, of this session and the interrupted ones
+        try:
+            jobs = self._handler.job_queue.jobs(limit=JOB_LIST_SIZE)
+        except Exception:
+            self._app.logger.debug("Unable to read the playblast job queue", exc_info=True)
+            return
+        self.lst_jobs.clear()
+        for job in reversed(jobs):
+            done = [stage.replace("_", " ") for stage in job.completed_stages]
+            text = "%s: %s" % (job.name, job.status)
+            if done and job.status != job_queue.DONE:
+                text += ", %s done" % ", ".join(done)
+            if job.error:
+                text += ", %s" % job.error
+            item = QtGui.QListWidgetItem(text, self.lst_jobs)
+            item.setToolTip(job.spec["local_path"])
+            item.setData(QtCore.Qt.UserRole, job.id)
+
+    def _on_job_double_clicked(self, item):
+        job_id = item.data(QtCore.Qt.UserRole)
+        if job_id is None:
+            return
+        try:
+            retried = self._handler.retry_publish(job_id)
+        except Exception:
+            self._app.logger.error("Unable to retry the publish", exc_info=True)
+            return
+        if retried:
+            self.lbl_status.setText("%s: retrying" % item.text().split(":", 1)[0])
+        self._refresh_jobs()
+
+    def _on_render_progress(self, frames, total, eta):
+        self.prg_render.setMaximum(max(1, total))
+        self.prg_render.setValue(frames)
+        self.prg_render.setFormat("%d/%d frames%s" % (frames, total, _format_eta(eta)))
+
+    def _on_stage_progress(self, job_name, stage, fraction, eta):
+        self.lbl_status.setText(
+            "%s: %s %d%%%s" % (job_name, stage.replace("_", " "), fraction * 100, _format_eta(eta))
+        )
+
+    def _on_stage_started(self, job_name, stage):
+        self.lbl_status.setText("%s: %s..." % (job_name, stage.replace("_", " ")))
+        self._refresh_jobs()
+
+    def _on_stage_failed(self, job_name, stage, message):
+        self.lbl_status.setText("%s: %s failed, %s" % (job_name, stage.replace("_", " "), message))
+        self._refresh_jobs()
+
+    def _on_job_finished(self, job_name, successful):
+        if successful:
+            self.lbl_status.setText("%s: published" % job_name)
+        self._refresh_jobs()
 
     def closeEvent(self, event):
+        # the render still updates the dialog when it ends
+        if self._running:
+            self.lbl_status.setText("Cancel the playblast before closing")
+            event.ignore()
+            return
+        if self._settings is None:
+            super(PlayblastDialog, self).closeEvent(event)
+            return
         create_version = self.chb_create_version.isChecked()
         self._settings.store("create_version", create_version)
         upload_to_shotgun = self.chb_upload_to_shotgun.isChecked()
@@ -102,3 +240,9 @@ class PlayblastDialog(QtGui.QWidget):
         percent_int = self.cmb_percentage.itemData(self.cmb_percentage.currentIndex())
         self._settings.store("percent_scale", percent_int)
         super(PlayblastDialog, self).closeEvent(event)
+
+
+def _format_eta(seconds):
+    if seconds < 0:
+        return ""
+    return ", %d:%02d left" % divmod(int(seconds + 0.5), 60)
@@ -0,0 +1,181 @@
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+from sgtk.platform.qt import QtCore
+
+# seconds between two progress signals of the same render or stage
+INTERVAL = 0.1
+# events held back from the widgets outside of the dialog while rendering
+USER_INPUT_EVENTS = (
+    QtCore.QEvent.MouseButtonPress,
+    QtCore.QEvent.MouseButtonRelease,
+    QtCore.QEvent.MouseButtonDblClick,
+    QtCore.QEvent.Wheel,
+    QtCore.QEvent.KeyPress,
+    QtCore.QEvent.KeyRelease,
+    QtCore.QEvent.Shortcut,
+    QtCore.QEvent.ShortcutOverride,
+    QtCore.QEvent.ContextMenu,
+    QtCore.QEvent.Drop,
+)
+
+
+class PlayblastCancelled(Exception):
+    pass
+
+
+class Eta(object):
+    """
+    Seconds left for a task of total units, from the rate so far.
+    """
+
+    def __init__(self, total):
+        self.total = total
+        self.start = time.time()
+
+    def remaining(self, done):
+        """
+        :returns: seconds left, -1 while unknown
+        """
+        elapsed = time.time() - self.start
+        if done <= 0 or not self.total or elapsed <= 0:
+            return -1.0
+        return max(0.0, elapsed / done * (self.total - done))
+
+
+class PlayblastProgress(QtCore.QObject):
+    """
+    Progress of the render and of the publish stages, with an ETA in
+    seconds (-1 while unknown), and cancellation of the playblast.
+
+    Frames are counted on the main thread as Maya renders them. Stages
+    report their progress from the worker threads with :meth:`update`, inside
+    the :meth:`stage` block the publish pipeline runs them in.
+    """
+
+    render_progress = QtCore.Signal(int, int, float)
+    stage_progress = QtCore.Signal(str, str, float, float)
+
+    def __init__(self, parent=None):
+        super(PlayblastProgress, self).__init__(parent)
+        self._cancelled = threading.Event()
+        self._local = threading.local()
+        self._frames = 0
+        self._total = 0
+        self._eta = None
+        self._emitted = 0
+        self._allowed = weakref.WeakSet()
+
+    def reset(self):
+        """
+        Before a new playblast, a previous cancel doesn't apply to it.
+        """
+        self._cancelled.clear()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait_cancelled(self, timeout):
+        """
+        :returns: True once cancelled, False after timeout seconds
+        """
+        return self._cancelled.wait(timeout)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        """
+        :raises PlayblastCancelled: once the playblast was cancelled
+        """
+        if self._cancelled.is_set():
+            raise PlayblastCancelled("Playblast cancelled")
+
+    def allow_input(self, widget):
+        """
+        Let widget and its children take user input while rendering, eg. the
+        dialog with the Cancel button.
+        """
+        self._allowed.add(widget)
+
+    @contextmanager
+    def restrict_input(self):
+        """
+        Events are processed while rendering so the progress is drawn, the
+        user input only reaches the widgets of :meth:`allow_input`, the rest
+        of Maya can't change the scene or start another playblast. Esc
+        cancels the playblast.
+        """
+        application = QtCore.QCoreApplication.instance()
+        if application is None:
+            yield
+            return
+        input_filter = _InputFilter(self)
+        application.installEventFilter(input_filter)
+        try:
+            yield
+        finally:
+            application.removeEventFilter(input_filter)
+
+    def _takes_input(self, widget):
+        while widget is not None:
+            if widget in self._allowed:
+                return True
+            widget = widget.parent()
+        return False
+
+    def start_render(self, total):
+        self._frames = 0
+        self._total = int(total)
+        self._eta = Eta(self._total)
+        self._emitted = 0
+        self.render_progress.emit(0, self._total, -1.0)
+
+    def frame_rendered(self):
+        self._frames += 1
+        now = time.time()
+        if self._frames < self._total and now - self._emitted < INTERVAL:
+            return
+        self._emitted = now
+        self.render_progress.emit(self._frames, self._total, self._eta.remaining(self._frames))
+
+    @contextmanager
+    def stage(self, job_name, stage):
+        self._local.stage = (job_name, stage, Eta(0), [0])
+        try:
+            yield
+        finally:
+            self._local.stage = None
+
+    def update(self, done, total):
+        """
+        Progress of the stage running on this thread, eg. bytes copied.
+        """
+        current = getattr(self._local, "stage", None)
+        if current is None or not total:
+            return
+        job_name, stage, eta, emitted = current
+        now = time.time()
+        if done < total and now - emitted[0] < INTERVAL:
+            return
+        emitted[0] = now
+        eta.total = total
+        self.stage_progress.emit(job_name, stage, min(1.0, float(done) / total), eta.remaining(done))
+
+
+class _InputFilter(QtCore.QObject):
+    def __init__(self, progress):
+        super(_InputFilter, self).__init__()
+        self._progress = progress
+
+    def eventFilter(self, watched, event):
+        if event.type() not in USER_INPUT_EVENTS:
+            return False
+        if event.type() == QtCore.QEvent.KeyPress and event.key() == QtCore.Qt.Key_Escape:
+            self._progress.cancel()
+            # Maya's own interrupt stops a movie being rendered
+            return False
+        return not self._progress._takes_input(watched)
@@ -0,0 +1,206 @@
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from sgtk.platform.qt import QtCore
+
+
+class PublishJob(object):
+    """
+    A set of post playblast stages with dependencies between them.
+
+    Each stage is a callable taking a dict of the results of the stages it
+    depends on. Stages without dependencies on each other run in parallel.
+    """
+
+    def __init__(self, name, job_id=None, on_finished=None):
+        """
+        :param job_id: id of the job in the persistent job queue, if any
+        :param on_finished: called with the job once all its stages are
+            done, on the worker thread which ran the last one
+        """
+        self.name = name
+        self.job_id = job_id
+        self.on_finished = on_finished
+        self._stages = OrderedDict()
+        self.results = {}
+        self.errors = {}
+        self.skipped = set()
+        # stages queued to run, each once
+        self.scheduled = set()
+
+    def add_stage(self, name, func, depends_on=()):
+        for dependency in depends_on:
+            if dependency not in self._stages:
+                raise ValueError("Unknown dependency %r for stage %r" % (dependency, name))
+        self._stages[name] = (func, tuple(depends_on))
+
+    @property
+    def stages(self):
+        return list(self._stages)
+
+    def get_stage(self, name):
+        return self._stages[name]
+
+    def dependencies(self, name):
+        return self._stages[name][1]
+
+    def dependents(self, name):
+        return [stage for stage, (_, depends_on) in self._stages.items() if name in depends_on]
+
+    def is_done(self, name):
+        return name in self.results or name in self.errors or name in self.skipped
+
+    @property
+    def finished(self):
+        return all(self.is_done(stage) for stage in self._stages)
+
+    @property
+    def successful(self):
+        return not self.errors and not self.skipped
+
+
+class PublishPipeline(QtCore.QObject):
+    """
+    Worker pool running post playblast stages off Maya's main thread.
+
+    At most ``queue_size`` jobs are in flight, further calls to :meth:`submit`
+    wait for a running job to finish. Progress is reported through Qt signals,
+    which are delivered on the thread owning the connected receiver.
+    """
+
+    stage_started = QtCore.Signal(str, str)
+    stage_finished = QtCore.Signal(str, str)
+    stage_failed = QtCore.Signal(str, str, str)
+    job_finished = QtCore.Signal(str, bool)
+
+    def __init__(self, logger, workers=2, queue_size=4, parent=None):
+        super(PublishPipeline, self).__init__(parent)
+        self._logger = logger
+        self._tasks = queue.Queue()
+        self._slots = threading.BoundedSemaphore(max(1, queue_size))
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._jobs = []
+        self._threads = []
+        for index in range(max(1, workers)):
+            thread = threading.Thread(target=self._work, name="PlayblastPublish-%d" % index)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    @property
+    def pending_jobs(self):
+        with self._lock:
+            return list(self._jobs)
+
+    def submit(self, job):
+        """
+        Queue all stages of a job, blocking while the queue is full.
+        """
+        if not job.stages:
+            return
+        self._slots.acquire()
+        with self._lock:
+            self._jobs.append(job)
+            roots = [stage for stage in job.stages if not job.dependencies(stage)]
+            job.scheduled.update(roots)
+        for stage in roots:
+            self._tasks.put((job, stage))
+
+    def join(self, timeout=None):
+        """
+        Wait until every submitted job finished.
+
+        :returns: False if jobs are still running after timeout seconds
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self._idle:
+            while self._jobs:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+            return True
+
+    def shutdown(self, wait=False):
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        self._threads = []
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            job, stage = task
+            try:
+                self._run_stage(job, stage)
+            except Exception:
+                # never let a worker die, the job would hang forever
+                self._logger.exception("Unexpected error in publish stage %s", stage)
+
+    def _run_stage(self, job, stage):
+        func, depends_on = job.get_stage(stage)
+        with self._lock:
+            inputs = dict((name, job.results.get(name)) for name in depends_on)
+        self.stage_started.emit(job.name, stage)
+        try:
+            result = func(inputs)
+        except Exception as error:
+            self._logger.error("Publish stage %s failed for %s", stage, job.name, exc_info=True)
+            with self._lock:
+                job.errors[stage] = error
+            self.stage_failed.emit(job.name, stage, str(error))
+        else:
+            with self._lock:
+                job.results[stage] = result
+            self.stage_finished.emit(job.name, stage)
+        self._schedule_dependents(job, stage)
+
+    def _schedule_dependents(self, job, stage):
+        ready = []
+        with self._lock:
+            self._skip_dependents(job, stage)
+            for dependent in job.dependents(stage):
+                if job.is_done(dependent) or dependent in job.scheduled:
+                    continue
+                if all(name in job.results for name in job.dependencies(dependent)):
+                    # stages finishing together on two workers both see it ready
+                    job.scheduled.add(dependent)
+                    ready.append(dependent)
+            # only the worker which finished the job first removes it
+            finished = job.finished and job in self._jobs
+            if finished:
+                self._jobs.remove(job)
+        for dependent in ready:
+            self._tasks.put((job, dependent))
+        if finished:
+            if job.on_finished is not None:
+                try:
+                    job.on_finished(job)
+                except Exception:
+                    self._logger.exception("Unexpected error finishing publish job %s", job.name)
+            with self._idle:
+                if not self._jobs:
+                    self._idle.notify_all()
+            self._slots.release()
+            self.job_finished.emit(job.name, job.successful)
+
+    def _skip_dependents(self, job, stage):
+        # stages depending on a failed or skipped stage will never run
+        if stage not in job.errors and stage not in job.skipped:
+            return
+        for dependent in job.dependents(stage):
+            if not job.is_done(dependent):
+                self._logger.warning("Skipping publish stage %s, %s did not complete", dependent, stage)
+                job.skipped.add(dependent)
+                self._skip_dependents(job, dependent)
@@ -0,0 +1,131 @@
+from collections import OrderedDict
+
+
+CAPTURE_PROC = "tkMayaPlayblastSceneState"
+
+
+def _mel_string(value):
+    return '"%s"' % str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _mel_number(value):
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class SceneState(object):
+    """
+    Snapshot of HUD visibility, numeric attributes and playback range.
+
+    The whole state is read with a single MEL evaluation and written back with
+    another one, touching only the values which differ. Use it as a context
+    manager to restore the scene on exit, including around a batch of
+    playblasts.
+    """
+
+    def __init__(self, huds=False, attributes=(), playback_range=False):
+        self._with_huds = huds
+        self._attribute_names = list(attributes)
+        self._with_playback_range = playback_range
+        self.huds = OrderedDict()
+        self.attributes = OrderedDict()
+        self.playback_range = None
+        self.animation_range = None
+
+    def __enter__(self):
+        return self.capture()
+
+    def __exit__(self, *exc_info):
+        self.restore()
+
+    def capture(self):
+        """
+        Read the state from the scene.
+        """
+        import maya.mel as mel
+
+        lines = ["string $state[];"]
+        if self._with_playback_range:
+            lines.append("$state[size($state)] = `playbackOptions -query -minTime`;")
+            lines.append("$state[size($state)] = `playbackOptions -query -maxTime`;")
+            lines.append("$state[size($state)] = `playbackOptions -query -animationStartTime`;")
+            lines.append("$state[size($state)] = `playbackOptions -query -animationEndTime`;")
+        if self._with_huds:
+            lines.append("string $huds[] = `headsUpDisplay -listHeadsUpDisplays`;")
+            lines.append("$state[size($state)] = size($huds);")
+            lines.append("for ($hud in $huds) {")
+            lines.append("    $state[size($state)] = $hud;")
+            lines.append("    $state[size($state)] = `headsUpDisplay -query -visible $hud`;")
+            lines.append("}")
+        for name in self._attribute_names:
+            lines.append("$state[size($state)] = `getAttr %s`;" % _mel_string(name))
+        lines.append("return $state;")
+        # a proc keeps the variables local, then a single call reads everything
+        mel.eval("global proc string[] %s() {\n%s\n}" % (CAPTURE_PROC, "\n".join(lines)))
+        values = list(mel.eval("%s()" % CAPTURE_PROC) or [])
+
+        values.reverse()
+        if self._with_playback_range:
+            self.playback_range = (float(values.pop()), float(values.pop()))
+            self.animation_range = (float(values.pop()), float(values.pop()))
+        if self._with_huds:
+            self.huds = OrderedDict()
+            for _ in range(int(values.pop())):
+                name = values.pop()
+                self.huds[name] = bool(int(values.pop()))
+        self.attributes = OrderedDict((name, float(values.pop())) for name in self._attribute_names)
+        return self
+
+    def current(self):
+        """
+        A new snapshot of the same values, as they are now.
+        """
+        return SceneState(self._with_huds, self._attribute_names, self._with_playback_range).capture()
+
+    def apply(self, huds=None, attributes=None, playback_range=None, current=None, hide_other_huds=False):
+        """
+        Write values into the scene, skipping the ones already set.
+
+        :param huds: dict of HUD name to visibility
+        :param attributes: dict of attribute to value
+        :param playback_range: (min, max) tuple
+        :param current: snapshot to compare to, captured now by default
+        :param hide_other_huds: hide the visible HUDs missing from huds
+        :returns: number of values written
+        """
+        import maya.mel as mel
+
+        if current is None:
+            current = self.current()
+        lines = []
+        if playback_range is not None and tuple(map(float, playback_range)) != current.playback_range:
+            lines.append(
+                "playbackOptions -edit -minTime %s -maxTime %s;"
+                % (_mel_number(playback_range[0]), _mel_number(playback_range[1]))
+            )
+        huds = dict(huds or {})
+        if hide_other_huds:
+            for name in current.huds:
+                huds.setdefault(name, False)
+        for name, visible in huds.items():
+            if name in current.huds and current.huds[name] != bool(visible):
+                lines.append("headsUpDisplay -edit -visible %d %s;" % (bool(visible), _mel_string(name)))
+        for name, value in (attributes or {}).items():
+            if current.attributes.get(name) != float(value):
+                lines.append("setAttr %s %s;" % (_mel_string(name), _mel_number(value)))
+        if lines:
+            mel.eval("{\n%s\n}" % "\n".join(lines))
+        return len(lines)
+
+    def restore(self, current=None):
+        """
+        Write back the captured values which changed since. HUDs created
+        after the snapshot are hidden.
+        """
+        return self.apply(
+            huds=self.huds,
+            attributes=self.attributes,
+            playback_range=self.playback_range,
+            current=current,
+            hide_other_huds=self._with_huds,
+        )
@@ -0,0 +1,230 @@
+"""
+Sequence movie assembled from the shot movies without encoding them again.
+
+Each shot is remuxed into a segment next to the sequence movie, and the
+segments are joined by the ffmpeg concat demuxer, copying the streams. An
+edit index keeps the shots, their order and the checksum of the movie
+each segment was made from, so an updated shot only rebuilds its segment.
+"""
+import json
+import os
+import subprocess
+import time
+from contextlib import contextmanager
+
+from . import encoder
+from . import file_copy
+
+INDEX_SUFFIX = ".edit.json"
+SEGMENTS_SUFFIX = "_segments"
+# a lock older than this was left by a crashed session
+STALE_LOCK = 600
+LOCK_POLL = 0.5
+# stream properties the concat demuxer needs identical in every segment
+VIDEO_SIGNATURE = ("codec_name", "width", "height", "pix_fmt", "r_frame_rate")
+AUDIO_SIGNATURE = ("codec_name", "sample_rate", "channels")
+
+REBUILT = "rebuilt"
+UNCHANGED = "unchanged"
+
+
+class SequenceError(Exception):
+    pass
+
+
+class SequenceAssembler(object):
+    """
+    The sequence movie at output, and its edit index and segments next to
+    it. Updates from several sessions are serialized by a lock file.
+    """
+
+    def __init__(self, output, ffmpeg=encoder.FFMPEG, logger=None, lock_timeout=STALE_LOCK):
+        self.output = output
+        root, extension = os.path.splitext(output)
+        self.index_path = os.path.join(os.path.dirname(output), "." + os.path.basename(output) + INDEX_SUFFIX)
+        self.segment_directory = root + SEGMENTS_SUFFIX
+        self._extension = extension or ".mov"
+        self._ffmpeg = ffmpeg
+        self._ffprobe = encoder.ffprobe_executable(ffmpeg)
+        self._logger = logger
+        self._lock_timeout = lock_timeout
+
+    def shots(self):
+        """
+        The edit, entries of shot name, order, source, checksum and segment,
+        in cut order.
+        """
+        return _in_cut_order(self._load().values())
+
+    def update(self, shot, source, checksum, order=None):
+        """
+        Put the movie of a shot in the sequence, rebuilding its segment when
+        the checksum changed, then join the segments again.
+
+        :param order: position of the shot in the cut, shots without one
+            are sorted by name after the others.
+        :returns: REBUILT or UNCHANGED, for the segment of the shot
+        """
+        with self._locked():
+            shots = self._load()
+            entry = shots.get(shot)
+            segment = os.path.join(self.segment_directory, _safe_name(shot) + self._extension)
+            action = UNCHANGED
+            if not entry or entry["checksum"] != checksum or not os.path.isfile(entry["segment"]):
+                self._remux(source, segment)
+                entry = {
+                    "shot": shot,
+                    "segment": segment,
+                    "checksum": checksum,
+                    "streams": self._signature(segment),
+                }
+                action = REBUILT
+            moved = entry.get("order") != order or entry.get("source") != source
+            entry.update(order=order, source=source, updated=time.time())
+            shots[shot] = entry
+            self._save(shots)
+            if action == REBUILT or moved or not os.path.isfile(self.output):
+                self._concat(_in_cut_order(shots.values()))
+            return action
+
+    def remove(self, shot):
+        """
+        Take a shot out of the edit, eg. once it is omitted.
+        """
+        with self._locked():
+            shots = self._load()
+            entry = shots.pop(shot, None)
+            if entry is None:
+                return
+            self._save(shots)
+            if os.path.isfile(entry["segment"]):
+                os.remove(entry["segment"])
+            if shots:
+                self._concat(_in_cut_order(shots.values()))
+            elif os.path.isfile(self.output):
+                os.remove(self.output)
+
+    def _remux(self, source, segment):
+        if not os.path.isdir(self.segment_directory):
+            os.makedirs(self.segment_directory)
+        temporary = file_copy.temporary_path(segment)
+        command = [
+            self._ffmpeg, "-y", "-v", "error", "-i", source,
+            "-map", "0:v:0", "-map", "0:a:0?", "-c", "copy",
+            # every segment starts at 0, the concat demuxer offsets them
+            "-avoid_negative_ts", "make_zero",
+            "-f", "mov", temporary,
+        ]
+        try:
+            encoder.run(command, self._logger)
+            file_copy.atomic_rename(temporary, segment)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    def _signature(self, segment):
+        try:
+            streams = encoder.probe_streams(segment, self._ffprobe)
+        except (subprocess.CalledProcessError, ValueError) as error:
+            raise SequenceError("Unable to read the streams of %s: %s" % (segment, error))
+        signature = {}
+        for stream in streams:
+            kind = stream.get("codec_type")
+            if kind == "video" and "video" not in signature:
+                signature["video"] = [stream.get(key) for key in VIDEO_SIGNATURE]
+            elif kind == "audio" and "audio" not in signature:
+                signature["audio"] = [stream.get(key) for key in AUDIO_SIGNATURE]
+        return signature
+
+    def _concat(self, entries):
+        reference = entries[0]
+        mismatched = [
+            entry["shot"] for entry in entries
+            if entry["streams"].get("video") != reference["streams"].get("video")
+        ]
+        if mismatched:
+            raise SequenceError(
+                "%s can't be joined to %s without encoding, their video differs"
+                % (", ".join(mismatched), reference["shot"])
+            )
+        # the sound is kept when every shot has the same
+        audio = all(entry["streams"].get("audio") == reference["streams"].get("audio") for entry in entries)
+        audio = audio and reference["streams"].get("audio") is not None
+
+        list_path = file_copy.temporary_path(self.output + ".txt")
+        temporary = file_copy.temporary_path(self.output)
+        try:
+            with open(list_path, "w") as handle:
+                for entry in entries:
+                    handle.write("file '%s'\n" % entry["segment"].replace("'", "'\\''"))
+            command = [
+                self._ffmpeg, "-y", "-v", "error",
+                "-f", "concat", "-safe", "0", "-i", list_path,
+                "-map", "0:v",
+            ] + (["-map", "0:a"] if audio else []) + [
+                "-c", "copy", "-movflags", "+faststart", "-f", "mov", temporary,
+            ]
+            start = time.time()
+            encoder.run(command, self._logger)
+            file_copy.atomic_rename(temporary, self.output)
+            if self._logger:
+                self._logger.info(
+                    "Assembled %s from %d shots in %.1fs", self.output, len(entries), time.time() - start
+                )
+        finally:
+            for path in (list_path, temporary):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _load(self):
+        try:
+            with open(self.index_path) as handle:
+                return dict((entry["shot"], entry) for entry in json.load(handle)["shots"])
+        except (IOError, OSError, ValueError, KeyError):
+            return {}
+
+    def _save(self, shots):
+        temporary = file_copy.temporary_path(self.index_path)
+        with open(temporary, "w") as handle:
+            json.dump({"shots": _in_cut_order(shots.values())}, handle, indent=1)
+        file_copy.atomic_rename(temporary, self.index_path)
+
+    @contextmanager
+    def _locked(self):
+        directory = os.path.dirname(self.output)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        lock_path = self.index_path + ".lock"
+        deadline = time.time() + self._lock_timeout
+        while True:
+            try:
+                handle = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except OSError:
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > STALE_LOCK:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() > deadline:
+                    raise SequenceError("%s is locked by another session" % self.output)
+                time.sleep(LOCK_POLL)
+        try:
+            os.write(handle, str(os.getpid()).encode("ascii"))
+            os.close(handle)
+            yield
+        finally:
+            try:
+                os.remove(lock_path)
+            except OSError:
+                pass
+
+
+def _in_cut_order(entries):
+    # shots with a cut order first, then by name
+    return sorted(entries, key=lambda entry: (entry.get("order") is None, entry.get("order"), entry["shot"]))
+
+
+def _safe_name(name):
+    return "".join(character if character.isalnum() or character in "-_." else "_" for character in name)
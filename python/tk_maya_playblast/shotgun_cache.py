@@ -0,0 +1,94 @@
+import threading
+import time
+
+
+class Prefetch(object):
+    """
+    Result of a Shotgun query running in the background.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.created = time.time()
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    @classmethod
+    def resolved(cls, key, value):
+        prefetch = cls(key)
+        prefetch._set(value, None)
+        return prefetch
+
+    def _set(self, result, error):
+        self._result = result
+        self._error = error
+        self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def failed(self):
+        return self.done and self._error is not None
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise RuntimeError("Shotgun query %r timed out" % (self.key,))
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class ShotgunCache(object):
+    """
+    Session cache of Shotgun queries, entries expire after ``ttl`` seconds.
+
+    Queries are started with :meth:`prefetch` as early as possible, usually
+    before the playblast renders, and their result is picked up once needed.
+    """
+
+    def __init__(self, logger, ttl=300):
+        self._logger = logger
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def prefetch(self, key, query):
+        """
+        Run ``query`` in a background thread unless a fresh entry exists.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.failed and time.time() - entry.created < self._ttl:
+                return entry
+            entry = Prefetch(key)
+            self._entries[key] = entry
+
+        def run():
+            try:
+                result, error = query(), None
+            except Exception as exception:
+                self._logger.debug("Prefetching %r failed", key, exc_info=True)
+                result, error = None, exception
+            entry._set(result, error)
+
+        thread = threading.Thread(target=run, name="PlayblastPrefetch")
+        thread.daemon = True
+        thread.start()
+        return entry
+
+    def get(self, key, query, timeout=None):
+        return self.prefetch(key, query).result(timeout)
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = Prefetch.resolved(key, value)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
@@ -0,0 +1,204 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
+GIGABYTE = 1024 * 1024 * 1024
+METADATA_FILENAME = ".take.json"
+# kept free on the disk on top of the estimate, for the OS and Maya itself
+FREE_SPACE_MARGIN = GIGABYTE // 2
+
+
+class InsufficientSpaceError(Exception):
+    pass
+
+
+def free_space(path):
+    """
+    Bytes available to the user on the disk holding path.
+    """
+    if hasattr(shutil, "disk_usage"):
+        return shutil.disk_usage(path).free
+    if sys.platform == "win32":
+        import ctypes
+
+        free = ctypes.c_ulonglong(0)
+        ctypes.windll.kernel32.GetDiskFreeSpaceExW(ctypes.c_wchar_p(path), ctypes.byref(free), None, None)
+        return free.value
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
+
+
+def estimate_playblast_size(width, height, frames, quality=70, image_sequence=False, proxy_scale=0):
+    """
+    Rough upper bound of the bytes a playblast writes.
+
+    The movie is estimated at a bitrate growing with the quality, from 0.05
+    to 0.5 bits per pixel. An image sequence, rendered for an encode, counts
+    every frame as a PNG of 2 bytes per pixel, in case the encode falls
+    behind the render.
+    """
+    pixels = float(width) * height * frames
+    bits_per_pixel = 0.05 + 0.45 * (max(0, min(100, quality)) / 100.0) ** 2
+    size = pixels * bits_per_pixel / 8
+    if proxy_scale:
+        size *= 1 + (proxy_scale / 100.0) ** 2
+    if image_sequence:
+        size += pixels * 2
+    return int(size)
+
+
+class Take(object):
+    def __init__(self, directory, name):
+        self.directory = directory
+        self.name = name
+
+    @property
+    def path(self):
+        """
+        The movie of the take.
+        """
+        return os.path.join(self.directory, self.name)
+
+
+class TakeStore(object):
+    """
+    Local playblasts, one directory per take, kept under a size quota.
+
+    Takes are marked published once their post playblast stages completed,
+    or rejected when their frames failed the QC. Only those are evicted,
+    least recently used first, a take still waiting for its publish is
+    never removed.
+    """
+
+    def __init__(self, directory, max_bytes=20 * GIGABYTE, logger=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._logger = logger
+        self._lock = threading.Lock()
+
+    def create(self, name):
+        """
+        A new take directory, for a movie named name.
+        """
+        stem = os.path.splitext(name)[0]
+        directory = os.path.join(
+            self.directory, "%s_%s_%s" % (stem, time.strftime("%Y%m%d-%H%M%S"), uuid.uuid4().hex[:6])
+        )
+        os.makedirs(directory)
+        self._write_metadata(directory, {"name": name, "created": time.time(), "published": False})
+        return Take(directory, name)
+
+    def mark_published(self, directory):
+        self._mark(directory, "published")
+
+    def mark_rejected(self, directory):
+        self._mark(directory, "rejected")
+
+    def _mark(self, directory, state):
+        metadata = self._read_metadata(directory)
+        if metadata is None:
+            return
+        metadata[state] = True
+        self._write_metadata(directory, metadata)
+
+    def discard(self, directory):
+        """
+        Remove a take which won't be published, eg. a failed render.
+        """
+        if os.path.exists(os.path.join(directory, METADATA_FILENAME)):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def takes(self):
+        """
+        (directory, size, last used, evictable) of every take, published or
+        rejected ones are evictable.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            directory = os.path.join(self.directory, name)
+            metadata_path = os.path.join(directory, METADATA_FILENAME)
+            try:
+                last_used = os.path.getmtime(metadata_path)
+            except OSError:
+                continue
+            metadata = self._read_metadata(directory) or {}
+            evictable = bool(metadata.get("published") or metadata.get("rejected"))
+            entries.append((directory, _directory_size(directory), last_used, evictable))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _, _ in self.takes())
+
+    def evict(self, reserve=0):
+        """
+        Remove published or rejected takes, least recently used first, until
+        the store and reserve more bytes fit in the quota.
+
+        :returns: the bytes freed
+        """
+        with self._lock:
+            entries = sorted(self.takes(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _, _ in entries)
+            freed = 0
+            for directory, size, _, evictable in entries:
+                if total + reserve <= self.max_bytes:
+                    break
+                if not evictable:
+                    continue
+                shutil.rmtree(directory, ignore_errors=True)
+                if not os.path.exists(directory):
+                    total -= size
+                    freed += size
+            if self._logger and freed:
+                self._logger.debug("Evicted %.1f MB of published playblasts", freed / 1024.0 / 1024.0)
+            if self._logger and total + reserve > self.max_bytes:
+                self._logger.warning(
+                    "Playblasts waiting to be published use %.1f GB, over the %.1f GB quota",
+                    total / float(GIGABYTE), self.max_bytes / float(GIGABYTE)
+                )
+            return freed
+
+    def preflight(self, estimated_bytes):
+        """
+        Make room for a playblast of estimated_bytes, evicting published
+        takes first.
+
+        :raises InsufficientSpaceError: when the disk can't hold it
+        """
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+        self.evict(reserve=estimated_bytes)
+        available = free_space(self.directory) - FREE_SPACE_MARGIN
+        if estimated_bytes > available:
+            raise InsufficientSpaceError(
+                "The playblast needs about %.1f GB but only %.1f GB are free in %s"
+                % (estimated_bytes / float(GIGABYTE), max(0, available) / float(GIGABYTE), self.directory)
+            )
+
+    def _read_metadata(self, directory):
+        try:
+            with open(os.path.join(directory, METADATA_FILENAME)) as handle:
+                return json.load(handle)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _write_metadata(self, directory, metadata):
+        with open(os.path.join(directory, METADATA_FILENAME), "w") as handle:
+            json.dump(metadata, handle)
+
+
+def _directory_size(directory):
+    size = 0
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            try:
+                size += os.path.getsize(os.path.join(root, filename))
+            except OSError:
+                pass
+    return size
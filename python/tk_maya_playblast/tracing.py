@@ -0,0 +1,196 @@
+import getpass
+import json
+import logging
+import logging.handlers
+import os
+import socket
+import threading
+import time
+import uuid
+
+MEGABYTE = 1024 * 1024
+METRICS_FILENAME = "tk-maya-playblast-metrics.jsonl"
+PROFILE_DIRECTORY = "tk-maya-playblast-profiles"
+
+
+class Span(object):
+    """
+    A timed section of a playblast, with the values recorded during it.
+    """
+
+    def __init__(self, name, trace, parent=None, **attributes):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def as_dict(self):
+        record = {
+            "span": self.name,
+            "trace": self.trace,
+            "parent": self.parent,
+            "start": self.start,
+            "duration": self.duration,
+            "ok": self.error is None,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        record.update(self.attributes)
+        return record
+
+
+class Tracer(object):
+    """
+    Timed spans of the playblast stages, appended as JSON lines to a
+    rotating metrics file.
+
+    Spans opened while another one is open on the same thread are its
+    children and share its trace id. Work moved to another thread passes the
+    trace id on explicitly. Spans with a ``frames`` value also record the
+    frames per second. With a profile directory, top level spans opened
+    with ``profile=True`` are run under cProfile and their stats are saved
+    there.
+    """
+
+    def __init__(self, logger, path=None, max_bytes=10 * MEGABYTE, backup_count=5, profile_directory=None):
+        self._logger = logger
+        self._local = threading.local()
+        self._profile_directory = profile_directory
+        self._host = socket.gethostname()
+        try:
+            self._user = getpass.getuser()
+        except Exception:
+            self._user = None
+        self._handler = None
+        self._writer = None
+        if path and max_bytes > 0:
+            self._handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+            # a logger of its own, the records must not reach the app log
+            self._writer = logging.getLogger("tk-maya-playblast.metrics.%s" % uuid.uuid4().hex[:8])
+            self._writer.propagate = False
+            self._writer.setLevel(logging.INFO)
+            self._writer.addHandler(self._handler)
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    def current(self):
+        """
+        The innermost span open on this thread, None outside of any.
+        """
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def current_trace(self):
+        span = self.current()
+        return span.trace if span else None
+
+    def annotate(self, **attributes):
+        """
+        Add values to the innermost span open on this thread, if any.
+        """
+        span = self.current()
+        if span is not None:
+            span.set(**attributes)
+
+    def span(self, name, trace=None, profile=False, **attributes):
+        return _SpanContext(self, name, trace, profile, attributes)
+
+    def _open(self, name, trace, attributes):
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        if trace is None:
+            trace = parent.trace if parent else uuid.uuid4().hex
+        span = Span(name, trace, parent.name if parent else None, **attributes)
+        stack.append(span)
+        return span
+
+    def _close(self, span, error=None):
+        span.duration = time.time() - span.start
+        if error is not None:
+            span.error = "%s: %s" % (type(error).__name__, error)
+        if span.attributes.get("frames") and span.duration > 0:
+            span.set(frames_per_second=span.attributes["frames"] / span.duration)
+        stack = self._stack()
+        if span in stack:
+            stack.remove(span)
+        self._logger.debug("%s took %.3fs", span.name, span.duration)
+        self.write(span.as_dict())
+
+    def write(self, record):
+        if self._writer is None:
+            return
+        record = dict(record)
+        record.update(host=self._host, user=self._user, pid=os.getpid(), thread=threading.current_thread().name)
+        try:
+            self._writer.info(json.dumps(record, sort_keys=True, default=str))
+        except Exception:
+            # metrics must never break a playblast
+            self._logger.debug("Unable to write playblast metrics", exc_info=True)
+
+    def _should_profile(self, profile):
+        return profile and self._profile_directory and not self._stack()
+
+    def _save_profile(self, profiler, span):
+        if not os.path.isdir(self._profile_directory):
+            os.makedirs(self._profile_directory)
+        path = os.path.join(
+            self._profile_directory,
+            "%s_%s_%s.prof" % (span.name, time.strftime("%Y%m%d-%H%M%S"), span.trace[:8]),
+        )
+        profiler.dump_stats(path)
+        span.set(profile=path)
+        self._logger.info("Profile of %s saved to %s", span.name, path)
+
+    def close(self):
+        if self._handler is not None:
+            self._writer.removeHandler(self._handler)
+            self._handler.close()
+            self._handler = None
+            self._writer = None
+
+
+class _SpanContext(object):
+    def __init__(self, tracer, name, trace, profile, attributes):
+        self._tracer = tracer
+        self._name = name
+        self._trace = trace
+        self._profile = profile
+        self._attributes = attributes
+        self._profiler = None
+        self._span = None
+
+    def __enter__(self):
+        if self._tracer._should_profile(self._profile):
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+        self._span = self._tracer._open(self._name, self._trace, self._attributes)
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # another profiler is already running on this thread
+                self._profiler = None
+        return self._span
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._profiler is not None:
+            self._profiler.disable()
+            try:
+                self._tracer._save_profile(self._profiler, self._span)
+            except Exception:
+                self._tracer._logger.warning("Unable to save the profile of %s", self._name, exc_info=True)
+        self._tracer._close(self._span, exc_value)
+        return False
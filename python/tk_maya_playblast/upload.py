@@ -0,0 +1,300 @@
+import hashlib
+import json
+import mimetypes
+import os
+import random
+import tempfile
+import threading
+import time
+
+try:
+    from urllib.parse import urlunparse
+except ImportError:
+    from urlparse import urlunparse
+
+from . import file_copy
+
+MEGABYTE = 1024 * 1024
+PART_SIZE = 20 * MEGABYTE
+# storage services refuse parts smaller than this, except the last one
+MIN_PART_SIZE = 5 * MEGABYTE
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadStats(object):
+    """
+    Throughput of an upload, bytes actually sent and the time spent per part.
+    """
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_resumed = 0
+        self.retries = 0
+        self.part_latencies = []
+        self._start = time.time()
+        self.elapsed = 0.0
+
+    def stop(self):
+        self.elapsed = time.time() - self._start
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_sent / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {
+            "bytes_sent": self.bytes_sent,
+            "bytes_resumed": self.bytes_resumed,
+            "retries": self.retries,
+            "elapsed": self.elapsed,
+            "bytes_per_second": self.bytes_per_second,
+            "part_latencies": self.part_latencies,
+        }
+
+    def __str__(self):
+        return "%.1f MB in %.1fs (%.2f MB/s), %d parts, %d retries, %.1f MB resumed" % (
+            self.bytes_sent / float(MEGABYTE),
+            self.elapsed,
+            self.bytes_per_second / MEGABYTE,
+            len(self.part_latencies),
+            self.retries,
+            self.bytes_resumed / float(MEGABYTE),
+        )
+
+
+class Throttle(object):
+    """
+    Keep the average transfer rate under ``rate`` bytes per second.
+    """
+
+    def __init__(self, rate):
+        self._rate = float(rate)
+        self._lock = threading.Lock()
+        self._start = None
+        self._sent = 0
+
+    def consume(self, size):
+        if self._rate <= 0:
+            return
+        with self._lock:
+            now = time.time()
+            if self._start is None:
+                self._start = now
+            self._sent += size
+            delay = self._start + self._sent / self._rate - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ShotgunTransport(object):
+    """
+    Multipart uploads through the Shotgun API.
+
+    shotgun_api3 only exposes whole file uploads, the parts are sent with the
+    same internal calls ``Shotgun.upload`` uses for cloud storage. When those
+    aren't available, eg. with a local storage site, :attr:`supports_parts` is
+    False and the file is sent in one request.
+    """
+
+    _PART_METHODS = (
+        "_get_attachment_upload_info",
+        "_get_upload_part_link",
+        "_upload_data_to_storage",
+        "_complete_multipart_upload",
+        "_send_form",
+        "_auth_params",
+    )
+
+    def __init__(self, sg):
+        self._sg = sg
+
+    @property
+    def supports_parts(self):
+        if not all(hasattr(self._sg, method) for method in self._PART_METHODS):
+            return False
+        return bool(self._sg.server_info.get("s3_uploads_enabled", False))
+
+    def begin(self, entity_type, entity_id, path, field_name):
+        filename = os.path.basename(path)
+        upload_info = self._sg._get_attachment_upload_info(False, filename, True)
+        return {
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "field_name": field_name,
+            "filename": filename,
+            "content_type": mimetypes.guess_type(path)[0] or "application/octet-stream",
+            "upload_info": upload_info,
+        }
+
+    def send_part(self, session, part_number, data):
+        url = self._sg._get_upload_part_link(session["upload_info"], session["filename"], part_number)
+        return self._sg._upload_data_to_storage(data, session["content_type"], len(data), url)
+
+    def complete(self, session, tokens):
+        self._sg._complete_multipart_upload(session["upload_info"], session["filename"], tokens)
+        # link the stored file to the entity field
+        config = self._sg.config
+        url = urlunparse((config.scheme, config.server, "/upload/api_link_file", None, None, None))
+        params = {
+            "entity_type": session["entity_type"],
+            "entity_id": session["entity_id"],
+            "upload_link_info": session["upload_info"]["upload_info"],
+            "field_name": session["field_name"],
+            "display_name": session["filename"],
+        }
+        params.update(self._sg._auth_params())
+        result = self._sg._send_form(url, params)
+        if not str(result).startswith("1"):
+            raise UploadError("Could not link %s: %s" % (session["filename"], result))
+        return int(str(result).split(":", 2)[1].split("\n", 1)[0])
+
+    def upload(self, entity_type, entity_id, path, field_name):
+        return self._sg.upload(entity_type, entity_id, path, field_name=field_name)
+
+
+class ChunkedUploader(object):
+    """
+    Upload a movie in parts, retrying failed parts with exponential backoff.
+
+    Confirmed parts are saved in a state file, an interrupted upload of the
+    same file carries on from the last confirmed part, even in a later
+    session. The transport is any object with the :class:`ShotgunTransport`
+    interface, so a local stand-in server can be used instead of Shotgun.
+    progress is called with the bytes sent, resumed ones included, and the
+    size of the movie after each part.
+    """
+
+    def __init__(
+        self,
+        transport,
+        logger,
+        part_size=PART_SIZE,
+        max_retries=MAX_RETRIES,
+        bandwidth_limit=0,
+        state_directory=None,
+        sleep=time.sleep,
+        progress=None,
+    ):
+        self._transport = transport
+        self._logger = logger
+        self._part_size = max(MIN_PART_SIZE, part_size)
+        self._max_retries = max_retries
+        self._throttle = Throttle(bandwidth_limit)
+        self._state_directory = state_directory or os.path.join(tempfile.gettempdir(), "tk-maya-playblast-uploads")
+        self._sleep = sleep
+        self._progress = progress
+        self.stats = None
+
+    def upload(self, entity_type, entity_id, path, field_name="sg_uploaded_movie"):
+        self.stats = UploadStats()
+        try:
+            if not self._transport.supports_parts:
+                size = os.path.getsize(path)
+                # a single request can't be throttled or resumed, only retried
+                result = self._retry("upload", self._transport.upload, entity_type, entity_id, path, field_name)
+                self.stats.bytes_sent = size
+                if self._progress:
+                    self._progress(size, size)
+                return result
+            state_path = self._state_path(entity_type, entity_id, path, field_name)
+            resuming = os.path.exists(state_path)
+            try:
+                return self._upload_parts(state_path, entity_type, entity_id, path, field_name)
+            except UploadError:
+                if not resuming:
+                    raise
+                # the resumed session may have expired on the server
+                self._logger.warning("Resuming upload of %s failed, starting over", path)
+                self._remove_state(state_path)
+                return self._upload_parts(state_path, entity_type, entity_id, path, field_name)
+        finally:
+            self.stats.stop()
+            self._logger.debug("Upload of %s: %s", path, self.stats)
+
+    def _upload_parts(self, state_path, entity_type, entity_id, path, field_name):
+        signature = self._signature(path)
+        state = self._load_state(state_path)
+        if state and state.get("signature") == signature and state.get("part_size") == self._part_size:
+            self._logger.debug("Resuming upload of %s after %d parts", path, len(state["tokens"]))
+        else:
+            session = self._retry("begin", self._transport.begin, entity_type, entity_id, path, field_name)
+            state = {"signature": signature, "part_size": self._part_size, "session": session, "tokens": []}
+            self._save_state(state_path, state)
+
+        tokens = state["tokens"]
+        size = os.path.getsize(path)
+        with open(path, "rb") as handle:
+            handle.seek(len(tokens) * self._part_size)
+            self.stats.bytes_resumed = handle.tell()
+            for data in iter(lambda: handle.read(self._part_size), b""):
+                part_number = len(tokens) + 1
+                self._throttle.consume(len(data))
+                start = time.time()
+                token = self._retry(
+                    "part %d" % part_number, self._transport.send_part, state["session"], part_number, data
+                )
+                self.stats.part_latencies.append(time.time() - start)
+                self.stats.bytes_sent += len(data)
+                tokens.append(token)
+                self._save_state(state_path, state)
+                if self._progress:
+                    self._progress(handle.tell(), size)
+
+        result = self._retry("complete", self._transport.complete, state["session"], tokens)
+        self._remove_state(state_path)
+        return result
+
+    def _retry(self, description, func, *args):
+        attempt = 0
+        while True:
+            try:
+                return func(*args)
+            except Exception as error:
+                attempt += 1
+                if attempt > self._max_retries:
+                    raise UploadError("Upload %s failed after %d attempts: %s" % (description, attempt, error))
+                delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+                # jitter, so workstations failing together don't retry together
+                delay *= random.uniform(0.5, 1.0)
+                self.stats.retries += 1
+                self._logger.warning(
+                    "Upload %s failed (%s), retrying in %.1fs (%d/%d)",
+                    description, error, delay, attempt, self._max_retries
+                )
+                self._sleep(delay)
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return [stat.st_size, int(stat.st_mtime)]
+
+    def _state_path(self, entity_type, entity_id, path, field_name):
+        key = "|".join([entity_type, str(entity_id), os.path.abspath(path), field_name])
+        return os.path.join(self._state_directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    @staticmethod
+    def _load_state(state_path):
+        try:
+            with open(state_path) as handle:
+                return json.load(handle)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _save_state(self, state_path, state):
+        if not os.path.isdir(self._state_directory):
+            os.makedirs(self._state_directory)
+        temporary = file_copy.temporary_path(state_path)
+        with open(temporary, "w") as handle:
+            json.dump(state, handle)
+        file_copy.atomic_rename(temporary, state_path)
+
+    @staticmethod
+    def _remove_state(state_path):
+        if os.path.exists(state_path):
+            os.remove(state_path)
@@ -0,0 +1,85 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+REZ_PACKAGES = ["rv"]
+SESSION_TAG = "tk-maya-playblast"
+
+
+class ViewerLauncher(object):
+    """
+    Open playblasts in RV without blocking Maya.
+
+    The rez environment is resolved once and saved as a context file, later
+    launches reuse it instead of resolving again. Movies are sent through
+    ``rvpush`` with a session tag, so an RV opened by an earlier playblast is
+    reused and only a new one is started when none is running.
+    """
+
+    def __init__(self, logger, packages=None, tag=SESSION_TAG, context_directory=None):
+        self._logger = logger
+        self._packages = list(packages or REZ_PACKAGES)
+        self._tag = tag
+        self._context_path = os.path.join(
+            context_directory or tempfile.gettempdir(),
+            "%s-%s.rxt" % (tag, "-".join(self._packages))
+        )
+        self._lock = threading.Lock()
+        self._resolved = False
+
+    def show(self, movie_path):
+        """
+        Send the movie to the viewer from a background thread and return.
+        """
+        thread = threading.Thread(target=self._show, args=(str(movie_path),), name="PlayblastViewer")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def invalidate(self):
+        with self._lock:
+            self._resolved = False
+            if os.path.exists(self._context_path):
+                os.remove(self._context_path)
+
+    def _show(self, movie_path):
+        try:
+            with self._lock:
+                self._resolve()
+            self._spawn(
+                ["rez", "env", "--input", self._context_path, "--",
+                 "rvpush", "-tag", self._tag, "set", movie_path]
+            )
+        except Exception:
+            self._logger.error("Unable to open %s in the viewer", movie_path, exc_info=True)
+            # a broken context, eg. a package removed since, is resolved again next time
+            self.invalidate()
+
+    def _resolve(self):
+        if self._resolved and os.path.isfile(self._context_path):
+            return
+        self._logger.debug("Resolving viewer environment %s", " ".join(self._packages))
+        subprocess.check_call(
+            ["rez", "env"] + self._packages + ["--output", self._context_path],
+            **self._popen_kwargs()
+        )
+        self._resolved = True
+
+    def _spawn(self, command):
+        self._logger.debug("Launching viewer: %s", subprocess.list2cmdline(command))
+        return subprocess.Popen(command, close_fds=True, **self._popen_kwargs(detached=True))
+
+    @staticmethod
+    def _popen_kwargs(detached=False):
+        kwargs = {}
+        if sys.platform == "win32":
+            if detached:
+                # don't die with Maya
+                kwargs["creationflags"] = 0x00000008 | 0x00000200  # DETACHED_PROCESS | CREATE_NEW_PROCESS_GROUP
+            else:
+                kwargs["creationflags"] = 0x08000000  # CREATE_NO_WINDOW
+        elif detached:
+            kwargs["preexec_fn"] = os.setsid
+        return kwargs